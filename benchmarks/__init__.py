@@ -0,0 +1 @@
+"""Performance benchmarks for the bot FSM and game servers"""
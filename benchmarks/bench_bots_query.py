@@ -0,0 +1,46 @@
+"""
+Benchmark: GET /bots payload size and latency with and without projection,
+state filtering and paging
+
+A few bots are put in ATTACK and the rest left idle, so the state filter
+shows the per-state index answering in time proportional to the matches.
+
+Run from the repository root:
+    python -m benchmarks.bench_bots_query [bots] [attacking]
+"""
+
+import sys
+import time
+
+from fsm_server import app, bot_manager
+
+
+def measure(client, query, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        response = client.get('/bots', query_string=query)
+    elapsed = (time.perf_counter() - start) / repeat
+    return elapsed, len(response.get_data())
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    attacking = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    for _ in range(count):
+        bot_manager.create_bot()
+    for bot in bot_manager.get_all_bots().values()[:attacking]:
+        bot.update(True, 5.0)
+        bot.update(True, 5.0)
+
+    client = app.test_client()
+    print(f"GET /bots with {count:,} bots ({attacking} attacking)")
+    for label, query in (
+        ("everything", {}),
+        ("fields=bot_id,state", {"fields": "bot_id,state"}),
+        ("limit=100", {"limit": 100}),
+        ("state=attack", {"state": "attack"}),
+        ("state=attack, 2 fields", {"state": "attack", "fields": "bot_id,health"}),
+    ):
+        elapsed, size = measure(client, query)
+        print(f"  {label:<24} {elapsed * 1000:>9.2f} ms {size / 1024:>10,.1f} KiB")
@@ -0,0 +1,41 @@
+"""
+Benchmark: polling GET /bots and /state with and without If-None-Match
+
+Polls with state_since so the responses are cacheable, and compares a full
+response with a 304 answered from the version counters while no bot has
+changed.
+
+Run from the repository root:
+    python -m benchmarks.bench_conditional [bots] [polls]
+"""
+
+import sys
+import time
+
+from fsm_server import app, bot_manager
+
+
+def poll(client, path, query, polls, conditional):
+    headers = {}
+    if conditional:
+        headers["If-None-Match"] = client.get(path, query_string=query).headers["ETag"]
+    start = time.perf_counter()
+    for _ in range(polls):
+        response = client.get(path, query_string=query, headers=headers)
+    return (time.perf_counter() - start) / polls, response.status_code, len(response.get_data())
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    polls = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    bot_ids = [bot_manager.create_bot() for _ in range(count)]
+    client = app.test_client()
+
+    print(f"Polling {count:,} bots, {polls} polls each")
+    for path, query in (("/bots", {"state_since": 1}),
+                        ("/state", {"bot_id": bot_ids[0], "state_since": 1})):
+        for conditional in (False, True):
+            elapsed, status, size = poll(client, path, query, polls, conditional)
+            label = f"{path} {'If-None-Match' if conditional else 'unconditional'}"
+            print(f"  {label:<28} {status} {elapsed * 1000:>9.3f} ms/poll {size:>12,} bytes")
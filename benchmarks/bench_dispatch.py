@@ -0,0 +1,118 @@
+"""
+Benchmark: per-bot calls on the engine-backed Bot vs the original Bot
+
+The original one-object-per-bot Bot, with its Enum-comparing if/elif
+dispatch, is loaded from git (commit f5341dd, before the struct-of-arrays
+engine) and driven with the same inputs as the current Bot view.  The
+"dispatch" row times the transition logic alone: the original update()
+with its get_state_info() call stubbed out, against the compiled table
+dispatch (BotEngine.step) under the slot's stripe.  Runs of the two are
+interleaved and the best of REPEAT is reported, so load on the machine
+hits both alike.
+
+Run from the repository root:
+    python -m benchmarks.bench_dispatch [commit]
+"""
+
+import random
+import subprocess
+import sys
+import time
+import types
+
+from bot_fsm import BotManager
+
+ROUNDS = 200_000
+REPEAT = 5
+BASELINE_COMMIT = "f5341dd"
+# Large enough that take_damage(1) never kills the bot
+HEALTH = 10 * ROUNDS * REPEAT
+
+
+def load_baseline(commit):
+    """Import bot_fsm.py as it was at a commit, as a separate module"""
+    source = subprocess.run(["git", "show", f"{commit}:bot_fsm.py"], capture_output=True,
+                            text=True, check=True).stdout
+    module = types.ModuleType(f"bot_fsm_{commit}")
+    exec(compile(source, f"{commit}:bot_fsm.py", "exec"), module.__dict__)
+    return module
+
+
+def make_inputs(seed=42):
+    rng = random.Random(seed)
+    return [(rng.random() < 0.6, rng.uniform(0, 80)) for _ in range(ROUNDS)]
+
+
+def timed(loop):
+    random.seed(0)
+    start = time.perf_counter()
+    loop()
+    return time.perf_counter() - start
+
+
+def loops(bot, inputs):
+    """(name, loop) pairs timing each per-bot call"""
+    def update():
+        for visible, distance in inputs:
+            bot.update(visible, distance)
+
+    def state_info():
+        for _ in range(ROUNDS):
+            bot.get_state_info()
+
+    def take_damage():
+        for _ in range(ROUNDS):
+            bot.take_damage(1)
+
+    def no_damage():
+        for _ in range(ROUNDS):
+            bot.take_damage(0)
+
+    return [("update", update), ("get_state_info", state_info),
+            ("take_damage(1)", take_damage), ("take_damage(0)", no_damage)]
+
+
+def baseline_dispatch(module, inputs):
+    """The original update() without building its state info"""
+    bot = type("DispatchOnly", (module.Bot,), {"get_state_info": lambda self: None})(
+        "dispatch", HEALTH)
+
+    def dispatch():
+        for visible, distance in inputs:
+            bot.update(visible, distance)
+
+    return dispatch
+
+
+def engine_dispatch(bot, inputs):
+    engine, slot = bot.engine, bot.slot
+    now = engine.clock.now
+
+    def dispatch():
+        for visible, distance in inputs:
+            engine.write(slot, engine.step, slot, visible, distance, now())
+
+    return dispatch
+
+
+if __name__ == "__main__":
+    commit = sys.argv[1] if len(sys.argv) > 1 else BASELINE_COMMIT
+    inputs = make_inputs()
+    module = load_baseline(commit)
+    baseline = module.Bot("bench", HEALTH)
+    manager = BotManager()
+    bot = manager.get_bot(manager.create_bot(HEALTH))
+
+    rows = list(zip(loops(baseline, inputs), loops(bot, inputs)))
+    rows.append((("dispatch", baseline_dispatch(module, inputs)),
+                 ("dispatch", engine_dispatch(bot, inputs))))
+
+    print(f"Per-bot calls, {ROUNDS} each, best of {REPEAT}")
+    print(f"  {'':<16} {'original':>10} {'engine':>10}")
+    for (name, original), (_, current) in rows:
+        best_original = best_current = float("inf")
+        for _ in range(REPEAT):
+            best_original = min(best_original, timed(original))
+            best_current = min(best_current, timed(current))
+        print(f"  {name:<16} {best_original / ROUNDS * 1e9:7.0f} ns {best_current / ROUNDS * 1e9:7.0f} ns"
+              f" {best_current / best_original:6.2f}x")
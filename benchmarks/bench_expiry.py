@@ -0,0 +1,76 @@
+"""
+Benchmark: ExpiryIndex touches and expiry vs. the old periodic full scan
+
+Simulates N players sending player_update at 20 Hz on a fake clock, a
+tenth of them going silent partway through.  Reports the cost of a touch,
+the expiry work per simulated second, how late players were removed, and
+what a scan of every player every 30 s (the old cleanup thread) costs and
+how late it removes them.
+
+Run from the repository root:
+    python -m benchmarks.bench_expiry [players] [seconds]
+"""
+
+import random
+import sys
+import time
+
+from expiry import ExpiryIndex
+
+RATE = 20  # updates per player per second
+TIMEOUT = 60.0
+SCAN_INTERVAL = 30.0
+
+
+if __name__ == "__main__":
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+
+    random.seed(7)
+    silent_at = {f"p{i}": random.uniform(0, seconds - TIMEOUT) if random.random() < 0.1 else None
+                 for i in range(players)}
+    clock = [0.0]
+    index = ExpiryIndex(TIMEOUT, None, clock=lambda: clock[0])
+    last_update = {}
+    removed = {}
+
+    touch_time = expire_time = scan_time = 0.0
+    touches = 0
+    scanned = {}
+    next_scan = SCAN_INTERVAL
+    for step in range(seconds * RATE):
+        clock[0] = now = step / RATE
+        start = time.perf_counter()
+        for player, silent in silent_at.items():
+            if silent is None or now < silent:
+                index.touch(player)
+                touches += 1
+        touch_time += time.perf_counter() - start
+        for player, silent in silent_at.items():
+            if silent is None or now < silent:
+                last_update[player] = now
+
+        start = time.perf_counter()
+        for player in index.pop_expired():
+            removed[player] = now
+        expire_time += time.perf_counter() - start
+
+        if now >= next_scan:
+            next_scan += SCAN_INTERVAL
+            start = time.perf_counter()
+            for player, updated in list(last_update.items()):
+                if now - updated > TIMEOUT:
+                    scanned[player] = now
+                    del last_update[player]
+            scan_time += time.perf_counter() - start
+
+    def lateness(found):
+        late = [found[player] - (silent_at[player] + TIMEOUT) for player in found]
+        return max(late + [0.0])
+
+    print(f"{players:,} players, {seconds} s at {RATE} Hz, timeout {TIMEOUT:g} s")
+    print(f"  touch                 {touch_time / touches * 1e9:>10,.0f} ns")
+    print(f"  expiry heap           {expire_time / seconds * 1e6:>10,.1f} us per second"
+          f"   {len(removed)} removed, at most {lateness(removed):.2f} s late")
+    print(f"  full scan every {SCAN_INTERVAL:g} s {scan_time / seconds * 1e6:>9,.1f} us per second"
+          f"   {len(scanned)} removed, at most {lateness(scanned):.2f} s late")
@@ -0,0 +1,197 @@
+"""
+Benchmark: FSM core hot paths, with regression checks
+
+Times Bot.update in each state (with perception that keeps the bot there),
+_transition_to, get_state_info, take_damage, heal, and BotManager
+create_bot/remove_bot/reset_all, each at several population sizes.  Bots
+run on a TickClock that never advances and the random IDLE/PATROL timers are
+seeded, so every run does exactly the same work.  Each case is run
+--repeat times and the median nanoseconds per call is reported.
+
+Results go to a JSON file; --compare reads an earlier one and exits 1 when
+a case's median grew by more than --threshold percent (or the percentage
+given for that case with --case-threshold, for noisy cases):
+
+    python -m benchmarks.bench_fsm_core --output before.json
+    python -m benchmarks.bench_fsm_core --output after.json --compare before.json \\
+        --case-threshold reset_all=40
+
+Run from the repository root:
+    python -m benchmarks.bench_fsm_core [--bots 10,1000,100000] [--calls N]
+        [--repeat R] [--output FILE] [--compare FILE] [--threshold PERCENT]
+        [--case-threshold CASE=PERCENT ...]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.regression import compare, load_report, write_report
+from bot_fsm import BotManager, BotState, TickClock
+
+# Perception (player_visible, player_distance) and health that keep a bot
+# in each state, so update() exercises that state's rules every call
+STEADY = {
+    BotState.IDLE: (False, float("inf"), 100),
+    BotState.PATROL: (False, float("inf"), 100),
+    BotState.CHASE: (True, 20.0, 100),
+    BotState.ATTACK: (True, 5.0, 100),
+    BotState.FLEE: (True, 40.0, 10),
+    BotState.DEAD: (True, 5.0, 0),
+}
+
+
+def put_in_state(manager, bots, state):
+    """Reset every bot, then move it to state with matching health"""
+    manager.reset_all()
+    _, _, health = STEADY[state]
+    for bot in bots:
+        if health < 100:
+            bot.take_damage(100 - health)
+        if state != BotState.IDLE:
+            bot._transition_to(state, "Benchmark setup")
+
+
+def cases(manager, bots, calls):
+    """
+    (name, setup, run) for every case at one population
+
+    run() makes `calls` calls spread round-robin over the bots and returns
+    how many it made (reset_all makes fewer, since each call is O(bots)).
+    """
+    picks = [bots[i % len(bots)] for i in range(calls)]
+
+    def update_in(state):
+        visible, distance, _ = STEADY[state]
+
+        def run():
+            for bot in picks:
+                bot.update(visible, distance)
+            return calls
+        return (f"update[{state.value}]", lambda: put_in_state(manager, bots, state), run)
+
+    def transition():
+        target = (BotState.CHASE, BotState.ATTACK)
+        for i, bot in enumerate(picks):
+            bot._transition_to(target[i & 1], "Benchmark transition")
+        return calls
+
+    def state_info():
+        for bot in picks:
+            bot.get_state_info()
+        return calls
+
+    # Small enough that no bot's health reaches 0 (or back past max) in a run
+    amount = min(1.0, 50 * len(bots) / calls)
+
+    def damage():
+        for bot in picks:
+            bot.take_damage(amount)
+        return calls
+
+    def heal():
+        for bot in picks:
+            bot.heal(amount)
+        return calls
+
+    created = []
+
+    def add_bots():
+        for _ in range(calls):
+            created.append(manager.create_bot())
+        return calls
+
+    def remove_added():
+        count = len(created)
+        while created:
+            manager.remove_bot(created.pop())
+        return count
+
+    def reset_all():
+        passes = max(1, calls // len(bots))
+        for _ in range(passes):
+            manager.reset_all()
+        return passes
+
+    def fresh():
+        manager.reset_all()
+
+    return [update_in(state) for state in STEADY] + [
+        ("_transition_to", fresh, transition),
+        ("get_state_info", fresh, state_info),
+        ("take_damage", fresh, damage),
+        ("heal", lambda: None, heal),  # after take_damage, so below max
+        # Each adds or removes `calls` bots on top of the population
+        ("create_bot", remove_added, add_bots),
+        ("remove_bot", add_bots, remove_added),
+        ("reset_all", remove_added, reset_all),
+    ]
+
+
+def run(populations, calls, repeat, seed=0):
+    results = []
+    for population in populations:
+        random.seed(seed)  # idle/patrol timers
+        manager = BotManager(clock=TickClock())
+        for _ in range(population):
+            manager.create_bot()
+        bots = manager.get_all_bots().values()
+        print(f"{population:,} bots")
+
+        for name, setup, body in cases(manager, bots, calls):
+            samples = []
+            for _ in range(repeat):
+                random.seed(seed)
+                setup()
+                start = time.perf_counter()
+                count = body()
+                samples.append((time.perf_counter() - start) / count * 1e9)
+            entry = {
+                "bots": population,
+                "case": name,
+                "calls": count,
+                "median_ns": round(statistics.median(samples), 1),
+                "min_ns": round(min(samples), 1),
+            }
+            results.append(entry)
+            print(f"  {name:<18} {entry['median_ns']:>12,.1f} ns/call  (min {entry['min_ns']:,.1f})")
+    return results
+
+
+def case_threshold(text):
+    name, _, percent = text.partition("=")
+    try:
+        return name, float(percent)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected CASE=PERCENT, got {text!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FSM core micro-benchmarks")
+    parser.add_argument("--bots", default="10,1000,100000",
+                        help="comma separated bot populations (default 10,1000,100000)")
+    parser.add_argument("--calls", type=int, default=20000,
+                        help="calls per case and repeat (default 20000)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs per case; the median is reported (default 5)")
+    parser.add_argument("--output", default="bench_fsm_core.json",
+                        help="where to write the JSON results (default bench_fsm_core.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=15.0,
+                        help="median increase in percent counted as a regression (default 15)")
+    parser.add_argument("--case-threshold", type=case_threshold, action="append", default=[],
+                        metavar="CASE=PERCENT", help="threshold for one case, e.g. reset_all=40")
+    args = parser.parse_args()
+
+    populations = sorted(int(count) for count in args.bots.split(","))
+    results = run(populations, args.calls, args.repeat)
+    write_report(args.output, "bench_fsm_core", results, calls=args.calls, repeat=args.repeat)
+
+    if args.compare:
+        regressions = compare(results, load_report(args.compare), "case", "median_ns", "ns",
+                              args.threshold, dict(args.case_threshold))
+        if regressions:
+            print(f"FAILED: {len(regressions)} regressions")
+            sys.exit(1)
@@ -0,0 +1,56 @@
+"""
+Benchmark: cost of transition history recording, off vs on
+
+Run from the repository root:
+    python -m benchmarks.bench_history [bots] [ticks]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from bot_fsm import BotManager, TickClock
+
+
+def run(history_size, bot_count, ticks, batched):
+    random.seed(0)
+    rng = np.random.default_rng(0)
+    clock = TickClock(0.1)
+    manager = BotManager(clock=clock)
+    if history_size:
+        manager.enable_history(history_size)
+    for _ in range(bot_count):
+        manager.create_handle()
+
+    engine = manager.engine
+    n = engine.size
+    inputs = [(rng.random(n) < 0.5, rng.uniform(0, 80, n)) for _ in range(8)]
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        clock.advance()
+        visible, distance = inputs[tick % len(inputs)]
+        if batched:
+            manager.update_all(visible, distance)
+        else:
+            now = clock.now()
+            for slot in range(n):
+                engine.step(slot, visible[slot], distance[slot], now)
+    elapsed = time.perf_counter() - start
+    transitions = sum(map(sum, engine.transition_counts()))
+    return elapsed / (bot_count * ticks) * 1e9, transitions
+
+
+if __name__ == "__main__":
+    bot_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    for batched, label in ((False, "per-bot step"), (True, "update_all")):
+        count = bot_count // 10 if not batched else bot_count
+        off, _ = run(0, count, ticks, batched)
+        on, transitions = run(16, count, ticks, batched)
+        print(f"{label:<13} history off {off:8.1f} ns/update   "
+              f"on {on:8.1f} ns/update   overhead {(on - off) / off:+.1%}   "
+              f"({transitions:,} transitions recorded)")
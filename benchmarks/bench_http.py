@@ -0,0 +1,193 @@
+"""
+Benchmark: requests per second and latency of every fsm_server endpoint
+
+Drives fsm_server.app in process through Flask's test client (no server,
+no network) at several bot populations, measuring requests per second and
+p50/p99 latency per endpoint, and writes the results to a JSON file so runs
+on different commits can be compared:
+
+    python -m benchmarks.bench_http --output before.json
+    (check out another commit)
+    python -m benchmarks.bench_http --output after.json --compare before.json
+
+With --compare, endpoints whose p50 grew by more than --threshold percent
+are reported as regressions and the exit status is 1.  Requests are sent
+one at a time, so requests per second is 1 / mean latency.  Transition
+history is enabled, as /history and /stats need it, and any response
+with an unexpected status stops the run: timing error pages would only
+hide a broken endpoint.
+
+Run from the repository root:
+    python -m benchmarks.bench_http [--bots 10,1000,100000] [--requests N]
+        [--seconds S] [--output FILE] [--compare FILE] [--threshold PERCENT]
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+
+from benchmarks.regression import compare, load_report, write_report
+from fsm_server import app, bot_manager
+import bot_wire
+
+# Each endpoint is timed for --requests requests or --seconds seconds,
+# whichever comes first, but never fewer than this many requests
+MIN_SAMPLES = 5
+
+# Transitions kept per bot, so /history and /stats have something to serve
+HISTORY_SIZE = 16
+
+# Status each endpoint must answer with, where it is not 200
+EXPECTED_STATUS = {"GET /state 304": 304}
+
+
+def endpoints(client, rng, bot_ids, created):
+    """(name, request function) for every endpoint, in the order they run"""
+
+    def some_bot():
+        return rng.choice(bot_ids)
+
+    def perception():
+        return {"bot_id": some_bot(), "player_visible": rng.random() < 0.5,
+                "player_distance": rng.uniform(0, 80)}
+
+    def create():
+        response = client.post('/create', json={"initial_health": 100})
+        created.append(response.get_json()["bot_id"])
+        return response
+
+    conditional = {}
+
+    def state_not_modified():
+        # The tag is fetched by the warm-up call; nothing changes the bot
+        # while this endpoint is timed
+        query = {"bot_id": bot_ids[0], "state_since": 1}
+        if "etag" not in conditional:
+            conditional["etag"] = client.get('/state', query_string=query).headers["ETag"]
+        return client.get('/state', query_string=query,
+                          headers={"If-None-Match": conditional["etag"]})
+
+    def remove():
+        if not created:
+            created.append(client.post('/create', json={}).get_json()["bot_id"])
+        return client.post('/remove', json={"bot_id": created.pop()})
+
+    return [
+        ("POST /create", create),
+        ("POST /remove", remove),  # the bots /create added
+        ("POST /update", lambda: client.post('/update', json=perception())),
+        ("POST /update binary", lambda: client.post('/update', json=perception(),
+                                                    headers={"Accept": bot_wire.MEDIA_TYPE})),
+        ("POST /update_batch x100", lambda: client.post(
+            '/update_batch', json=[perception() for _ in range(100)])),
+        ("POST /perception", lambda: client.post('/perception', json=perception())),
+        ("POST /positions", lambda: client.post('/positions', json={
+            "players": {"player_1": {"x": rng.uniform(-100, 100), "y": 0, "z": rng.uniform(-100, 100)}},
+            "bots": {some_bot(): {"x": rng.uniform(-100, 100), "y": 0, "z": rng.uniform(-100, 100)}}})),
+        ("POST /damage", lambda: client.post('/damage', json={"bot_id": some_bot(), "damage": 10})),
+        ("POST /heal", lambda: client.post('/heal', json={"bot_id": some_bot(), "amount": 10})),
+        ("POST /reset", lambda: client.post('/reset', json={"bot_id": some_bot()})),
+        ("GET /state", lambda: client.get('/state', query_string={"bot_id": some_bot()})),
+        ("GET /state 304", state_not_modified),
+        ("GET /bots", lambda: client.get('/bots')),
+        ("GET /bots binary", lambda: client.get('/bots', headers={"Accept": bot_wire.MEDIA_TYPE})),
+        ("GET /bots limit=100", lambda: client.get('/bots', query_string={
+            "limit": 100, "cursor": rng.randint(0, bot_manager.next_bot_id)})),
+        ("GET /bots state=chase", lambda: client.get('/bots', query_string={"state": "chase"})),
+        ("GET /changes", lambda: client.get('/changes', query_string={
+            "since": max(0, bot_manager.version - 100)})),
+        ("GET /history", lambda: client.get('/history', query_string={"bot_id": some_bot()})),
+        ("GET /stats", lambda: client.get('/stats')),
+    ]
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def check(name, response):
+    """Raise unless an endpoint answered with its expected status"""
+    expected = EXPECTED_STATUS.get(name, 200)
+    if response.status_code != expected:
+        raise RuntimeError(f"{name}: expected status {expected}, got {response.status_code}: "
+                           f"{response.get_data(as_text=True)[:200]}")
+
+
+def measure(name, call, requests, seconds):
+    """Time one endpoint; returns its result entry"""
+    check(name, call())  # warm up
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while len(latencies) < requests and (len(latencies) < MIN_SAMPLES
+                                         or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        response = call()
+        latencies.append(time.perf_counter() - start)
+        check(name, response)
+    elapsed = sum(latencies)
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "bytes": len(response.get_data()),
+    }
+
+
+def run(populations, requests, seconds, seed=0):
+    """
+    Benchmark every endpoint at each population
+
+    Bots are added to the global manager between populations, so they
+    must be given in increasing order.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)  # idle/patrol timers
+    client = app.test_client()
+    if not bot_manager.engine.history_size:
+        bot_manager.enable_history(HISTORY_SIZE)
+    bot_ids = list(bot_manager.get_all_bots())
+    results = []
+    for population in populations:
+        while len(bot_ids) < population:
+            bot_ids.append(bot_manager.create_bot())
+        print(f"{population:,} bots")
+        created = []
+        for name, call in endpoints(client, rng, bot_ids, created):
+            entry = measure(name, call, requests, seconds)
+            results.append({"bots": population, "endpoint": name, **entry})
+            print(f"  {name:<26} {entry['rps']:>10,.0f} req/s  p50 {entry['p50_ms']:>9.3f} ms"
+                  f"  p99 {entry['p99_ms']:>9.3f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-process fsm_server endpoint benchmark")
+    parser.add_argument("--bots", default="10,1000,100000",
+                        help="comma separated bot populations (default 10,1000,100000)")
+    parser.add_argument("--requests", type=int, default=1000,
+                        help="most requests per endpoint and population (default 1000)")
+    parser.add_argument("--seconds", type=float, default=2.0,
+                        help="time budget per endpoint and population (default 2)")
+    parser.add_argument("--output", default="bench_http.json",
+                        help="where to write the JSON results (default bench_http.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="p50 increase in percent counted as a regression (default 20)")
+    args = parser.parse_args()
+
+    populations = sorted(int(count) for count in args.bots.split(","))
+    results = run(populations, args.requests, args.seconds)
+    write_report(args.output, "bench_http", results,
+                 requests=args.requests, seconds=args.seconds)
+
+    if args.compare:
+        regressions = compare(results, load_report(args.compare), "endpoint", "p50_ms", "ms",
+                              args.threshold)
+        if regressions:
+            print(f"FAILED: {len(regressions)} regressions")
+            sys.exit(1)
@@ -0,0 +1,39 @@
+"""
+Benchmark: SimulationLoop tick cost and the highest sustainable tick rate
+
+Each tick a slice of the bots gets fresh perception through
+submit_perception(), as clients posting to /perception would, then the
+loop ticks once.  Reports tick durations and the rate at which ticks would
+start overrunning.
+
+Run from the repository root:
+    python -m benchmarks.bench_loop [bots] [ticks] [updates per tick]
+"""
+
+import random
+import sys
+
+from bot_fsm import BotManager, SimulationLoop, TickClock
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    per_tick = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+    random.seed(7)
+    manager = BotManager(clock=TickClock(0.05))
+    bot_ids = [manager.create_bot() for _ in range(count)]
+    loop = SimulationLoop(manager, rate=20.0)
+
+    for _ in range(ticks):
+        for bot_id in random.sample(bot_ids, per_tick):
+            manager.submit_perception(bot_id, random.random() < 0.5, random.uniform(0, 80))
+        loop.step()
+
+    stats = loop.stats()
+    print(f"{count:,} bots, {ticks} ticks, {per_tick:,} perception updates per tick")
+    print(f"  mean {stats['mean_tick_ms']:.3f} ms   max {stats['max_tick_ms']:.3f} ms   "
+          f"{stats['transitions'] / ticks:,.0f} transitions/tick")
+    print(f"  sustainable rate ~{1000 / stats['mean_tick_ms']:,.0f} ticks/s "
+          f"(overruns start at {1000 / stats['max_tick_ms']:,.0f} ticks/s worst case)")
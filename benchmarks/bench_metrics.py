@@ -0,0 +1,66 @@
+"""
+Benchmark: cost of the metrics layer
+
+Measures one histogram observation (single thread and with threads
+contending for the same histogram), the per-request overhead of the Flask
+hooks on POST /update, and the cost of rendering /metrics.
+
+Run from the repository root:
+    python -m benchmarks.bench_metrics [observations]
+"""
+
+import sys
+import threading
+import time
+
+from flask import Flask
+
+from fsm_server import app, bot_manager, metrics
+from metrics import Histogram
+
+
+def observe_cost(count, threads=1):
+    histogram = Histogram()
+
+    def work():
+        for i in range(count):
+            histogram.observe(i * 1e-7)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (count * threads)
+
+
+def request_cost(flask_app, count):
+    client = flask_app.test_client()
+    update = {"bot_id": bot_manager.create_bot(), "player_visible": False, "player_distance": 50}
+    start = time.perf_counter()
+    for _ in range(count):
+        client.post('/update', json=update)
+    return (time.perf_counter() - start) / count
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    print(f"Histogram.observe, 1 thread     {observe_cost(count) * 1e9:>9.0f} ns")
+    print(f"Histogram.observe, 8 threads    {observe_cost(count // 8, 8) * 1e9:>9.0f} ns")
+
+    # The same view function on an app without the hooks
+    bare = Flask("bare")
+    bare.add_url_rule('/update', view_func=app.view_functions['update_bot'], methods=['POST'])
+    requests = max(1, count // 100)
+    bare_cost = request_cost(bare, requests)
+    instrumented_cost = request_cost(app, requests)
+    print(f"POST /update without metrics    {bare_cost * 1e6:>9.1f} us")
+    print(f"POST /update with metrics       {instrumented_cost * 1e6:>9.1f} us "
+          f"(+{(instrumented_cost - bare_cost) * 1e6:.1f} us)")
+
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"render /metrics                 {(time.perf_counter() - start) * 1e3:>9.2f} ms "
+          f"({len(text):,} bytes)")
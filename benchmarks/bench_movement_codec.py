@@ -0,0 +1,94 @@
+"""
+Benchmark: bytes per player per second, JSON world snapshots vs. binary deltas
+
+Simulates players moving around the 100 x 100 arena at 20 snapshots per
+second; a share of them stand still, the rest walk and turn.  One receiver
+sees every player and acknowledges each delta a few ticks late, as it would
+over a real connection.  Reports the payload bytes per player per second
+for the 'world_snapshot' JSON and for movement_codec, and the encode cost.
+Socket.IO framing is the same for both and left out.
+
+Run from the repository root:
+    python -m benchmarks.bench_movement_codec [players] [seconds] [ack_lag_ticks]
+"""
+
+import json
+import math
+import random
+import sys
+import time
+
+from movement_codec import MovementCodec, MovementDecoder
+
+RATE = 20  # snapshots per second
+STILL = 0.3  # share of players not moving
+SPEED = 5.0  # units per second
+
+
+def simulate(players, ticks):
+    """Movement dicts for every player, per tick"""
+    random.seed(7)
+    walkers = []
+    for i in range(players):
+        walkers.append({
+            "id": f"sid-{i:04d}-{random.getrandbits(64):016x}",  # about as long as a real sid
+            "x": random.uniform(-50, 50),
+            "z": random.uniform(-50, 50),
+            "heading": random.uniform(0, math.tau),
+            "still": random.random() < STILL,
+        })
+    frames = []
+    for _ in range(ticks):
+        frame = []
+        for walker in walkers:
+            if not walker["still"]:
+                walker["heading"] += random.uniform(-0.2, 0.2)
+                walker["x"] = max(-49, min(49, walker["x"] + math.sin(walker["heading"]) * SPEED / RATE))
+                walker["z"] = max(-49, min(49, walker["z"] + math.cos(walker["heading"]) * SPEED / RATE))
+            frame.append({
+                "id": walker["id"],
+                "position": {"x": walker["x"], "y": 1.5, "z": walker["z"]},
+                "rotation": {"x": 0, "y": walker["heading"] % math.tau, "z": 0},
+            })
+        frames.append(frame)
+    return frames
+
+
+if __name__ == "__main__":
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    ack_lag = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    frames = simulate(players, seconds * RATE)
+
+    json_bytes = 0
+    for tick, frame in enumerate(frames, 1):
+        json_bytes += len(json.dumps({"tick": tick, "timestamp": time.time(), "players": frame}))
+
+    codec = MovementCodec()
+    codec.add_client("receiver")
+    decoder = MovementDecoder()
+    decoded = []
+    binary_bytes = 0
+    start = time.perf_counter()
+    for tick, frame in enumerate(frames, 1):
+        payload = codec.encode("receiver", tick, frame)
+        if payload:
+            binary_bytes += len(payload)
+            decoder.decode(payload)
+            decoded.append(decoder.last_tick)
+        if len(decoded) > ack_lag:
+            codec.acknowledge("receiver", decoded[-1 - ack_lag])
+    encode_time = time.perf_counter() - start
+
+    codec.add_client("fresh")
+    first = len(codec.encode("fresh", 1, frames[-1]))
+
+    per_second = players * seconds
+    print(f"{players} players, {seconds} s at {RATE} Hz, acks {ack_lag} ticks late "
+          f"({STILL:.0%} standing still)")
+    print(f"  {'JSON world_snapshot':<22} {json_bytes / per_second:>8,.0f} bytes/player/s")
+    print(f"  {'binary world_delta':<22} {binary_bytes / per_second:>8,.0f} bytes/player/s"
+          f"   ({json_bytes / binary_bytes:.1f}x smaller)")
+    print(f"  full snapshot for a new joiner: {first:,} bytes ({first / players:.1f} per player)")
+    print(f"  encode + decode: {encode_time / len(frames) * 1000:.2f} ms/tick")
@@ -0,0 +1,62 @@
+"""
+Benchmark: nearest-player perception by brute force vs. the spatial grid
+
+Run from the repository root:
+    python -m benchmarks.bench_perception [bots]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from bot_fsm import VISION_RANGE, SpatialGrid
+
+WORLD_SIZE = 2000.0  # Edge of the square battleground, in meters
+CHUNK = 4096
+
+
+def brute_force(bots, players):
+    """Check every bot against every player"""
+    nearest = np.empty(len(bots))
+    for start in range(0, len(bots), CHUNK):
+        chunk = bots[start:start + CHUNK]
+        nearest[start:start + CHUNK] = np.sqrt(
+            ((chunk[:, None, :] - players[None, :, :]) ** 2).sum(axis=2)).min(axis=1)
+    nearest[nearest > VISION_RANGE] = np.inf
+    return nearest
+
+
+def grid_query(bots, players):
+    grid = SpatialGrid()
+    for player_id, (x, y, z) in enumerate(players):
+        grid.set_player(player_id, x, y, z)
+    return grid.nearest_distance(bots[:, 0], bots[:, 1], bots[:, 2])
+
+
+def best_of(fn, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = np.random.default_rng(42)
+    bots = rng.uniform(0, WORLD_SIZE, (count, 3))
+    bots[:, 1] = 0.0
+
+    print(f"Nearest-player perception ({count:,} bots, {WORLD_SIZE:.0f}m world)")
+    print(f"  {'players':>8} {'brute force':>12} {'grid':>10} {'speedup':>8}")
+    for player_count in (8, 64, 512):
+        players = rng.uniform(0, WORLD_SIZE, (player_count, 3))
+        players[:, 1] = 0.0
+        brute_time, expected = best_of(lambda: brute_force(bots, players))
+        grid_time, actual = best_of(lambda: grid_query(bots, players))
+        assert np.array_equal(np.isinf(expected), np.isinf(actual))
+        assert np.allclose(expected[np.isfinite(expected)], actual[np.isfinite(actual)])
+        print(f"  {player_count:>8} {brute_time * 1000:>10.1f}ms {grid_time * 1000:>8.1f}ms"
+              f" {brute_time / grid_time:>7.1f}x")
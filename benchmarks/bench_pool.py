@@ -0,0 +1,90 @@
+"""
+Benchmark: memory per bot and create/remove throughput of the bot pool
+
+Run from the repository root:
+    python -m benchmarks.bench_pool [bots]
+"""
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from bot_fsm import BotManager, BotState
+
+
+class LegacyBot:
+    """Per-object layout Bot used before the engine (for memory comparison)"""
+
+    def __init__(self, bot_id, initial_health=100):
+        self.bot_id = bot_id
+        self.state = BotState.IDLE
+        self.health = initial_health
+        self.max_health = initial_health
+        self.player_visible = False
+        self.player_distance = float('inf')
+        self.last_state_change = time.time()
+        self.idle_timer = random.uniform(2, 5)
+        self.patrol_timer = random.uniform(3, 8)
+        self.last_transition_reason = "Bot initialized"
+        self.CHASE_RANGE = 30.0
+        self.ATTACK_RANGE = 10.0
+        self.FLEE_HEALTH_THRESHOLD = 20
+        self.RECOVER_HEALTH_THRESHOLD = 50
+
+
+def measure_memory(build, count):
+    gc.collect()
+    tracemalloc.start()
+    keep = build(count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return current / count
+
+
+def build_legacy(count):
+    return {f"bot_{i}": LegacyBot(f"bot_{i}") for i in range(count)}
+
+
+def build_pooled(count):
+    manager = BotManager()
+    for _ in range(count):
+        manager.create_bot()
+    return manager
+
+
+def build_handles(count):
+    manager = BotManager()
+    for _ in range(count):
+        manager.create_handle()
+    return manager
+
+
+def timed(label, count, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {count / elapsed:>12,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print(f"Memory per bot ({count:,} bots)")
+    print(f"  {'legacy per-object Bot':<28} {measure_memory(build_legacy, count):>8.0f} B")
+    print(f"  {'pooled, string alias':<28} {measure_memory(build_pooled, count):>8.0f} B")
+    print(f"  {'pooled, integer handle':<28} {measure_memory(build_handles, count):>8.0f} B")
+
+    print(f"\nThroughput ({count:,} bots)")
+    manager = BotManager()
+    timed("create_bot (cold)", count, lambda: [manager.create_bot() for _ in range(count)])
+    ids = list(manager.get_all_bots())
+    timed("remove_bot", count, lambda: [manager.remove_bot(bot_id) for bot_id in ids])
+    timed("create_bot (reused slots)", count, lambda: [manager.create_bot() for _ in range(count)])
+
+    handles = BotManager()
+    timed("create_handle (cold)", count, lambda: [handles.create_handle() for _ in range(count)])
+    timed("remove + create churn", count, lambda: [
+        handles.remove_bot(handles.create_handle()) for _ in range(count)])
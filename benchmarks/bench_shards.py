@@ -0,0 +1,65 @@
+"""
+Benchmark: sharded multi-process stepping vs a single BotManager
+
+Run from the repository root:
+    python -m benchmarks.bench_shards [bots] [shards] [ticks]
+"""
+
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from bot_fsm import BotManager
+from bot_shards import ShardedBotManager
+
+
+def bench_single(bot_count, ticks, rng):
+    manager = BotManager()
+    start = time.perf_counter()
+    for _ in range(bot_count):
+        manager.create_handle()
+    created = time.perf_counter() - start
+
+    n = manager.engine.size
+    visible, distance = rng.random(n) < 0.3, rng.uniform(0, 80, n)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        manager.update_all(visible, distance)
+    return created, (time.perf_counter() - start) / ticks
+
+
+def bench_sharded(bot_count, shard_count, ticks, rng):
+    capacity = -(-bot_count // shard_count)
+    with ShardedBotManager(shard_count, capacity) as manager:
+        start = time.perf_counter()
+        manager.create_handles(bot_count)
+        created = time.perf_counter() - start
+
+        n = manager.handle_space
+        visible, distance = rng.random(n) < 0.3, rng.uniform(0, 80, n)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            manager.update_all(visible, distance)
+        stepped = (time.perf_counter() - start) / ticks
+
+        start = time.perf_counter()
+        states = manager.states()
+        read = time.perf_counter() - start
+        assert manager.bot_count() == bot_count
+    return created, stepped, read, len(states)
+
+
+if __name__ == "__main__":
+    bot_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    shard_count = int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count()
+    ticks = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    rng = np.random.default_rng(0)
+
+    print(f"{bot_count:,} bots, {ticks} ticks")
+    created, stepped = bench_single(bot_count, ticks, rng)
+    print(f"  single process       create {created:7.2f} s   update_all {stepped * 1000:8.1f} ms/tick")
+    created, stepped, read, count = bench_sharded(bot_count, shard_count, ticks, rng)
+    print(f"  {shard_count:>2} shards            create {created:7.2f} s   update_all {stepped * 1000:8.1f} ms/tick")
+    print(f"  shared-memory state read of {count:,} slots: {read * 1000:.2f} ms")
@@ -0,0 +1,37 @@
+"""
+Benchmark: warm restart from a binary snapshot vs. recreating every bot
+
+Run from the repository root:
+    python -m benchmarks.bench_snapshot [bots]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from bot_fsm import BotManager
+from bot_snapshot import load_snapshot, save_snapshot
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:<28} {time.perf_counter() - start:>8.3f} s")
+    return result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"Snapshot round trip ({count:,} bots)")
+    manager = BotManager()
+    timed("create_bot (cold start)", lambda: [manager.create_bot() for _ in range(count)])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bots.snap")
+        timed("save_snapshot", lambda: save_snapshot(manager, path))
+        print(f"  {'file size':<28} {os.path.getsize(path) / 2**20:>8.1f} MiB")
+        restored = timed("load_snapshot (warm start)", lambda: load_snapshot(path))
+        timed("rebuild timer heap", restored.engine.rebuild_timers)
+        assert len(restored.bots) == count
@@ -0,0 +1,94 @@
+"""
+Benchmark: per-update 'player_moved' fan-out vs. per-tick 'world_snapshot's
+
+Connects N Socket.IO test clients to server.py, spread over the 100 x 100
+arena, and has every one of them send a player_update each tick, as the
+game does at 20 Hz.  Three ways of delivering movement are compared:
+
+- SNAPSHOT_RATE = 0: each update is broadcast to the other N - 1 clients as
+  it arrives (N² writes per tick)
+- snapshots with an interest radius covering the whole arena: one message
+  per client per tick holding everyone who moved
+- snapshots with the default INTEREST_RADIUS: nearby players every tick and
+  the rest every FAR_TIER_INTERVAL ticks
+
+Counts server emit calls, messages written to clients, JSON payload bytes
+and time per tick, all in-process.
+
+Run from the repository root:
+    python -m benchmarks.bench_snapshots [players,...] [ticks]
+"""
+
+import json
+import random
+import sys
+import time
+
+import server
+
+ARENA_HALF = 50
+WHOLE_ARENA = 150  # Radius that reaches every corner from any point
+
+
+def count_emits():
+    """Wrap the python-socketio emit so calls to it are counted"""
+    calls = [0]
+    emit = server.socketio.server.emit
+
+    def counted(*args, **kwargs):
+        calls[0] += 1
+        return emit(*args, **kwargs)
+
+    server.socketio.server.emit = counted
+    return calls
+
+
+def run(label, snapshot_rate, radius, players, ticks, emits):
+    server.SNAPSHOT_RATE = snapshot_rate
+    server.INTEREST_RADIUS = radius
+    clients = [server.socketio.test_client(server.app) for _ in range(players)]
+    for client in clients:
+        client.get_received()
+
+    # Players wander a little each tick around fixed spots
+    random.seed(7)
+    spots = [(random.uniform(-ARENA_HALF, ARENA_HALF), random.uniform(-ARENA_HALF, ARENA_HALF))
+             for _ in clients]
+    emits[0] = 0
+    written = 0
+    sent_bytes = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for client, (x, z) in zip(clients, spots):
+            client.emit('player_update', {
+                'position': {'x': x + random.uniform(-1, 1), 'y': 0, 'z': z + random.uniform(-1, 1)},
+                'rotation': {'x': 0, 'y': random.uniform(-3.14, 3.14), 'z': 0}
+            })
+        if snapshot_rate:
+            server.broadcast_snapshot()
+        for client in clients:
+            received = client.get_received()
+            written += len(received)
+            sent_bytes += sum(len(json.dumps(message['args'])) for message in received)
+    elapsed = time.perf_counter() - start
+
+    for client in clients:
+        client.disconnect()
+    print(f"  {label:<28} {emits[0] / ticks:>7,.0f} emits/tick {written / ticks:>7,.0f} writes/tick"
+          f" {sent_bytes / ticks / 1024:>8,.1f} KiB/tick {elapsed / ticks * 1000:>8.2f} ms/tick")
+    return sent_bytes
+
+
+if __name__ == "__main__":
+    populations = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [16, 64, 128]
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    radius = server.INTEREST_RADIUS
+    server.MAX_ROOM_PLAYERS = max(populations)  # everyone in one arena
+    emits = count_emits()
+    for players in populations:
+        print(f"{players} players, {ticks} ticks")
+        fan_out = run("player_moved per update", 0, WHOLE_ARENA, players, ticks, emits)
+        run("world_snapshot, whole arena", 20, WHOLE_ARENA, players, ticks, emits)
+        local = run(f"world_snapshot, radius {radius:g}", 20, radius, players, ticks, emits)
+        print(f"  {fan_out / local:.1f}x fewer bytes than per-update fan-out")
@@ -0,0 +1,57 @@
+"""
+Benchmark: per-update latency over the /fsm stream vs. POST /update
+
+Both transports run in-process (Flask and Flask-SocketIO test clients), so
+the numbers are the server-side cost of one update, including routing and
+serialization but not the network.
+
+Run from the repository root:
+    python -m benchmarks.bench_stream [updates]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from fsm_server import STREAM_NAMESPACE, app, bot_manager, socketio
+
+
+def measure(send, updates):
+    latencies = []
+    for update in updates:
+        start = time.perf_counter()
+        send(update)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies
+
+
+def report(label, latencies):
+    median = statistics.median(latencies) * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    print(f"  {label:<24} median {median:>8.0f} us   p99 {p99:>8.0f} us")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    bot_ids = [bot_manager.create_bot() for _ in range(50)]
+    random.seed(7)
+    updates = [{
+        "bot_id": random.choice(bot_ids),
+        "player_visible": random.random() < 0.5,
+        "player_distance": random.uniform(0, 80),
+    } for _ in range(count)]
+
+    http = app.test_client()
+    stream = socketio.test_client(app, namespace=STREAM_NAMESPACE)
+    listener = socketio.test_client(app, namespace=STREAM_NAMESPACE)
+    listener.emit('subscribe', {}, namespace=STREAM_NAMESPACE)
+
+    print(f"Per-update latency ({count:,} updates)")
+    report("POST /update", measure(lambda update: http.post('/update', json=update), updates))
+    report("stream 'update' + ack", measure(
+        lambda update: stream.emit('update', update, namespace=STREAM_NAMESPACE, callback=True),
+        updates))
+    listener.get_received(STREAM_NAMESPACE)
@@ -0,0 +1,58 @@
+"""
+Benchmark: one POST /update_batch vs. a POST /update per bot
+
+Requests go through Flask's test client, so this measures the server-side
+cost of each request (routing, JSON, the FSM step) without network latency,
+which only widens the gap in a real deployment.
+
+Run from the repository root:
+    python -m benchmarks.bench_update_batch [bots] [rounds]
+"""
+
+import random
+import sys
+import time
+
+from fsm_server import app, bot_manager
+
+
+def make_updates(bot_ids):
+    return [{
+        "bot_id": bot_id,
+        "player_visible": random.random() < 0.5,
+        "player_distance": random.uniform(0, 80),
+    } for bot_id in bot_ids]
+
+
+def per_bot(client, updates):
+    for update in updates:
+        client.post('/update', json=update)
+
+
+def batched(client, updates):
+    client.post('/update_batch', json={"updates": updates})
+
+
+def run(label, fn, client, rounds, bot_ids):
+    random.seed(7)
+    frames = [make_updates(bot_ids) for _ in range(rounds)]
+    start = time.perf_counter()
+    for updates in frames:
+        fn(client, updates)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<24} {elapsed / rounds * 1000:>8.2f} ms/frame"
+          f" {rounds * len(bot_ids) / elapsed:>12,.0f} updates/s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    client = app.test_client()
+    bot_ids = [bot_manager.create_bot() for _ in range(count)]
+
+    print(f"Updating {count} bots, {rounds} frames")
+    slow = run("POST /update per bot", per_bot, client, rounds, bot_ids)
+    fast = run("POST /update_batch", batched, client, rounds, bot_ids)
+    print(f"  speedup: {slow / fast:.1f}x")
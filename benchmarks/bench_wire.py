@@ -0,0 +1,52 @@
+"""
+Benchmark: bytes and serialization time per bot, JSON vs. bot_wire binary
+
+Each response is requested through Flask's test client with and without
+"Accept: application/x-bot-fsm", so the times are the server-side cost of
+building the response body (the FSM step included for /update_batch).
+
+Run from the repository root:
+    python -m benchmarks.bench_wire [bots] [rounds]
+"""
+
+import random
+import sys
+import time
+
+import bot_wire
+from fsm_server import app, bot_manager
+
+JSON = {"Accept": "application/json"}
+BINARY = {"Accept": bot_wire.MEDIA_TYPE}
+
+
+def measure(request, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        response = request()
+    return (time.perf_counter() - start) / rounds, len(response.get_data())
+
+
+def compare(label, request, count, rounds):
+    json_time, json_size = measure(lambda: request(JSON), rounds)
+    wire_time, wire_size = measure(lambda: request(BINARY), rounds)
+    print(f"  {label}")
+    for name, elapsed, size in (("JSON", json_time, json_size), ("binary", wire_time, wire_size)):
+        print(f"    {name:<8} {size / count:>8.1f} bytes/bot {elapsed / count * 1e6:>10.2f} us/bot")
+    print(f"    {json_size / wire_size:.1f}x smaller, {json_time / wire_time:.1f}x faster")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    random.seed(7)
+    bot_ids = [bot_manager.create_bot() for _ in range(count)]
+    updates = [{"bot_id": bot_id, "player_visible": random.random() < 0.5,
+                "player_distance": random.uniform(0, 80)} for bot_id in bot_ids]
+    client = app.test_client()
+
+    print(f"{count:,} bots, {rounds} rounds")
+    compare("GET /bots", lambda headers: client.get('/bots', headers=headers), count, rounds)
+    compare("POST /update_batch", lambda headers: client.post(
+        '/update_batch', json=updates, headers=headers), count, rounds)
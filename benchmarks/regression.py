@@ -0,0 +1,81 @@
+"""
+Result files and regression checks shared by the benchmarks that save
+their results (bench_http, bench_fsm_core)
+
+Each benchmark writes a JSON report of per-case results tagged with the
+commit it ran on; a later run passes that file to compare(), which prints
+the change for every case both runs have and returns the cases that got
+slower by more than the threshold.
+"""
+
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(path, benchmark, results, **settings):
+    """Write results with the commit, time and platform they were measured on"""
+    report = {
+        "benchmark": benchmark,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **settings,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {path}")
+
+
+def load_report(path):
+    """Read a report written by write_report()"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, case, metric, unit, threshold, case_thresholds=None):
+    """
+    Print the change against a baseline run; returns the regressions
+
+    Args:
+        results (list): Entries of this run, each with "bots", `case` and `metric`
+        baseline (dict): Report loaded from an earlier run
+        case (str): Entry key naming the case, e.g. "endpoint"
+        metric (str): Entry key of the timing compared, e.g. "p50_ms"
+        unit (str): Unit of the metric, for printing
+        threshold (float): Increase in percent counted as a regression
+        case_thresholds (dict, optional): Per-case thresholds overriding it
+
+    Returns:
+        list: Entries that regressed
+    """
+    case_thresholds = case_thresholds or {}
+    before = {(entry["bots"], entry[case]): entry for entry in baseline["results"]}
+    regressions = []
+    print(f"\nAgainst {baseline.get('commit') or 'baseline'} "
+          f"({metric} regression threshold {threshold:g}%)")
+    for entry in results:
+        old = before.get((entry["bots"], entry[case]))
+        if old is None:
+            continue
+        limit = case_thresholds.get(entry[case], threshold)
+        change = (entry[metric] / old[metric] - 1) * 100 if old[metric] else 0.0
+        flag = ""
+        if change > limit:
+            flag = "  REGRESSION"
+            regressions.append(entry)
+        print(f"  {entry['bots']:>7,} {entry[case]:<26} {old[metric]:>12,.3f} -> "
+              f"{entry[metric]:>12,.3f} {unit} ({change:+6.1f}%){flag}")
+    return regressions
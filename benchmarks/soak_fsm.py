@@ -0,0 +1,65 @@
+"""
+Soak test: run the FSM in fast-forward tick mode
+
+Steps a population of bots through simulated time with random perception
+and damage, then reports throughput and how many transitions of each kind
+happened.  Timers expire in simulated seconds, so hours of game time run in
+seconds of wall time.
+
+Run from the repository root:
+    python -m benchmarks.soak_fsm [bots] [ticks]
+"""
+
+import random
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from bot_fsm import STATES, BotManager, TickClock
+
+
+def soak(bot_count=1000, ticks=1000, tick_seconds=0.05, seed=0):
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    clock = TickClock(tick_seconds)
+    manager = BotManager(clock=clock)
+    for _ in range(bot_count):
+        manager.create_bot()
+
+    engine = manager.engine
+    transitions = Counter()
+    start = time.perf_counter()
+
+    for _ in range(ticks):
+        clock.advance()
+        visible = rng.random(engine.size) < 0.3
+        distance = rng.uniform(0, 80, engine.size)
+        previous = engine.state[:engine.size].copy()
+        changed = manager.update_all(visible, distance)
+        transitions.update(zip(previous[changed].tolist(),
+                               engine.state[changed].tolist()))
+
+        # Occasional combat damage and healing
+        hit = rng.integers(0, engine.size, max(1, bot_count // 100))
+        engine.health[hit] = np.maximum(0, engine.health[hit] - 15)
+        engine.health[:engine.size] = np.minimum(
+            engine.max_health[:engine.size], engine.health[:engine.size] + 0.1)
+
+    elapsed = time.perf_counter() - start
+    return clock, elapsed, transitions
+
+
+if __name__ == "__main__":
+    bot_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    clock, elapsed, transitions = soak(bot_count, ticks)
+    updates = bot_count * ticks
+    print(f"{updates:,} bot updates over {clock.now():,.0f} simulated seconds")
+    print(f"wall time {elapsed:.2f} s  ({updates / elapsed:,.0f} updates/s, "
+          f"{clock.now() / elapsed:,.0f}x real time)")
+
+    for (old, new), count in transitions.most_common():
+        print(f"  {STATES[old].name:>6} -> {STATES[new].name:<6} {count:>10,}")
@@ -0,0 +1,120 @@
+"""
+Stress test: hammer every fsm_server endpoint from many threads at once
+
+Each worker thread drives the Flask app through its own test client with a
+random mix of requests, so BotManager sees concurrent creates, removes,
+updates, bulk passes and reads.  At the end the run fails if any request
+returned a 5xx, if two creates handed out the same bot ID, or if the bot
+directory disagrees with itself.
+
+Run from the repository root:
+    python -m benchmarks.stress_threads [threads] [requests per thread]
+"""
+
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from bot_fsm import bot_manager
+from fsm_server import app
+
+
+def worker(seed, requests, created, statuses, errors):
+    rng = random.Random(seed)
+    client = app.test_client()
+    mine = []
+
+    def some_bot():
+        if mine and rng.random() < 0.8:
+            return rng.choice(mine)
+        return f"bot_{rng.randint(1, max(1, bot_manager.next_bot_id))}"
+
+    calls = [
+        (4, lambda: client.post('/create', json={"initial_health": 100})),
+        (20, lambda: client.post('/update', json={
+            "bot_id": some_bot(), "player_visible": rng.random() < 0.5,
+            "player_distance": rng.uniform(0, 80)})),
+        (5, lambda: client.post('/update_batch', json=[{
+            "bot_id": some_bot(), "player_visible": rng.random() < 0.5,
+            "player_distance": rng.uniform(0, 80)} for _ in range(20)])),
+        (3, lambda: client.post('/positions', json={
+            "players": {f"player_{seed}": {"x": rng.uniform(-100, 100), "y": 0,
+                                           "z": rng.uniform(-100, 100)}},
+            "bots": {some_bot(): {"x": rng.uniform(-100, 100), "y": 0,
+                                  "z": rng.uniform(-100, 100)}}})),
+        (5, lambda: client.post('/damage', json={"bot_id": some_bot(), "damage": 10})),
+        (5, lambda: client.post('/heal', json={"bot_id": some_bot(), "amount": 10})),
+        (2, lambda: client.post('/reset', json={"bot_id": some_bot()})),
+        (1, lambda: client.post('/reset', json={"all": True})),
+        (20, lambda: client.get('/state', query_string={"bot_id": some_bot()})),
+        (5, lambda: client.get('/bots')),
+        (5, lambda: client.get('/bots', query_string={
+            "state": rng.choice(["idle", "chase", "attack,flee"]), "fields": "bot_id,state",
+            "limit": 50, "cursor": rng.randint(0, bot_manager.next_bot_id)})),
+        (5, lambda: client.get('/changes', query_string={"since": rng.randint(0, bot_manager.version)})),
+        (5, lambda: client.get('/history', query_string={"bot_id": some_bot()})),
+        (2, lambda: client.get('/stats')),
+        (2, lambda: client.post('/remove', json={"bot_id": mine.pop(rng.randrange(len(mine)))
+                                                 if mine else some_bot()})),
+    ]
+    weights = [weight for weight, _ in calls]
+
+    for _ in range(requests):
+        call = rng.choices(calls, weights)[0][1]
+        try:
+            response = call()
+        except Exception as exc:  # noqa: BLE001 - report every failure
+            errors.append(repr(exc))
+            continue
+        statuses[response.status_code] += 1
+        if response.status_code >= 500:
+            errors.append(f"{response.request.path}: {response.get_data(as_text=True)}")
+        elif response.request.path == '/create':
+            bot_id = response.get_json()["bot_id"]
+            created.append(bot_id)
+            mine.append(bot_id)
+
+
+def stress(thread_count=16, requests=2000):
+    created, errors = [], []
+    statuses = Counter()
+    threads = [threading.Thread(target=worker, args=(seed, requests, created, statuses, errors))
+               for seed in range(thread_count)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    duplicates = [bot_id for bot_id, count in Counter(created).items() if count > 1]
+    if duplicates:
+        errors.append(f"duplicate bot IDs handed out: {duplicates[:10]}")
+    bots = bot_manager.get_all_bots()
+    if len(list(bots)) != len(bots) or len(bots.values()) != len(bots):
+        errors.append("bot directory length disagrees with its contents")
+    for bot_id, bot in bots.items():
+        if bot.bot_id != bot_id or bot_manager.get_bot(bot_id) is not bot:
+            errors.append(f"bot {bot_id} does not resolve to itself")
+    return statuses, errors, elapsed
+
+
+if __name__ == "__main__":
+    thread_count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    statuses, errors, elapsed = stress(thread_count, requests)
+    total = sum(statuses.values())
+    print(f"{total:,} requests from {thread_count} threads in {elapsed:.2f} s "
+          f"({total / elapsed:,.0f} requests/s)")
+    print("  status codes: " + ", ".join(f"{code}: {count:,}" for code, count in sorted(statuses.items())))
+    print(f"  live bots: {len(bot_manager.get_all_bots()):,}")
+    for error in errors[:20]:
+        print(f"  ERROR {error}")
+    if errors:
+        print(f"FAILED with {len(errors)} errors")
+        sys.exit(1)
+    print("OK")
@@ -1,12 +1,34 @@
 """
 Finite State Machine (FSM) for 3D Battleground Game Bot AI
 Manages bot states: idle, patrol, chase, attack, flee, dead
+
+Bot data lives in a struct-of-arrays BotEngine (one NumPy array per field)
+so a whole population can be stepped in a single vectorized pass.  Bot
+objects are thin views over one slot of that storage; per-bot calls go
+through memoryviews of the same columns, which read and write plain Python
+values instead of boxing a NumPy scalar on every field access.
+
+BotManager and Bot are safe to share between threads: writes to a bot hold
+one of a fixed set of striped locks, bulk passes hold all of them, and
+reads never lock (they retry if a write to the same stripe overlapped).
 """
 
+import bisect
+import heapq
+import logging
+import math
+import os
 import random
+import threading
 import time
+from collections.abc import Mapping
+from contextlib import contextmanager
 from enum import Enum
 
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
 
 class BotState(Enum):
     """Bot state enumeration"""
@@ -18,230 +40,2101 @@ class BotState(Enum):
     DEAD = "dead"
 
 
+# Integer state codes used by the engine arrays (index into STATES)
+STATES = tuple(BotState)
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+STATE_VALUES = tuple(state.value for state in STATES)
+IDLE, PATROL, CHASE, ATTACK, FLEE, DEAD = range(len(STATES))
+
+# FSM configuration
+CHASE_RANGE = 30.0
+ATTACK_RANGE = 10.0
+FLEE_HEALTH_THRESHOLD = 20
+RECOVER_HEALTH_THRESHOLD = 50
+# Bots see players within this distance; beyond it every range guard is
+# already decided, so farther players never need to be found
+VISION_RANGE = CHASE_RANGE * 2
+
+# Interned transition reasons (engine arrays store the integer code)
+REASONS = []
+REASON_CODES = {}
+_REASONS_LOCK = threading.Lock()
+
+
+def intern_reason(reason):
+    """
+    Get the integer code for a transition reason, registering it if new
+
+    Args:
+        reason (str): Human readable transition reason
+
+    Returns:
+        int: Reason code
+    """
+    code = REASON_CODES.get(reason)
+    if code is None:
+        with _REASONS_LOCK:
+            code = REASON_CODES.get(reason)
+            if code is None:
+                code = len(REASONS)
+                REASONS.append(reason)
+                REASON_CODES[reason] = code
+    return code
+
+
+REASON_INITIALIZED = intern_reason("Bot initialized")
+REASON_RESET = intern_reason("Bot reset")
+
+
+# ==========================================
+# CLOCKS
+# ==========================================
+
+class WallClock:
+    """Real time clock (seconds since the epoch)"""
+
+    # Called directly, without a Python frame in between
+    now = staticmethod(time.time)
+
+
+class TickClock:
+    """
+    Discrete simulation clock for running faster than real time
+
+    Time only moves when advance() is called, so timers expire in simulated
+    seconds and any number of updates can run back to back.
+    """
+
+    def __init__(self, tick_seconds=0.05, start=0.0):
+        self.tick_seconds = tick_seconds
+        self.ticks = 0
+        self.start = start
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def advance(self, ticks=1):
+        """
+        Move simulated time forward
+
+        Args:
+            ticks (int): Number of ticks to advance
+
+        Returns:
+            float: The new simulated time
+        """
+        self.ticks += ticks
+        self.current = self.start + self.ticks * self.tick_seconds
+        return self.current
+
+
+WALL_CLOCK = WallClock()
+
+
+def _number(value):
+    """Convert a stored float back to the int/float the API handed us"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+# ==========================================
+# PERCEPTION
+# ==========================================
+
+def finite_position(x, y, z):
+    """
+    Check that x, y and z are finite numbers
+
+    Returns:
+        tuple: (x, y, z) as floats
+
+    Raises:
+        ValueError: If a coordinate is not a number, or is NaN or infinite
+    """
+    for value in (x, y, z):
+        if (isinstance(value, bool) or not isinstance(value, (int, float))
+                or not math.isfinite(value)):
+            raise ValueError(f"Position coordinates must be finite numbers, got {value!r}")
+    return float(x), float(y), float(z)
+
+
+class SpatialGrid:
+    """
+    Uniform grid of player positions for bulk nearest-player queries
+
+    Players are bucketed into square cells on the ground (x/z) plane.  A
+    query sorts the bots by cell once and, for each occupied player cell,
+    measures only the bots in the 3x3 block of cells around it, so the cost
+    grows with the bots near players instead of bots x players.
+    """
+
+    # Cell coordinates are packed into one int64 sort key
+    _OFFSET = 1 << 20
+    _STRIDE = 1 << 21
+
+    def __init__(self, cell_size=VISION_RANGE):
+        """
+        Args:
+            cell_size (float): Cell edge length; also the query radius
+        """
+        self.cell_size = float(cell_size)
+        self.players = {}  # player_id -> (x, y, z)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.players)
+
+    def set_player(self, player_id, x, y, z):
+        """Add or move a player; raises ValueError unless x, y and z are finite numbers"""
+        position = finite_position(x, y, z)
+        with self._lock:
+            self.players[player_id] = position
+
+    def remove_player(self, player_id):
+        """Remove a player (no-op if unknown)"""
+        with self._lock:
+            self.players.pop(player_id, None)
+
+    def _keys(self, cx, cz):
+        return (cx + self._OFFSET) * self._STRIDE + (cz + self._OFFSET)
+
+    def nearest_distance(self, x, y, z):
+        """
+        Distance from each point to the nearest player
+
+        Args:
+            x, y, z (numpy.ndarray): Point coordinates
+
+        Returns:
+            numpy.ndarray: Distances, inf where no player is within cell_size
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        z = np.asarray(z, dtype=np.float64)
+        best = np.full(x.shape, np.inf)
+        with self._lock:
+            positions = list(self.players.values())
+        if not positions or not x.size:
+            return best
+
+        cell = self.cell_size
+        keys = self._keys(np.floor(x / cell).astype(np.int64),
+                          np.floor(z / cell).astype(np.int64))
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        sx, sy, sz = x[order], y[order], z[order]
+        nearest = best.copy()
+
+        players = np.array(positions, dtype=np.float64)
+        player_cx = np.floor(players[:, 0] / cell).astype(np.int64)
+        player_cz = np.floor(players[:, 2] / cell).astype(np.int64)
+        cells, members = np.unique(self._keys(player_cx, player_cz), return_inverse=True)
+        for index, key in enumerate(cells):
+            px, py, pz = players[members == index].T
+            cx, cz = divmod(int(key), self._STRIDE)
+            cx -= self._OFFSET
+            cz -= self._OFFSET
+            for column in (cx - 1, cx, cx + 1):
+                # Cells (column, cz-1..cz+1) are adjacent in key order
+                lo = np.searchsorted(keys, self._keys(column, cz - 1))
+                hi = np.searchsorted(keys, self._keys(column, cz + 1), side="right")
+                if lo == hi:
+                    continue
+                distance = np.sqrt((sx[lo:hi, None] - px) ** 2
+                                   + (sy[lo:hi, None] - py) ** 2
+                                   + (sz[lo:hi, None] - pz) ** 2).min(axis=1)
+                np.minimum(nearest[lo:hi], distance, out=nearest[lo:hi])
+
+        # Players beyond one cell may be hiding nearer ones outside the block
+        nearest[nearest > cell] = np.inf
+        best[order] = nearest
+        return best
+
+
+# ==========================================
+# TRANSITION TABLE
+# ==========================================
+
+GUARD_ARGS = "visible, distance, health, elapsed, timer"
+
+
+class Guard:
+    """
+    Named transition condition
+
+    Both forms take (visible, distance, health, elapsed, timer), where timer
+    is the current state's own timer.  The scalar form works on plain values
+    for Bot.update, the vector form on NumPy arrays for BotEngine.update_all.
+    A scalar form given as an expression over those names (and this
+    module's constants) is inlined into the compiled per-state dispatch
+    instead of being called.
+    """
+
+    def __init__(self, name, scalar, vector):
+        """
+        Args:
+            name (str): Guard name
+            scalar (str or callable): Python expression, or function
+            vector (callable): NumPy form
+        """
+        self.name = name
+        if isinstance(scalar, str):
+            self.expression = scalar
+            self.scalar = eval(f"lambda {GUARD_ARGS}: {scalar}", globals())
+        else:
+            self.expression = None
+            self.scalar = scalar
+        self.vector = vector
+
+    def __repr__(self):
+        return f"Guard({self.name})"
+
+
+HEALTH_DEPLETED = Guard(
+    "health_depleted",
+    "health <= 0",
+    lambda visible, distance, health, elapsed, timer: health <= 0)
+PLAYER_NEAR = Guard(
+    "player_near",
+    "visible and distance < CHASE_RANGE",
+    lambda visible, distance, health, elapsed, timer: visible & (distance < CHASE_RANGE))
+PLAYER_IN_ATTACK_RANGE = Guard(
+    "player_in_attack_range",
+    "visible and distance < ATTACK_RANGE",
+    lambda visible, distance, health, elapsed, timer: visible & (distance < ATTACK_RANGE))
+PLAYER_LEFT_ATTACK_RANGE = Guard(
+    "player_left_attack_range",
+    "visible and distance > ATTACK_RANGE",
+    lambda visible, distance, health, elapsed, timer: visible & (distance > ATTACK_RANGE))
+PLAYER_HIDDEN = Guard(
+    "player_hidden",
+    "not visible",
+    lambda visible, distance, health, elapsed, timer: ~visible)
+PLAYER_OUT_OF_RANGE = Guard(
+    "player_out_of_range",
+    "distance > CHASE_RANGE * 1.5",
+    lambda visible, distance, health, elapsed, timer: distance > CHASE_RANGE * 1.5)
+SAFE_DISTANCE = Guard(
+    "safe_distance",
+    "distance > CHASE_RANGE * 2",
+    lambda visible, distance, health, elapsed, timer: distance > CHASE_RANGE * 2)
+HEALTH_CRITICAL = Guard(
+    "health_critical",
+    "health < FLEE_HEALTH_THRESHOLD",
+    lambda visible, distance, health, elapsed, timer: health < FLEE_HEALTH_THRESHOLD)
+HEALTH_RECOVERED = Guard(
+    "health_recovered",
+    "health > RECOVER_HEALTH_THRESHOLD and visible",
+    lambda visible, distance, health, elapsed, timer: (health > RECOVER_HEALTH_THRESHOLD) & visible)
+TIMER_EXPIRED = Guard(
+    "timer_expired",
+    "elapsed > timer",
+    lambda visible, distance, health, elapsed, timer: elapsed > timer)
+
+
+# Rules checked before the state's own rules, in every state
+GLOBAL_TRANSITIONS = [
+    (HEALTH_DEPLETED, BotState.DEAD, "Health depleted"),
+]
+
+# Ordered (guard, target state, reason) rules per state; first match wins
+TRANSITION_TABLE = {
+    BotState.IDLE: [
+        (PLAYER_NEAR, BotState.CHASE, "Player detected nearby"),
+        (TIMER_EXPIRED, BotState.PATROL, "Idle timer expired"),
+    ],
+    BotState.PATROL: [
+        (PLAYER_NEAR, BotState.CHASE, "Player spotted during patrol"),
+        (HEALTH_CRITICAL, BotState.FLEE, "Health critical, retreating"),
+        (TIMER_EXPIRED, BotState.IDLE, "Patrol complete"),
+    ],
+    BotState.CHASE: [
+        (HEALTH_CRITICAL, BotState.FLEE, "Health critical during chase"),
+        (PLAYER_IN_ATTACK_RANGE, BotState.ATTACK, "Player in attack range"),
+        (PLAYER_HIDDEN, BotState.PATROL, "Lost sight of player"),
+        (PLAYER_OUT_OF_RANGE, BotState.PATROL, "Player out of range"),
+    ],
+    BotState.ATTACK: [
+        (HEALTH_CRITICAL, BotState.FLEE, "Health critical, retreating from combat"),
+        (PLAYER_LEFT_ATTACK_RANGE, BotState.CHASE, "Player moved out of attack range"),
+        (PLAYER_HIDDEN, BotState.CHASE, "Lost visual on player"),
+    ],
+    BotState.FLEE: [
+        (HEALTH_RECOVERED, BotState.CHASE, "Health recovered, re-engaging"),
+        (PLAYER_HIDDEN, BotState.PATROL, "Escaped, returning to patrol"),
+        (SAFE_DISTANCE, BotState.IDLE, "Safe distance reached"),
+    ],
+    # Dead state is terminal
+    BotState.DEAD: [],
+}
+
+# Engine column holding the timer TIMER_EXPIRED compares against, per state
+STATE_TIMERS = {
+    BotState.IDLE: "idle_timer",
+    BotState.PATROL: "patrol_timer",
+}
+
+
+class CompiledTransitions:
+    """
+    Transition table compiled into integer-coded dispatch arrays
+
+    Rules are flattened in evaluation order; rule_state/rule_target/
+    rule_reason hold their integer codes and rule_start/rule_end give each
+    state's slice.  For the per-bot path each state's rules are also
+    generated into one function, dispatch[state code](visible, distance,
+    health, elapsed, timer), which returns (target code, reason code) for
+    the first matching rule or None, so the guards run inline like the
+    branches of a hand-written if/elif chain.
+    """
+
+    def __init__(self, table, global_rules=(), timers=None):
+        timers = timers or {}
+        guards, states, targets, reasons = [], [], [], []
+        starts, ends, dispatch, timer_columns = [], [], [], []
+
+        for code, state in enumerate(STATES):
+            starts.append(len(guards))
+            for guard, target, reason in list(global_rules) + list(table.get(state, ())):
+                guards.append(guard)
+                states.append(code)
+                targets.append(STATE_CODES[target])
+                reasons.append(intern_reason(reason))
+            ends.append(len(guards))
+            dispatch.append(self._compile(state, [
+                (guards[i], targets[i], reasons[i]) for i in range(starts[-1], ends[-1])]))
+            timer_columns.append(timers.get(state))
+
+        self.guards = tuple(guards)
+        self.rule_state = np.array(states, dtype=np.int8)
+        self.rule_target = np.array(targets, dtype=np.int8)
+        self.rule_reason = np.array(reasons, dtype=np.int32)
+        self.rule_start = np.array(starts, dtype=np.int32)
+        self.rule_end = np.array(ends, dtype=np.int32)
+        self.dispatch = tuple(dispatch)
+        self.timer_columns = tuple(timer_columns)
+
+    @staticmethod
+    def _compile(state, rules):
+        """Generate one state's dispatch function from its (guard, target, reason) rules"""
+        lines = []
+        callables = {}
+        for index, (guard, target, reason) in enumerate(rules):
+            if guard.expression is not None:
+                test = guard.expression
+            else:
+                callables[f"guard_{index}"] = guard.scalar
+                test = f"guard_{index}({GUARD_ARGS})"
+            lines.append(f"    if {test}:  # {guard.name}\n        return {target}, {reason}\n")
+        # Guards that are not expressions are bound as default arguments
+        defaults = "".join(f", {name}={name}" for name in callables)
+        source = (f"def dispatch_{state.value}({GUARD_ARGS}{defaults}):\n"
+                  + "".join(lines) + "    return None\n")
+        namespace = dict(callables)
+        # The module's globals, so guards see the current FSM constants
+        exec(compile(source, f"<transitions {state.value}>", "exec"), globals(), namespace)
+        return namespace[f"dispatch_{state.value}"]
+
+
+TRANSITIONS = CompiledTransitions(TRANSITION_TABLE, GLOBAL_TRANSITIONS, STATE_TIMERS)
+
+
+class _Stripe:
+    """
+    Lock plus seqlock counter for the slots hashed to one stripe
+
+    Writers enter it as a context manager, which makes the sequence number
+    odd for the duration of the write; readers see an odd or changed
+    sequence number and retry instead of taking the lock.  The sequence
+    numbers live in the engine's py_sequences, which for a buffer-backed
+    engine is part of the buffer, so readers attached to it from another
+    process retry too.  The lock itself stays per-process: only the process
+    that owns the engine may write to it.
+    """
+
+    __slots__ = ("lock", "counters", "index")
+
+    def __init__(self, lock, counters, index):
+        self.lock = lock
+        self.counters = counters  # the engine's py_sequences
+        self.index = index
+
+    @property
+    def sequence(self):
+        return self.counters[self.index]
+
+    def __enter__(self):
+        self.lock.acquire()
+        self.counters[self.index] += 1
+
+    def __exit__(self, *exc_info):
+        self.counters[self.index] += 1
+        self.lock.release()
+
+
+class BotEngine:
+    """
+    Struct-of-arrays storage and batched FSM stepping for many bots
+
+    Every field lives in its own NumPy array indexed by slot.  update_all()
+    evaluates the transition rules for every allocated slot at once and
+    produces exactly the same transitions as calling Bot.update() on each
+    bot with the same inputs at the same instant.
+    """
+
+    # (field, dtype, fill value for unused slots)
+    COLUMNS = (
+        ("active", np.bool_, False),
+        ("state", np.int8, IDLE),
+        ("health", np.float64, 0.0),
+        ("max_health", np.float64, 0.0),
+        ("player_visible", np.bool_, False),
+        ("player_distance", np.float64, np.inf),
+        ("last_state_change", np.float64, 0.0),
+        ("idle_timer", np.float64, 0.0),
+        ("patrol_timer", np.float64, 0.0),
+        ("reason", np.int32, REASON_INITIALIZED),
+        ("version", np.uint64, 0),
+        # Global version when the bot's perception inputs last changed
+        ("perception_version", np.uint64, 0),
+        # Identity: creation sequence number, and whether the bot is "bot_<serial>"
+        ("serial", np.int64, 0),
+        ("named", np.bool_, False),
+        # World position, used by the perception stage
+        ("position_x", np.float64, 0.0),
+        ("position_y", np.float64, 0.0),
+        ("position_z", np.float64, 0.0),
+    )
+
+    # Number of striped locks guarding per-slot writes
+    LOCK_STRIPES = 64
+
+    def __init__(self, capacity=64, clock=None, buffer=None, initialize=True):
+        """
+        Args:
+            capacity (int): Initial number of slots
+            clock: Clock used when no timestamp is given (default wall clock)
+            buffer (optional): Writable buffer (e.g. shared memory) of at
+                least buffer_size(capacity) bytes to lay the columns and the
+                stripe sequence numbers out in.  Buffer-backed engines have
+                a fixed capacity.
+            initialize (bool): Fill buffer-backed columns with defaults;
+                pass False to attach to columns another engine owns
+        """
+        self.clock = clock or WALL_CLOCK
+        self.size = 0
+        # Bumped on every transition, damage, heal, reset or creation; each
+        # slot's version column records the value at its last change.
+        # Perception changes bump it too but are stamped in
+        # perception_version, so changed_since() does not report them.
+        # Per-slot writes only queue the slot in touched/resensed and
+        # stamp() hands out the version when one is next read
+        self.current_version = 0
+        self.touched = set()
+        self.resensed = set()
+        # IDLE/PATROL deadlines as (deadline, slot, last_state_change) heap
+        # entries, invalidated lazily once the bot has left that state
+        self.timers = []
+        # Slots that started an IDLE/PATROL timer since the last tick();
+        # tick() pushes their heap entries, so the per-slot paths never
+        # touch the heap
+        self.scheduled = set()
+        # Transition counts [old state][new state], one table per stripe so
+        # per-slot transitions count under the stripe they already hold;
+        # bulk passes hold every stripe and count in the first
+        self.stripe_transitions = [[[0] * len(STATES) for _ in STATES]
+                                   for _ in range(self.LOCK_STRIPES)]
+        # Set when the columns were loaded in bulk; tick() then rebuilds the
+        # heap from the columns instead of trusting it
+        self.timers_stale = False
+        # Slots tick() must evaluate: new perception, health changes and
+        # bots that transitioned on the previous tick
+        self.pending = set()
+        # Released slots, reused LIFO by allocate()
+        self.free = []
+        # Active slots per state code, so state queries cost O(matches).
+        # Kept up to date by every state write (_set_state, update_all)
+        self.state_slots = [set() for _ in STATES]
+        # Transition history and statistics, off until enable_history()
+        self.history_size = 0
+        # Writers to one slot hold its stripe; allocation holds lock; bulk
+        # passes, growth and tick() hold every stripe (exclusive()).
+        # Counters and statistics shared by all slots take _bookkeeping
+        # briefly; only tick() and rebuild_timers() touch the timer heap.
+        self.lock = threading.RLock()
+        self.locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._bookkeeping = threading.Lock()
+        self.capacity = max(1, capacity)
+        self.fixed_capacity = buffer is not None
+        if buffer is None:
+            for name, dtype, fill in self.COLUMNS:
+                setattr(self, name, np.full(self.capacity, fill, dtype=dtype))
+            # Stripe sequence numbers; a list is the cheapest to bump
+            self.py_sequences = [0] * self.LOCK_STRIPES
+        else:
+            for name, dtype, fill, offset in self.buffer_layout(self.capacity):
+                column = np.ndarray(self.capacity, dtype=dtype, buffer=buffer, offset=offset)
+                if initialize:
+                    column.fill(fill)
+                setattr(self, name, column)
+            sequences = np.ndarray(self.LOCK_STRIPES, dtype=np.uint64, buffer=buffer,
+                                   offset=self._sequences_offset(self.capacity))
+            if initialize:
+                sequences.fill(0)
+            # In the buffer, where readers in other processes see them
+            self.py_sequences = memoryview(sequences)
+        self.stripes = [_Stripe(lock, self.py_sequences, index)
+                        for index, lock in enumerate(self.locks)]
+        self._bind_scalars()
+
+    def _bind_scalars(self):
+        """
+        Point the py_<column> memoryviews at the current columns
+
+        Indexing a memoryview yields a Python bool/int/float, so the
+        per-slot paths (step, transition, Bot properties) never create
+        NumPy scalars.  Must be called whenever a column is replaced.
+        """
+        for name, dtype, fill in self.COLUMNS:
+            setattr(self, "py_" + name, memoryview(getattr(self, name)))
+        # TIMER_EXPIRED's timer per state code, as memoryviews
+        self.py_timers = tuple(getattr(self, "py_" + name) if name else None
+                               for name in TRANSITIONS.timer_columns)
+
+    @classmethod
+    def buffer_layout(cls, capacity):
+        """(name, dtype, fill, byte offset) of each column in a shared buffer"""
+        layout = []
+        offset = 0
+        for name, dtype, fill in cls.COLUMNS:
+            layout.append((name, dtype, fill, offset))
+            offset += -(-capacity * np.dtype(dtype).itemsize // 8) * 8  # 8-byte aligned
+        return layout
+
+    @classmethod
+    def _sequences_offset(cls, capacity):
+        name, dtype, fill, offset = cls.buffer_layout(capacity)[-1]
+        return -(-(offset + capacity * np.dtype(dtype).itemsize) // 8) * 8
+
+    @classmethod
+    def buffer_size(cls, capacity):
+        """Bytes needed to hold every column and stripe sequence number for capacity slots"""
+        return cls._sequences_offset(capacity) + cls.LOCK_STRIPES * np.dtype(np.uint64).itemsize
+
+    # ==========================================
+    # CONCURRENCY
+    # ==========================================
+
+    def stripe(self, slot):
+        """Context manager held while writing one slot"""
+        return self.stripes[slot % self.LOCK_STRIPES]
+
+    @contextmanager
+    def exclusive(self):
+        """Hold every stripe, for bulk passes and structural changes"""
+        with self.lock:
+            for stripe in self.stripes:
+                stripe.__enter__()
+            try:
+                yield
+            finally:
+                for stripe in reversed(self.stripes):
+                    stripe.__exit__()
+
+    def write(self, slot, writer, *args):
+        """
+        Call writer(*args) holding the slot's stripe
+
+        Does the same as `with stripe(slot)`, but takes the lock and bumps
+        the sequence number inline, which costs about half as much; the
+        per-bot Bot methods write through here.
+
+        Returns:
+            The result of writer()
+        """
+        index = slot % self.LOCK_STRIPES
+        lock = self.locks[index]
+        sequences = self.py_sequences
+        lock.acquire()
+        sequences[index] += 1
+        try:
+            return writer(*args)
+        finally:
+            sequences[index] += 1
+            lock.release()
+
+    def read(self, slot, reader, *args):
+        """
+        Call reader(*args) without locking, retrying until no write to the
+        slot's stripe overlapped it
+
+        Args:
+            slot (int): Slot being read
+            reader (callable): Reads the slot; may run more than once
+
+        Returns:
+            The result of the first reader() call that saw consistent data
+        """
+        index = slot % self.LOCK_STRIPES
+        sequences = self.py_sequences
+        while True:
+            sequence = sequences[index]
+            if not sequence & 1:
+                result = reader(*args)
+                if sequences[index] == sequence:
+                    return result
+            time.sleep(0)  # let the writer finish
+
+    def read_all(self, reader, attempts=3):
+        """
+        Call reader() without locking, retrying until no write to any slot
+        overlapped it
+
+        After `attempts` overlapped tries, reader() runs holding every
+        stripe instead, so a bulk read cannot be starved by busy writers.
+        Must not be called while holding a stripe.
+
+        Args:
+            reader (callable): Reads any number of slots; may run more than once
+            attempts (int): Lock-free tries before falling back to exclusive()
+
+        Returns:
+            The result of the reader() call that saw consistent data
+        """
+        sequences = self.py_sequences
+        for _ in range(attempts):
+            before = list(sequences)
+            if not any(sequence & 1 for sequence in before):
+                result = reader()
+                if list(sequences) == before:
+                    return result
+            time.sleep(0)  # let the writers finish
+        with self.exclusive():
+            return reader()
+
+    def _grow(self):
+        """Double the capacity of every column"""
+        if self.fixed_capacity:
+            raise RuntimeError(f"Engine is full ({self.capacity} bots)")
+        new_capacity = self.capacity * 2
+        for name, dtype, fill in self.COLUMNS:
+            column = np.full(new_capacity, fill, dtype=dtype)
+            column[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, column)
+        self._bind_scalars()
+        if self.history_size:
+            for name, dtype in self.HISTORY_COLUMNS:
+                column = np.zeros((new_capacity,) + getattr(self, name).shape[1:], dtype=dtype)
+                column[:self.size] = getattr(self, name)[:self.size]
+                setattr(self, name, column)
+        self.capacity = new_capacity
+
+    # ==========================================
+    # TRANSITION HISTORY
+    # ==========================================
+
+    # Per-slot ring buffers (capacity x history_size) and write counters
+    HISTORY_COLUMNS = (
+        ("history_from", np.int8),
+        ("history_to", np.int8),
+        ("history_reason", np.int32),
+        ("history_time", np.float64),
+        ("history_count", np.uint64),
+    )
+
+    # Upper bucket edges (seconds) of the time-in-state histograms
+    TIME_IN_STATE_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+    def enable_history(self, size=16):
+        """
+        Start recording transitions
+
+        Keeps the last `size` transitions of every bot in fixed-size ring
+        buffers, plus engine-wide time-in-state histograms.  Recording never allocates per transition; with history
+        off the hot paths only pay for one attribute check.
+
+        Args:
+            size (int): Transitions kept per bot
+        """
+        if size < 1:
+            raise ValueError("History size must be at least 1")
+        for name, dtype in self.HISTORY_COLUMNS:
+            shape = (self.capacity,) if name == "history_count" else (self.capacity, size)
+            setattr(self, name, np.zeros(shape, dtype=dtype))
+        state_count = len(STATES)
+        self.time_in_state_edges = np.array(self.TIME_IN_STATE_BUCKETS)
+        self.time_in_state_counts = np.zeros(
+            (state_count, len(self.TIME_IN_STATE_BUCKETS) + 1), dtype=np.int64)
+        self.time_in_state_total = np.zeros(state_count, dtype=np.float64)
+        self.history_size = size
+
+    def _record_one(self, slot, old_state, new_state, reason, duration, now):
+        """Record one transition"""
+        index = int(self.history_count[slot]) % self.history_size
+        self.history_from[slot, index] = old_state
+        self.history_to[slot, index] = new_state
+        self.history_reason[slot, index] = reason
+        self.history_time[slot, index] = now
+        self.history_count[slot] += 1
+
+        bucket = bisect.bisect_left(self.TIME_IN_STATE_BUCKETS, duration)
+        with self._bookkeeping:
+            self.time_in_state_counts[old_state, bucket] += 1
+            self.time_in_state_total[old_state] += duration
+
+    def _record(self, slots, old_states, new_states, reasons, durations, now):
+        """Record transitions for arrays of unique slots"""
+        index = (self.history_count[slots] % self.history_size).astype(np.intp)
+        self.history_from[slots, index] = old_states
+        self.history_to[slots, index] = new_states
+        self.history_reason[slots, index] = reasons
+        self.history_time[slots, index] = now
+        self.history_count[slots] += 1
+
+        buckets = np.searchsorted(self.time_in_state_edges, durations)
+        with self._bookkeeping:
+            np.add.at(self.time_in_state_counts, (old_states, buckets), 1)
+            np.add.at(self.time_in_state_total, old_states, durations)
+
+    def transition_counts(self):
+        """
+        Transitions since the engine was created, counted whether or not
+        history is enabled
+
+        Returns:
+            list: counts[old state code][new state code]
+        """
+        states = range(len(STATES))
+        totals = [[0] * len(STATES) for _ in states]
+        for table in self.stripe_transitions:
+            for old in states:
+                row, total = table[old], totals[old]
+                for new in states:
+                    total[new] += row[new]
+        return totals
+
+    def history(self, slot):
+        """
+        Get one bot's recorded transitions, oldest first
+
+        Returns:
+            list: (from state code, to state code, reason code, timestamp)
+        """
+        if not self.history_size:
+            return []
+        count = int(self.history_count[slot])
+        first = max(0, count - self.history_size)
+        return [
+            (int(self.history_from[slot, i]), int(self.history_to[slot, i]),
+             int(self.history_reason[slot, i]), float(self.history_time[slot, i]))
+            for i in (n % self.history_size for n in range(first, count))
+        ]
+
+    def allocate(self, initial_health, now):
+        """
+        Allocate and initialize a slot for a new bot
+
+        Args:
+            initial_health (float): Starting (and maximum) health
+            now (float): Current timestamp
+
+        Returns:
+            int: Slot index of the new bot
+        """
+        with self.lock:
+            if self.free:
+                slot = self.free.pop()
+            else:
+                if self.size == self.capacity:
+                    with self.exclusive():
+                        self._grow()
+                slot = self.size
+                self.size += 1
+            with self.stripe(slot):
+                try:
+                    self.py_max_health[slot] = initial_health
+                except (TypeError, ValueError):
+                    self.free.append(slot)
+                    raise
+                self.py_position_x[slot] = self.py_position_y[slot] = self.py_position_z[slot] = 0.0
+                if self.history_size:
+                    self.history_count[slot] = 0
+                self._reset_slot(slot, now, REASON_INITIALIZED)
+                # Last, so readers never see a half-initialized live slot
+                self.py_active[slot] = True
+        return slot
+
+    def release(self, slot):
+        """Mark a slot as no longer in use and return it to the free list"""
+        with self.lock:
+            with self.stripe(slot):
+                self.py_active[slot] = False
+                self.state_slots[self.py_state[slot]].discard(slot)
+                version = self.touch(slot)
+            self.free.append(slot)
+        return version
+
+    def touch(self, slots):
+        """
+        Mark one or more slots as changed, with a version of their own
+
+        Per-slot writes queue the slot in touched instead, for stamp().
+
+        Args:
+            slots (int or numpy.ndarray): Slot(s) that changed
+
+        Returns:
+            int: The new global version
+        """
+        # The column is written under the lock, so every slot stamped with
+        # a version at or below current_version is visible once it is read
+        with self._bookkeeping:
+            self.current_version += 1
+            version = self.current_version
+            if isinstance(slots, np.ndarray):
+                self.version[slots] = version
+            else:
+                self.py_version[slots] = version
+        return version
+
+    def stamp(self):
+        """
+        Give the slots queued in touched/resensed a new version
+
+        Per-slot writes only add the slot to one of the sets, so the writes
+        between two reads of the version share one bump.  Anything reading
+        versions calls this first.
+
+        Returns:
+            int: The current global version
+        """
+        with self._bookkeeping:
+            if self.touched or self.resensed:
+                self.current_version += 1
+                for queued, column in ((self.touched, self.version),
+                                       (self.resensed, self.perception_version)):
+                    # list() copies without releasing the GIL; a slot added
+                    # after the copy stays queued for the next stamp()
+                    slots = list(queued)
+                    queued.difference_update(slots)
+                    column[slots] = self.current_version
+            return self.current_version
+
+    def sensed(self, slots):
+        """
+        Mark one or more slots' perception inputs as changed
+
+        Args:
+            slots (int or numpy.ndarray): Slot(s) whose perception changed
+
+        Returns:
+            int: The new global version
+        """
+        with self._bookkeeping:
+            self.current_version += 1
+            version = self.current_version
+            if isinstance(slots, np.ndarray):
+                self.perception_version[slots] = version
+            else:
+                self.py_perception_version[slots] = version
+        return version
+
+    def slot_version(self, slot):
+        """Global version at the last change to anything get_state_info() reports"""
+        self.stamp()
+        return max(self.py_version[slot], self.py_perception_version[slot])
+
+    def changed_since(self, version):
+        """
+        Get the active slots that changed after a given version
+
+        Call stamp() first, or recent per-slot writes are missed.
+
+        Args:
+            version (int): Version the caller last saw
+
+        Returns:
+            numpy.ndarray: Matching slots in ascending order
+        """
+        n = self.size
+        return np.flatnonzero(self.active[:n] & (self.version[:n] > version))
+
+    def damage(self, slot, amount):
+        """Apply damage to one bot"""
+        health = self.py_health
+        current = health[slot]
+        new = current - amount if current > amount else 0
+        if new != current:
+            health[slot] = new
+            self.pending.add(slot)
+            self.touched.add(slot)
+
+    def heal(self, slot, amount):
+        """Heal one bot, capped at its maximum health"""
+        health = self.py_health
+        current = health[slot]
+        new = current + amount
+        cap = self.py_max_health[slot]
+        if new > cap:
+            new = cap
+        if new != current:
+            health[slot] = new
+            self.pending.add(slot)
+            self.touched.add(slot)
+
+    def perceive(self, slot, visible, distance):
+        """Record new perception input for one bot, evaluated on the next tick()"""
+        if visible != self.py_player_visible[slot] or distance != self.py_player_distance[slot]:
+            self.py_player_visible[slot] = visible
+            self.py_player_distance[slot] = distance
+            self.resensed.add(slot)
+        self.pending.add(slot)
+
+    def perceive_all(self, visible_array, distance_array):
+        """
+        Record new perception for every slot, evaluated on the next tick()
+
+        Only bots whose perception actually changed are queued.
+
+        Args:
+            visible_array (array-like of bool): Player visibility per slot
+            distance_array (array-like of float): Player distance per slot
+        """
+        n = self.size
+        visible = np.asarray(visible_array, dtype=np.bool_)
+        distance = np.asarray(distance_array, dtype=np.float64)
+        if visible.shape != (n,) or distance.shape != (n,):
+            raise ValueError(f"Expected perception arrays of length {n}")
+        changed = self.active[:n] & ((visible != self.player_visible[:n])
+                                     | (distance != self.player_distance[:n]))
+        slots = np.flatnonzero(changed)
+        self.player_visible[slots] = visible[slots]
+        self.player_distance[slots] = distance[slots]
+        if slots.size:
+            self.sensed(slots)
+        self.pending.update(slots.tolist())
+
+    def _start_timer(self, slot, new_state, now):
+        """Draw a fresh IDLE/PATROL timer and schedule its expiry"""
+        if new_state == IDLE:
+            self.py_idle_timer[slot] = random.uniform(2, 5)
+        elif new_state == PATROL:
+            self.py_patrol_timer[slot] = random.uniform(3, 8)
+        else:
+            return
+        self.scheduled.add(slot)
+
+    def _push_scheduled(self):
+        """Push heap entries for the slots whose timer started since the last tick()"""
+        scheduled, self.scheduled = self.scheduled, set()
+        timers = self.timers
+        for slot in scheduled:
+            # Only the latest timer matters if the bot started several
+            timer = self.py_timers[self.py_state[slot]]
+            if timer is not None and self.py_active[slot]:
+                started = self.py_last_state_change[slot]
+                heapq.heappush(timers, (started + timer[slot], slot, started))
+
+        # Drop stale entries once they dominate the heap; at most one
+        # entry per bot is ever live, so this keeps the heap O(bots)
+        if len(timers) > 2 * self.size + 64:
+            timers[:] = [entry for entry in timers if self._timer_live(entry)]
+            heapq.heapify(timers)
+
+    def rebuild_timers(self):
+        """Rebuild the timer heap from the columns of every IDLE/PATROL bot"""
+        n = self.size
+        state = self.state[:n]
+        idle = state == IDLE
+        slots = np.flatnonzero(self.active[:n] & (idle | (state == PATROL)))
+        started = self.last_state_change[slots]
+        deadlines = started + np.where(idle[slots], self.idle_timer[slots], self.patrol_timer[slots])
+        order = np.argsort(deadlines, kind="stable")
+        # A sorted list already satisfies the heap invariant
+        self.timers = list(zip(deadlines[order].tolist(), slots[order].tolist(),
+                               started[order].tolist()))
+        self.scheduled = set()
+        self.timers_stale = False
+
+    def _timer_live(self, entry):
+        deadline, slot, started = entry
+        if not self.py_active[slot] or self.py_last_state_change[slot] != started:
+            return False
+        # Several transitions at the same instant share `started`; only the
+        # entry for the current state and timer is live
+        state = self.py_state[slot]
+        if state == IDLE:
+            return deadline == started + self.py_idle_timer[slot]
+        if state == PATROL:
+            return deadline == started + self.py_patrol_timer[slot]
+        return False
+
+    def _set_state(self, slot, new_state):
+        """Write one slot's state, keeping state_slots in step"""
+        slot = int(slot)
+        self.state_slots[self.py_state[slot]].discard(slot)
+        self.state_slots[new_state].add(slot)
+        self.py_state[slot] = new_state
+
+    def rebuild_state_index(self):
+        """Rebuild state_slots from the columns after a bulk load"""
+        slots = np.flatnonzero(self.active[:self.size])
+        states = self.state[slots]
+        self.state_slots = [set(slots[states == code].tolist()) for code in range(len(STATES))]
+
+    def _reset_slot(self, slot, now, reason):
+        self._set_state(slot, IDLE)
+        health = self.py_health[slot] = self.py_max_health[slot]
+        self.py_player_visible[slot] = False
+        self.py_player_distance[slot] = np.inf
+        self.py_last_state_change[slot] = now
+        self.py_idle_timer[slot] = random.uniform(2, 5)  # Random idle time
+        self.py_patrol_timer[slot] = random.uniform(3, 8)  # Random patrol time
+        self.py_reason[slot] = reason
+        self.scheduled.add(slot)
+        if health <= 0:
+            self.pending.add(slot)
+        self.touched.add(slot)
+
+    def reset(self, slot, now):
+        """Reset one bot to its initial state"""
+        self._reset_slot(slot, now, REASON_RESET)
+
+    def reset_all(self, now):
+        """Reset every active bot to its initial state"""
+        for slot in np.flatnonzero(self.active[:self.size]):
+            self._reset_slot(slot, now, REASON_RESET)
+
+    def transition(self, slot, new_state, reason, now):
+        """
+        Transition one bot to a new state
+
+        Args:
+            slot (int): Slot of the bot
+            new_state (int): Target state code
+            reason (int): Reason code
+            now (float): Current timestamp
+        """
+        old_state = self.py_state[slot]
+        if old_state != new_state:
+            if self.history_size:
+                self._record_one(slot, old_state, new_state, reason,
+                                 now - self.py_last_state_change[slot], now)
+            self.stripe_transitions[slot % self.LOCK_STRIPES][old_state][new_state] += 1
+            # _set_state(), inlined
+            state_slots = self.state_slots
+            state_slots[old_state].discard(slot)
+            state_slots[new_state].add(slot)
+            self.py_state[slot] = new_state
+            self.py_last_state_change[slot] = now
+            self.py_reason[slot] = reason
+            self.touched.add(slot)
+
+            # Reset timers when entering certain states
+            self._start_timer(slot, new_state, now)
+
+    def step(self, slot, visible, distance, now):
+        """
+        Update one bot using the compiled transition table
+
+        Args:
+            slot (int): Slot of the bot
+            visible (bool): Whether player is visible to bot
+            distance (float): Distance to player
+            now (float): Current timestamp
+        """
+        if visible != self.py_player_visible[slot] or distance != self.py_player_distance[slot]:
+            self.py_player_visible[slot] = visible
+            self.py_player_distance[slot] = distance
+            self.resensed.add(slot)
+
+        code = self.py_state[slot]
+        timers = self.py_timers[code]
+        timer = timers[slot] if timers is not None else None
+        health = self.py_health[slot]
+        elapsed = now - self.py_last_state_change[slot]
+
+        hit = TRANSITIONS.dispatch[code](visible, distance, health, elapsed, timer)
+        if hit is not None:
+            self.transition(slot, hit[0], hit[1], now)
+
+    def update_all(self, visible_array, distance_array, now=None):
+        """
+        Update every active bot in one vectorized pass
+
+        Args:
+            visible_array (array-like of bool): Player visibility per slot
+            distance_array (array-like of float): Player distance per slot
+            now (float, optional): Timestamp to evaluate timers against
+
+        Returns:
+            numpy.ndarray: Slots of the bots that changed state
+        """
+        n = self.size
+        visible = np.asarray(visible_array, dtype=np.bool_)
+        distance = np.asarray(distance_array, dtype=np.float64)
+        if visible.shape != (n,) or distance.shape != (n,):
+            raise ValueError(f"Expected perception arrays of length {n}")
+        if now is None:
+            now = self.clock.now()
+
+        active = self.active[:n]
+        sensed = np.flatnonzero(active & ((visible != self.player_visible[:n])
+                                          | (distance != self.player_distance[:n])))
+        if sensed.size:
+            self.player_visible[sensed] = visible[sensed]
+            self.player_distance[sensed] = distance[sensed]
+            self.sensed(sensed)
+
+        state = self.state[:n]
+        health = self.health[:n]
+        elapsed = now - self.last_state_change[:n]
+
+        target = state.copy()
+        reason = self.reason[:n].copy()
+        undecided = active.copy()
+
+        for code in range(len(STATES)):
+            start, end = TRANSITIONS.rule_start[code], TRANSITIONS.rule_end[code]
+            if start == end:
+                continue
+            in_state = undecided & (state == code)
+            if not in_state.any():
+                continue
+            timer_column = TRANSITIONS.timer_columns[code]
+            timer = getattr(self, timer_column)[:n] if timer_column else None
+            for rule in range(start, end):
+                hit = in_state & TRANSITIONS.guards[rule].vector(
+                    visible, distance, health, elapsed, timer)
+                target[hit] = TRANSITIONS.rule_target[rule]
+                reason[hit] = TRANSITIONS.rule_reason[rule]
+                in_state &= ~hit
+
+        changed = np.flatnonzero(active & (target != state))
+        if changed.size:
+            if self.history_size:
+                self._record(changed, state[changed], target[changed],
+                             reason[changed], elapsed[changed], now)
+            state_slots = self.state_slots
+            counts = self.stripe_transitions[0]  # every stripe is held
+            for slot, old, new in zip(changed.tolist(), state[changed].tolist(),
+                                      target[changed].tolist()):
+                state_slots[old].discard(slot)
+                state_slots[new].add(slot)
+                counts[old][new] += 1
+            self.state[changed] = target[changed]
+            self.last_state_change[changed] = now
+            self.reason[changed] = reason[changed]
+            self.touch(changed)
+
+            # Reset timers when entering certain states, drawing in slot
+            # order so the random sequence matches per-bot updates
+            for slot, new_state in zip(changed.tolist(), target[changed].tolist()):
+                self._start_timer(slot, new_state, now)
+
+        return changed
+
+    def tick(self, now=None):
+        """
+        Step only the bots that can transition right now
+
+        Visits bots with pending perception or health changes, bots that
+        transitioned on the previous tick, and bots whose IDLE/PATROL timer
+        has expired.  Every other bot would keep its state, so the result
+        matches calling update_all() with each bot's latest perception, at
+        a cost proportional to activity instead of population.
+
+        Args:
+            now (float, optional): Timestamp to evaluate timers against
+
+        Returns:
+            numpy.ndarray: Slots of the bots that changed state
+        """
+        if now is None:
+            now = self.clock.now()
+        if self.timers_stale:
+            self.rebuild_timers()
+        else:
+            self._push_scheduled()
+
+        due, self.pending = self.pending, set()
+        timers = self.timers
+        expired = []
+        while timers and timers[0][0] <= now:
+            entry = heapq.heappop(timers)
+            if self._timer_live(entry):
+                expired.append(entry)
+                due.add(entry[1])
+
+        changed = []
+        for slot in sorted(due):
+            if not self.py_active[slot]:
+                continue
+            previous = self.py_state[slot]
+            self.step(slot, self.py_player_visible[slot], self.py_player_distance[slot], now)
+            if self.py_state[slot] != previous:
+                changed.append(slot)
+
+        # A transition can enable another one on the next tick
+        self.pending.update(changed)
+
+        # Deadlines are compared with <= above but the guard is strict, so
+        # a timer can pop a hair early; keep it armed until it really fires
+        for entry in expired:
+            if self._timer_live(entry):
+                heapq.heappush(timers, entry)
+
+        return np.array(changed, dtype=np.intp)
+
+
+def _column(name, to_python=None):
+    """Property reading/writing one engine column at the bot's slot"""
+    view = "py_" + name
+
+    def fget(self):
+        value = getattr(self.engine, view)[self.slot]
+        return value if to_python is None else to_python(value)
+
+    def fset(self, value):
+        getattr(self.engine, view)[self.slot] = value
+
+    return property(fget, fset)
+
+
 class Bot:
-    """Bot class with FSM logic"""
-    
-    def __init__(self, bot_id, initial_health=100):
+    """Bot class with FSM logic (a view over one BotEngine slot)"""
+
+    __slots__ = ("bot_id", "engine", "slot")
+
+    # FSM configuration
+    CHASE_RANGE = CHASE_RANGE
+    ATTACK_RANGE = ATTACK_RANGE
+    FLEE_HEALTH_THRESHOLD = FLEE_HEALTH_THRESHOLD
+    RECOVER_HEALTH_THRESHOLD = RECOVER_HEALTH_THRESHOLD
+
+    # Keys of get_state_info(), in order
+    STATE_FIELDS = ("bot_id", "state", "reason", "health", "max_health",
+                    "player_visible", "player_distance", "time_in_state")
+    # Keys of get_state_info(state_since=True), in order
+    STABLE_STATE_FIELDS = STATE_FIELDS[:-1] + ("state_since",)
+
+    health = _column("health", _number)
+    max_health = _column("max_health", _number)
+    player_visible = _column("player_visible")
+    player_distance = _column("player_distance")
+    last_state_change = _column("last_state_change")
+    idle_timer = _column("idle_timer")
+    patrol_timer = _column("patrol_timer")
+
+    def __init__(self, bot_id, initial_health=100, engine=None, clock=None):
         self.bot_id = bot_id
-        self.state = BotState.IDLE
-        self.health = initial_health
-        self.max_health = initial_health
-        self.player_visible = False
-        self.player_distance = float('inf')
-        self.last_state_change = time.time()
-        self.idle_timer = random.uniform(2, 5)  # Random idle time
-        self.patrol_timer = random.uniform(3, 8)  # Random patrol time
-        self.last_transition_reason = "Bot initialized"
-        
-        # FSM configuration
-        self.CHASE_RANGE = 30.0
-        self.ATTACK_RANGE = 10.0
-        self.FLEE_HEALTH_THRESHOLD = 20
-        self.RECOVER_HEALTH_THRESHOLD = 50
-        
+        self.engine = engine if engine is not None else BotEngine(capacity=1, clock=clock)
+        self.slot = self.engine.allocate(initial_health, self.engine.clock.now())
+
+    @classmethod
+    def view(cls, engine, slot, bot_id):
+        """Create a Bot view over an already allocated engine slot"""
+        bot = cls.__new__(cls)
+        bot.bot_id = bot_id
+        bot.engine = engine
+        bot.slot = slot
+        return bot
+
+    @property
+    def state(self):
+        return STATES[self.engine.py_state[self.slot]]
+
+    @state.setter
+    def state(self, value):
+        self.engine._set_state(self.slot, STATE_CODES[value])
+
+    @property
+    def last_transition_reason(self):
+        return REASONS[self.engine.py_reason[self.slot]]
+
+    @last_transition_reason.setter
+    def last_transition_reason(self, reason):
+        self.engine.py_reason[self.slot] = intern_reason(reason)
+
     def update(self, player_visible, player_distance):
         """
         Update bot state based on current conditions
-        
+
         Args:
             player_visible (bool): Whether player is visible to bot
             player_distance (float): Distance to player
-            
+
         Returns:
             dict: Current state info and transition reason
         """
-        self.player_visible = player_visible
-        self.player_distance = player_distance
-        
-        # Store previous state for transition tracking
-        previous_state = self.state
-        
-        # Check for death first (highest priority)
-        if self.health <= 0:
-            self._transition_to(BotState.DEAD, "Health depleted")
-        
-        # FSM state transitions
-        elif self.state == BotState.IDLE:
-            self._handle_idle_state()
-        
-        elif self.state == BotState.PATROL:
-            self._handle_patrol_state()
-        
-        elif self.state == BotState.CHASE:
-            self._handle_chase_state()
-        
-        elif self.state == BotState.ATTACK:
-            self._handle_attack_state()
-        
-        elif self.state == BotState.FLEE:
-            self._handle_flee_state()
-        
-        elif self.state == BotState.DEAD:
-            # Dead state is terminal
-            pass
-        
-        # Return current state information
-        return self.get_state_info()
-    
-    def _handle_idle_state(self):
-        """Handle transitions from IDLE state"""
-        # Check if player detected
-        if self.player_visible and self.player_distance < self.CHASE_RANGE:
-            self._transition_to(BotState.CHASE, "Player detected nearby")
-        # Check idle timer
-        elif time.time() - self.last_state_change > self.idle_timer:
-            self._transition_to(BotState.PATROL, "Idle timer expired")
-    
-    def _handle_patrol_state(self):
-        """Handle transitions from PATROL state"""
-        # Check if player detected
-        if self.player_visible and self.player_distance < self.CHASE_RANGE:
-            self._transition_to(BotState.CHASE, "Player spotted during patrol")
-        # Check if should flee
-        elif self.health < self.FLEE_HEALTH_THRESHOLD:
-            self._transition_to(BotState.FLEE, "Health critical, retreating")
-        # Return to idle after patrol duration
-        elif time.time() - self.last_state_change > self.patrol_timer:
-            self._transition_to(BotState.IDLE, "Patrol complete")
-    
-    def _handle_chase_state(self):
-        """Handle transitions from CHASE state"""
-        # Check if should flee
-        if self.health < self.FLEE_HEALTH_THRESHOLD:
-            self._transition_to(BotState.FLEE, "Health critical during chase")
-        # Check if in attack range
-        elif self.player_visible and self.player_distance < self.ATTACK_RANGE:
-            self._transition_to(BotState.ATTACK, "Player in attack range")
-        # Lost sight of player
-        elif not self.player_visible:
-            self._transition_to(BotState.PATROL, "Lost sight of player")
-        # Player too far
-        elif self.player_distance > self.CHASE_RANGE * 1.5:
-            self._transition_to(BotState.PATROL, "Player out of range")
-    
-    def _handle_attack_state(self):
-        """Handle transitions from ATTACK state"""
-        # Check if should flee
-        if self.health < self.FLEE_HEALTH_THRESHOLD:
-            self._transition_to(BotState.FLEE, "Health critical, retreating from combat")
-        # Player moved out of attack range but still visible
-        elif self.player_visible and self.player_distance > self.ATTACK_RANGE:
-            self._transition_to(BotState.CHASE, "Player moved out of attack range")
-        # Lost sight of player
-        elif not self.player_visible:
-            self._transition_to(BotState.CHASE, "Lost visual on player")
-    
-    def _handle_flee_state(self):
-        """Handle transitions from FLEE state"""
-        # Recovered enough health and player visible
-        if self.health > self.RECOVER_HEALTH_THRESHOLD and self.player_visible:
-            self._transition_to(BotState.CHASE, "Health recovered, re-engaging")
-        # Player no longer visible
-        elif not self.player_visible:
-            self._transition_to(BotState.PATROL, "Escaped, returning to patrol")
-        # Safe distance achieved
-        elif self.player_distance > self.CHASE_RANGE * 2:
-            self._transition_to(BotState.IDLE, "Safe distance reached")
-    
+        engine = self.engine
+        slot = self.slot
+        now = engine.clock.now()
+        # engine.write(), inlined: this is the hottest per-bot call
+        index = slot % BotEngine.LOCK_STRIPES
+        lock = engine.locks[index]
+        sequences = engine.py_sequences
+        lock.acquire()
+        sequences[index] += 1
+        try:
+            engine.step(slot, player_visible, player_distance, now)
+
+            # Return current state information
+            return self._state_info(now)
+        finally:
+            sequences[index] += 1
+            lock.release()
+
     def _transition_to(self, new_state, reason):
         """
         Transition to a new state
-        
+
         Args:
             new_state (BotState): The new state to transition to
             reason (str): Reason for the transition
         """
-        if self.state != new_state:
-            self.state = new_state
-            self.last_state_change = time.time()
-            self.last_transition_reason = reason
-            
-            # Reset timers when entering certain states
-            if new_state == BotState.IDLE:
-                self.idle_timer = random.uniform(2, 5)
-            elif new_state == BotState.PATROL:
-                self.patrol_timer = random.uniform(3, 8)
-    
+        with self.engine.stripe(self.slot):
+            self.engine.transition(self.slot, STATE_CODES[new_state],
+                                   intern_reason(reason), self.engine.clock.now())
+
     def take_damage(self, damage):
         """
         Apply damage to bot
-        
+
         Args:
             damage (int): Amount of damage to apply
         """
-        self.health = max(0, self.health - damage)
-    
+        if damage:
+            engine = self.engine
+            engine.write(self.slot, engine.damage, self.slot, damage)
+
     def heal(self, amount):
         """
         Heal the bot
-        
+
         Args:
             amount (int): Amount to heal
         """
-        self.health = min(self.max_health, self.health + amount)
-    
+        if amount:
+            engine = self.engine
+            engine.write(self.slot, engine.heal, self.slot, amount)
+
     def reset(self):
         """Reset bot to initial state"""
-        self.state = BotState.IDLE
-        self.health = self.max_health
-        self.player_visible = False
-        self.player_distance = float('inf')
-        self.last_state_change = time.time()
-        self.idle_timer = random.uniform(2, 5)
-        self.patrol_timer = random.uniform(3, 8)
-        self.last_transition_reason = "Bot reset"
-    
-    def get_state_info(self):
+        engine = self.engine
+        engine.write(self.slot, engine.reset, self.slot, engine.clock.now())
+
+    def get_state_info(self, fields=None, state_since=False):
         """
         Get current state information
-        
+
+        Args:
+            fields (sequence of str, optional): Only include these keys
+                (from STATE_FIELDS, or STABLE_STATE_FIELDS with state_since)
+            state_since (bool): Report the timestamp of the last transition
+                as "state_since" instead of "time_in_state", so the result
+                only changes when the bot does
+
         Returns:
             dict: State information
         """
-        return {
+        engine = self.engine
+        now = None if state_since else engine.clock.now()
+        # engine.read(), inlined
+        index = self.slot % BotEngine.LOCK_STRIPES
+        sequences = engine.py_sequences
+        while True:
+            sequence = sequences[index]
+            if not sequence & 1:
+                info = self._state_info(now)
+                if sequences[index] == sequence:
+                    break
+            time.sleep(0)  # let the writer finish
+        if fields is not None:
+            info = {field: info[field] for field in fields}
+        return info
+
+    def _state_info(self, now):
+        """State info at time now, or with "state_since" if now is None"""
+        engine = self.engine
+        slot = self.slot
+        last_state_change = engine.py_last_state_change[slot]
+        # _number(), inlined
+        health = engine.py_health[slot]
+        max_health = engine.py_max_health[slot]
+        info = {
             "bot_id": self.bot_id,
-            "state": self.state.value,
-            "reason": self.last_transition_reason,
-            "health": self.health,
-            "max_health": self.max_health,
-            "player_visible": self.player_visible,
-            "player_distance": round(self.player_distance, 2),
-            "time_in_state": round(time.time() - self.last_state_change, 2)
+            "state": STATE_VALUES[engine.py_state[slot]],
+            "reason": REASONS[engine.py_reason[slot]],
+            "health": int(health) if health.is_integer() else health,
+            "max_health": int(max_health) if max_health.is_integer() else max_health,
+            "player_visible": engine.py_player_visible[slot],
+            "player_distance": round(engine.py_player_distance[slot], 2),
         }
+        if now is None:
+            info["state_since"] = last_state_change
+        else:
+            info["time_in_state"] = round(now - last_state_change, 2)
+        return info
+
+
+class BotDirectory(Mapping):
+    """
+    Read-only bot_id -> Bot mapping over a manager's live bots
+
+    Resolved from the engine's identity columns on demand, so the manager
+    never needs one dict entry per bot.  Iterates in creation order.
+    """
+
+    def __init__(self, manager):
+        self._manager = manager
+
+    def __getitem__(self, bot_id):
+        slot = self._manager._slot_of(bot_id)
+        if slot is None:
+            raise KeyError(bot_id)
+        return self._manager._bot_at(slot)
+
+    def __iter__(self):
+        manager = self._manager
+        return (manager._id_of(slot) for slot in manager.live_slots())
+
+    def __len__(self):
+        engine = self._manager.engine
+        return engine.size - len(engine.free)
+
+    def values(self):
+        manager = self._manager
+        return [manager._bot_at(slot) for slot in manager.live_slots()]
+
+    def items(self):
+        return [(bot.bot_id, bot) for bot in self.values()]
 
 
 # Global bot manager
 class BotManager:
     """Manages multiple bots"""
-    
-    def __init__(self):
-        self.bots = {}
+
+    # Removal tombstones kept for changes_since(); older ones are dropped,
+    # in batches once twice this many have built up
+    MAX_REMOVED_HISTORY = 10000
+
+    def __init__(self, clock=None, engine=None):
+        self.engine = engine if engine is not None else BotEngine(clock=clock)
+        self.clock = self.engine.clock
+        self.bots = BotDirectory(self)  # bot_id (string alias or integer handle) -> Bot
         self.next_bot_id = 1
-    
+        self._slot_bots = []  # Pooled Bot views by handle, created on first use
+        self._serial_slots = np.full(64, -1, dtype=np.int64)  # serial -> slot
+        self._aliases = {}  # custom alias -> slot
+        self._slot_aliases = {}  # slot -> custom alias
+        self._removed = []  # (version, bot_id) in version order
+        self._removed_floor = 0  # Oldest version still covered by _removed
+        self.players = SpatialGrid()  # Player positions for perceive_all()
+        # Distinguishes this manager's versions from another process's (or
+        # a pre-restore engine's), which may reuse the same numbers
+        self.epoch = os.urandom(4).hex()
+
+    @property
+    def version(self):
+        """Global version, bumped whenever any bot or its perception changes"""
+        return self.engine.stamp()
+
+    def bot_version(self, bot_id):
+        """
+        Version of one bot's state info
+
+        Changes whenever anything get_state_info() reports changes, apart
+        from time_in_state.
+
+        Returns:
+            int: The version, or None if the bot does not exist
+        """
+        slot = self._slot_of(bot_id)
+        return None if slot is None else self.engine.slot_version(slot)
+
     def create_bot(self, initial_health=100):
         """Create a new bot"""
-        bot_id = f"bot_{self.next_bot_id}"
-        self.next_bot_id += 1
-        self.bots[bot_id] = Bot(bot_id, initial_health)
-        return bot_id
-    
+        with self.engine.lock:
+            slot = self._create(initial_health, named=True)
+            return f"bot_{self.engine.serial[slot]}"
+
+    def create_handle(self, initial_health=100, alias=None):
+        """
+        Create a new bot and return its integer handle
+
+        Slots (and their Bot views) freed by remove_bot are reused, so a
+        handle is only valid until that bot is removed.
+
+        Args:
+            initial_health (int): Starting health
+            alias (str, optional): String ID for the bot; without one the
+                bot is known by its handle
+
+        Returns:
+            int: The bot's handle
+        """
+        return self._create(initial_health, alias=alias)
+
+    def _create(self, initial_health, named=False, alias=None):
+        engine = self.engine
+        with engine.lock:
+            if alias is not None and self._slot_of(alias) is not None:
+                raise ValueError(f"Bot '{alias}' already exists")
+            slot = engine.allocate(initial_health, self.clock.now())
+            serial = self.next_bot_id
+            self.next_bot_id += 1
+            engine.serial[slot] = serial
+            engine.named[slot] = named
+            if serial >= len(self._serial_slots):
+                grown = np.full(max(serial + 1, 2 * len(self._serial_slots)), -1, dtype=np.int64)
+                grown[:len(self._serial_slots)] = self._serial_slots
+                self._serial_slots = grown
+            self._serial_slots[serial] = slot
+            if alias is not None:
+                self._aliases[alias] = slot
+                self._slot_aliases[slot] = alias
+
+            # A pooled view left behind by the slot's previous bot takes the new ID
+            if slot < len(self._slot_bots) and self._slot_bots[slot] is not None:
+                self._slot_bots[slot].bot_id = self._id_of(slot)
+        return slot
+
+    def _id_of(self, slot):
+        """The public ID of the bot in a slot"""
+        alias = self._slot_aliases.get(slot)
+        if alias is not None:
+            return alias
+        if self.engine.named[slot]:
+            return f"bot_{self.engine.serial[slot]}"
+        return int(slot)
+
+    def _slot_of(self, bot_id):
+        """
+        Resolve a bot ID (alias, "bot_N" or integer handle) to a live slot
+
+        Integer handles only reach bots created by create_handle(); a bot
+        created as "bot_N" is addressed by that ID alone, so a stale or
+        guessed slot number can't reach it.
+        """
+        engine = self.engine
+        if type(bot_id) is int:
+            if 0 <= bot_id < engine.size and engine.active[bot_id] and not engine.named[bot_id]:
+                return bot_id
+            return None
+        slot = self._aliases.get(bot_id)
+        if slot is not None:
+            return slot
+        if isinstance(bot_id, str) and bot_id.startswith("bot_"):
+            digits = bot_id[4:]
+            if digits.isdigit() and digits == str(int(digits)):
+                serial = int(digits)
+                if serial < len(self._serial_slots):
+                    slot = int(self._serial_slots[serial])
+                    if slot >= 0 and engine.named[slot]:
+                        return slot
+        return None
+
+    def _bot_at(self, slot):
+        """The pooled Bot view for a live slot"""
+        views = self._slot_bots
+        if slot >= len(views):
+            # Called with a stripe held, so no lock here; a racing second
+            # extend only leaves the list longer than needed
+            views.extend([None] * (self.engine.capacity - len(views)))
+        bot = views[slot]
+        if bot is None:
+            # Two threads may race to create the view; either copy is fine
+            bot = views[slot] = Bot.view(self.engine, slot, self._id_of(slot))
+        return bot
+
+    def _reindex(self, next_bot_id=None, aliases=None):
+        """
+        Rebuild the ID index after the engine's columns were loaded in bulk
+
+        Args:
+            next_bot_id (int, optional): Next serial to hand out (defaults
+                to one past the highest live serial)
+            aliases (dict, optional): slot -> custom alias
+        """
+        engine = self.engine
+        slots = np.flatnonzero(engine.active[:engine.size])
+        serials = engine.serial[slots]
+        self.next_bot_id = max(next_bot_id or 1, int(serials.max()) + 1 if slots.size else 1)
+        self._serial_slots = np.full(max(64, self.next_bot_id), -1, dtype=np.int64)
+        self._serial_slots[serials] = slots
+        self._slot_aliases = dict(aliases or {})
+        self._aliases = {alias: slot for slot, alias in self._slot_aliases.items()}
+        self._slot_bots = []
+        # Versions before the load cannot be diffed against
+        self._removed = []
+        self._removed_floor = engine.current_version
+        self.epoch = os.urandom(4).hex()
+
+    def live_slots(self):
+        """Slots of every live bot, in creation order"""
+        engine = self.engine
+        slots = np.flatnonzero(engine.active[:engine.size])
+        return slots[np.argsort(engine.serial[slots], kind="stable")].tolist()
+
     def get_bot(self, bot_id):
-        """Get a bot by ID"""
-        return self.bots.get(bot_id)
-    
+        """Get a bot by ID (string alias or integer handle)"""
+        slot = self._slot_of(bot_id)
+        return None if slot is None else self._bot_at(slot)
+
+    def modify(self, bot_id, change):
+        """
+        Apply a change to a bot while holding its slot's stripe
+
+        The ID is resolved again once the stripe is held, so a concurrent
+        remove_bot() and create_bot() that reuse the slot (and relabel its
+        pooled Bot view) cannot redirect the change to the new bot.
+
+        Args:
+            bot_id: The bot ID
+            change (callable): change(bot, now) with the stripe held; it
+                must write through bot.engine, not the Bot methods, which
+                take the stripe themselves
+
+        Returns:
+            tuple: (change's result, state info after the change), or
+                None if the bot does not exist
+        """
+        engine = self.engine
+        slot = self._slot_of(bot_id)
+        while slot is not None:
+            with engine.stripe(slot):
+                if self._slot_of(bot_id) == slot:
+                    bot = self._bot_at(slot)
+                    now = self.clock.now()
+                    result = change(bot, now)
+                    return result, bot._state_info(now)
+            # Removed, or moved to another slot, before the stripe was taken
+            slot = self._slot_of(bot_id)
+        return None
+
     def remove_bot(self, bot_id):
-        """Remove a bot"""
-        if bot_id in self.bots:
-            del self.bots[bot_id]
-    
+        """
+        Remove a bot
+
+        The bot's slot goes back to the pool, so Bot objects obtained
+        earlier must not be used after removal.
+        """
+        with self.engine.lock:
+            slot = self._slot_of(bot_id)
+            if slot is not None:
+                bot_id = self._id_of(slot)
+                self._serial_slots[self.engine.serial[slot]] = -1
+                alias = self._slot_aliases.pop(slot, None)
+                if alias is not None:
+                    del self._aliases[alias]
+                version = self.engine.release(slot)
+                self._removed.append((version, bot_id))
+                # Trimming on every removal would copy the whole list each time
+                if len(self._removed) > 2 * self.MAX_REMOVED_HISTORY:
+                    dropped = len(self._removed) - self.MAX_REMOVED_HISTORY
+                    self._removed_floor = self._removed[dropped - 1][0]
+                    self._removed = self._removed[dropped:]
+
+    def changes_since(self, version):
+        """
+        Get the bots that changed after a given version
+
+        Bots count as changed on creation, transition, damage, heal and
+        reset.  Perception inputs alone do not bump the version.
+
+        Args:
+            version (int): Version the caller last saw (0 for everything)
+
+        Returns:
+            dict: {"version": current version,
+                   "full": True if the caller must drop its cached bots,
+                   "bots": changed Bot views,
+                   "removed": IDs of bots removed since version}
+        """
+        engine = self.engine
+        # Read the version before scanning: anything that changes during the
+        # scan gets a later version and is reported again on the next poll
+        with engine.lock:
+            current = engine.stamp()
+            full = version < self._removed_floor
+            if full:
+                version = 0
+            removed = [bot_id for _, bot_id in self._removed[
+                bisect.bisect_right(self._removed, version, key=lambda r: r[0]):]]
+        slots = engine.changed_since(version)
+        return {
+            "version": current,
+            "full": full,
+            "bots": [self._bot_at(slot) for slot in slots],
+            "removed": removed,
+        }
+
     def get_all_bots(self):
         """Get all bots"""
         return self.bots
-    
+
+    def query_bots(self, states=None, after=0, limit=None):
+        """
+        Page through live bots in creation order
+
+        Pages are keyed on the creation serial, so a cursor stays valid
+        while bots are created and removed between requests.
+
+        Args:
+            states (iterable of BotState, optional): Only bots in these
+                states, looked up in the engine's per-state index so the
+                cost grows with the matches rather than the population
+            after (int): Cursor from the previous page (0 for the first)
+            limit (int, optional): Most bots to return
+
+        Returns:
+            dict: {"bots": Bot views,
+                   "total": number of bots matching states,
+                   "cursor": cursor for the next page, None on the last}
+        """
+        engine = self.engine
+        if states is None:
+            total = len(self.bots)
+            slots = self._serial_slots[after + 1:self.next_bot_id]
+            slots = slots[slots >= 0]
+        else:
+            matches = []
+            for state in set(states):
+                # list() copies the set without releasing the GIL, so a
+                # concurrent transition cannot resize it mid-copy
+                matches.extend(list(engine.state_slots[STATE_CODES[state]]))
+            total = len(matches)
+            slots = np.array(matches, dtype=np.intp)
+            serials = engine.serial[slots]
+            later = serials > after
+            slots = slots[later][np.argsort(serials[later], kind="stable")]
+
+        cursor = None
+        if limit is not None and len(slots) > limit:
+            slots = slots[:limit]
+            cursor = int(engine.serial[slots[-1]])
+        return {
+            "bots": [self._bot_at(slot) for slot in slots.tolist()],
+            "total": total,
+            "cursor": cursor,
+        }
+
+    def enable_history(self, size=16):
+        """Start recording per-bot transition history and aggregate statistics"""
+        with self.engine.exclusive():
+            self.engine.enable_history(size)
+
+    def get_history(self, bot_id):
+        """
+        Get a bot's recent transitions, oldest first
+
+        Returns:
+            list: Transition dicts, or None if the bot does not exist
+        """
+        bot = self.get_bot(bot_id)
+        if bot is None:
+            return None
+        return [
+            {
+                "from": STATES[old].value,
+                "to": STATES[new].value,
+                "reason": REASONS[reason],
+                "timestamp": timestamp
+            }
+            for old, new, reason, timestamp in self.engine.read(
+                bot.slot, lambda: self.engine.history(bot.slot))
+        ]
+
+    def transition_stats(self):
+        """
+        Get manager-wide transition statistics
+
+        Returns:
+            dict: Transition counts by from/to state and time-in-state
+                histograms, or None if history is not enabled
+        """
+        engine = self.engine
+        if not engine.history_size:
+            return None
+        counts = engine.transition_counts()
+        with engine._bookkeeping:
+            time_in_state_counts = engine.time_in_state_counts.tolist()
+            time_in_state_total = engine.time_in_state_total.tolist()
+        return {
+            "transitions": {
+                STATES[old].value: {STATES[new].value: counts[old][new]
+                                    for new in range(len(STATES)) if counts[old][new]}
+                for old in range(len(STATES))
+            },
+            "time_in_state": {
+                state.value: {
+                    "bucket_upper_bounds": list(engine.TIME_IN_STATE_BUCKETS) + [None],
+                    "counts": time_in_state_counts[code],
+                    "total_seconds": round(time_in_state_total[code], 2)
+                }
+                for code, state in enumerate(STATES)
+            }
+        }
+
+    def submit_perception(self, bot_id, player_visible, player_distance):
+        """
+        Record new perception for a bot, to be evaluated on the next tick()
+
+        Args:
+            bot_id (str): The bot ID
+            player_visible (bool): Whether player is visible to bot
+            player_distance (float): Distance to player
+
+        Returns:
+            bool: False if the bot does not exist
+        """
+        slot = self._slot_of(bot_id)
+        if slot is None:
+            return False
+        with self.engine.stripe(slot):
+            self.engine.perceive(slot, player_visible, player_distance)
+        return True
+
+    def set_bot_position(self, bot_id, x, y, z):
+        """
+        Move a bot in the world (used by perceive_all)
+
+        Returns:
+            bool: False if the bot does not exist
+
+        Raises:
+            ValueError: Unless x, y and z are finite numbers
+        """
+        x, y, z = finite_position(x, y, z)
+        slot = self._slot_of(bot_id)
+        if slot is None:
+            return False
+        engine = self.engine
+        with engine.stripe(slot):
+            engine.position_x[slot] = x
+            engine.position_y[slot] = y
+            engine.position_z[slot] = z
+        return True
+
+    def set_player_position(self, player_id, x, y, z):
+        """Add or move a player that bots can perceive"""
+        self.players.set_player(player_id, x, y, z)
+
+    def remove_player(self, player_id):
+        """Stop bots from perceiving a player"""
+        self.players.remove_player(player_id)
+
+    def perceive_all(self):
+        """
+        Compute every bot's perception from bot and player positions
+
+        A bot sees the nearest player within VISION_RANGE; with nobody in
+        range it sees no one at infinite distance.  Bots whose perception
+        changed are evaluated on the next tick().
+
+        Returns:
+            tuple: (visible, distance) arrays indexed by Bot.slot
+        """
+        engine = self.engine
+        with engine.exclusive():
+            n = engine.size
+            distance = self.players.nearest_distance(
+                engine.position_x[:n], engine.position_y[:n], engine.position_z[:n])
+            visible = distance <= VISION_RANGE
+            engine.perceive_all(visible, distance)
+        return visible, distance
+
+    def tick(self):
+        """
+        Advance every bot that can transition right now
+
+        Only bots with new perception or health changes, bots that just
+        transitioned and bots whose IDLE/PATROL timer expired are visited.
+
+        Returns:
+            list: Bots that changed state
+        """
+        with self.engine.exclusive():
+            changed = self.engine.tick()
+        return [self._bot_at(slot) for slot in changed]
+
+    def update_all(self, visible_array, distance_array):
+        """
+        Update every bot in one vectorized pass
+
+        Args:
+            visible_array (array-like of bool): Player visibility, indexed by Bot.slot
+            distance_array (array-like of float): Player distance, indexed by Bot.slot
+
+        Returns:
+            numpy.ndarray: Slots of the bots that changed state
+        """
+        with self.engine.exclusive():
+            return self.engine.update_all(visible_array, distance_array)
+
+    def update_batch(self, updates, changed=None):
+        """
+        Update many bots at the same instant, in order
+
+        Args:
+            updates (iterable): (bot_id, player_visible, player_distance) tuples
+            changed (list, optional): Receives the state info of every
+                update that made its bot change state
+
+        Returns:
+            list: State info per update, None where the bot does not exist
+        """
+        engine = self.engine
+        now = self.clock.now()
+        results = []
+        for bot_id, player_visible, player_distance in updates:
+            slot = self._slot_of(bot_id)
+            state_info = previous = None
+            while slot is not None:
+                with engine.stripe(slot):
+                    # See modify()
+                    if self._slot_of(bot_id) == slot:
+                        previous = engine.py_state[slot]
+                        engine.step(slot, player_visible, player_distance, now)
+                        state_info = self._bot_at(slot)._state_info(now)
+                        break
+                slot = self._slot_of(bot_id)
+            results.append(state_info)
+            if (changed is not None and state_info is not None
+                    and state_info["state"] != STATE_VALUES[previous]):
+                changed.append(state_info)
+        return results
+
     def reset_all(self):
         """Reset all bots"""
-        for bot in self.bots.values():
-            bot.reset()
+        with self.engine.exclusive():
+            self.engine.reset_all(self.clock.now())
+
+
+class SimulationLoop:
+    """
+    Background thread calling BotManager.tick() at a fixed rate
+
+    Bots then advance on the server's schedule with their latest perception
+    (submit_perception(), perceive_all()) instead of when clients call
+    update, and IDLE/PATROL timers fire on time.  Ticks are scheduled on a
+    fixed grid; a tick that runs past the next deadline counts as an
+    overrun and the ticks it swallowed are skipped rather than run back to
+    back.  A TickClock is advanced one tick per iteration.  A tick that
+    raises is logged and counted in errors, and the loop carries on.
+    """
+
+    def __init__(self, manager, rate=20.0, on_tick=None):
+        """
+        Args:
+            manager (BotManager): Manager to tick
+            rate (float): Ticks per second
+            on_tick (callable, optional): Called with the list of Bot views
+                that changed state, after every tick that changed any
+        """
+        if rate <= 0:
+            raise ValueError("Tick rate must be positive")
+        self.manager = manager
+        self.rate = rate
+        self.on_tick = on_tick
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped_ticks = 0
+        self.transitions = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.errors = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the thread after the tick in progress"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        period = 1.0 / self.rate
+        deadline = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self.step()
+            except Exception as exc:
+                self.errors += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception("Simulation tick failed")
+            deadline += period
+            now = time.perf_counter()
+            if now > deadline:
+                self.overruns += 1
+                missed = int((now - deadline) / period)
+                self.skipped_ticks += missed
+                deadline += missed * period
+            self._stop.wait(max(0.0, deadline - now))
+
+    def step(self):
+        """
+        Run one tick now and record its duration
+
+        Returns:
+            list: Bots that changed state
+        """
+        start = time.perf_counter()
+        clock = self.manager.clock
+        if isinstance(clock, TickClock):
+            clock.advance()
+        changed = self.manager.tick()
+        if changed and self.on_tick is not None:
+            self.on_tick(changed)
+        duration = time.perf_counter() - start
+
+        self.ticks += 1
+        self.transitions += len(changed)
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        return changed
+
+    def stats(self):
+        """
+        Get tick timing statistics
+
+        Returns:
+            dict: Rate, counts, and tick durations in milliseconds; a tick
+                taking longer than 1000 / rate ms is an overrun.  errors
+                counts ticks that raised, last_error describes the latest
+        """
+        ticks = self.ticks
+        return {
+            "running": self.running,
+            "rate": self.rate,
+            "budget_ms": round(1000.0 / self.rate, 3),
+            "ticks": ticks,
+            "overruns": self.overruns,
+            "skipped_ticks": self.skipped_ticks,
+            "transitions": self.transitions,
+            "last_tick_ms": round(self.last_duration * 1000, 3),
+            "max_tick_ms": round(self.max_duration * 1000, 3),
+            "mean_tick_ms": round(self.total_duration / ticks * 1000, 3) if ticks else 0.0,
+            "errors": self.errors,
+            "last_error": self.last_error
+        }
 
 
 # Global instance
@@ -0,0 +1,351 @@
+"""
+Multi-process sharded bot manager for the 3D Battleground Bot FSM
+
+Bots are spread across a pool of worker processes, each stepping its own
+BotEngine.  Every engine's columns live in multiprocessing.shared_memory, so
+the API process reads bot state straight out of shared memory without
+copying or pickling; only mutations are sent to the owning worker.  The
+stripe sequence numbers share the buffer too, so the API process's
+lock-free reads retry while the worker writes.
+"""
+
+import multiprocessing
+import threading
+import traceback
+from contextlib import ExitStack
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from bot_fsm import Bot, BotEngine, BotManager
+
+
+def _buffer_size(capacity):
+    """Shared memory per shard: the engine, then the update_all inbox"""
+    return BotEngine.buffer_size(capacity) + capacity * (np.dtype(np.float64).itemsize
+                                                         + np.dtype(np.bool_).itemsize)
+
+
+def _inbox(buffer, capacity):
+    """
+    Perception arrays the API process fills for update_all
+
+    They sit after the engine's columns rather than in them, so the worker
+    compares them with the bots' last perception and stamps
+    perception_version for the ones that changed.
+    """
+    offset = BotEngine.buffer_size(capacity)
+    distance = np.ndarray(capacity, dtype=np.float64, buffer=buffer, offset=offset)
+    visible = np.ndarray(capacity, dtype=np.bool_, buffer=buffer,
+                         offset=offset + distance.nbytes)
+    return visible, distance
+
+
+def _detach(engine):
+    """Drop an engine's views so the shared buffer can be closed"""
+    for name, dtype, fill in BotEngine.COLUMNS:
+        delattr(engine, name)
+        delattr(engine, "py_" + name)
+    engine.py_timers = ()
+    engine.stripes = []
+    del engine.py_sequences
+
+
+def _shard_worker(conn, shm_name, capacity):
+    """Worker process loop: owns one engine and applies routed commands"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    engine = BotEngine(capacity, buffer=shm.buf, initialize=False)
+    manager = BotManager(engine=engine)
+    inbox_visible, inbox_distance = _inbox(shm.buf, capacity)
+
+    def update_all():
+        n = engine.size
+        return len(manager.update_all(inbox_visible[:n], inbox_distance[:n]))
+
+    def tick():
+        with engine.exclusive():
+            return engine.tick().tolist()
+
+    def on_slot(write):
+        """Apply write(slot, ...) holding the slot's stripe"""
+        def command(slot, *args):
+            with engine.stripe(slot):
+                return write(slot, *args)
+        return command
+
+    commands = {
+        "create": lambda health: manager.create_handle(health),
+        "create_many": lambda count, health: [manager.create_handle(health) for _ in range(count)],
+        "remove": lambda slot: manager.remove_bot(slot),
+        "update": on_slot(lambda slot, visible, distance:
+                          engine.step(slot, visible, distance, engine.clock.now())),
+        "perceive": on_slot(engine.perceive),
+        "damage": on_slot(engine.damage),
+        "heal": on_slot(engine.heal),
+        "reset": on_slot(lambda slot: engine.reset(slot, engine.clock.now())),
+        "reset_all": lambda: manager.reset_all(),
+        "update_all": update_all,
+        "tick": tick,
+    }
+
+    try:
+        while True:
+            command, args = conn.recv()
+            if command == "stop":
+                break
+            try:
+                conn.send((True, commands[command](*args)))
+            except Exception:
+                conn.send((False, traceback.format_exc()))
+    finally:
+        _detach(engine)
+        shm.close()
+        conn.close()
+
+
+class ShardError(RuntimeError):
+    """Raised when a shard worker fails to apply a command"""
+
+
+class _Shard:
+    """API-process side of one shard: worker pipe plus a read-only engine view"""
+
+    def __init__(self, index, capacity, context):
+        self.index = index
+        self.shm = shared_memory.SharedMemory(create=True, size=_buffer_size(capacity))
+        # Initialize the columns here; the worker attaches to them as they are
+        self.engine = BotEngine(capacity, buffer=self.shm.buf)
+        self.inbox = _inbox(self.shm.buf, capacity)
+        self.conn, child_conn = context.Pipe()
+        # Held from sending a command until its reply is read, so threads
+        # sharing the pipe never take each other's replies
+        self.lock = threading.Lock()
+        self.process = context.Process(
+            target=_shard_worker, args=(child_conn, self.shm.name, capacity), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def send(self, command, *args):
+        """Send a command; the caller holds self.lock until receive()"""
+        self.conn.send((command, args))
+
+    def receive(self):
+        ok, result = self.conn.recv()
+        if not ok:
+            raise ShardError(f"Shard {self.index} failed:\n{result}")
+        return result
+
+    def call(self, command, *args):
+        with self.lock:
+            self.send(command, *args)
+            return self.receive()
+
+    def close(self):
+        with self.lock:
+            if self.process.is_alive():
+                self.conn.send(("stop", ()))
+                self.process.join(timeout=5)
+        self.conn.close()
+        _detach(self.engine)
+        self.inbox = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ShardedBot(Bot):
+    """Bot view that reads from shared memory and routes writes to its shard"""
+
+    __slots__ = ("shard",)
+
+    def update(self, player_visible, player_distance):
+        self.shard.call("update", self.slot, player_visible, player_distance)
+        return self.get_state_info()
+
+    def take_damage(self, damage):
+        self.shard.call("damage", self.slot, damage)
+
+    def heal(self, amount):
+        self.shard.call("heal", self.slot, amount)
+
+    def reset(self):
+        self.shard.call("reset", self.slot)
+
+
+class ShardedBotManager:
+    """
+    BotManager spread across worker processes
+
+    Each shard holds up to capacity_per_shard bots.  A bot's global handle
+    is shard_index * capacity_per_shard + slot, so update_all() takes
+    perception arrays of length handle_space, laid out shard by shard.
+    Reads (get_bot(...).get_state_info(), state arrays) never leave the API
+    process; create/update/damage/heal/reset/remove run in the owning
+    worker.  Use as a context manager, or call shutdown(), to stop the
+    workers and free the shared memory.
+    """
+
+    def __init__(self, shard_count=None, capacity_per_shard=1 << 18, start_method=None):
+        context = multiprocessing.get_context(start_method)
+        self.shard_count = shard_count or multiprocessing.cpu_count()
+        self.capacity_per_shard = capacity_per_shard
+        self.handle_space = self.shard_count * capacity_per_shard
+        self.shards = [_Shard(i, capacity_per_shard, context) for i in range(self.shard_count)]
+        self.bots = {}  # string alias -> ShardedBot
+        self.next_bot_id = 1
+        self._create_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def shutdown(self):
+        """Stop every worker and release the shared memory"""
+        shards, self.shards = self.shards, []
+        self.bots.clear()
+        for shard in shards:
+            shard.close()
+
+    def _broadcast(self, command, per_shard_args=None):
+        """
+        Send a command to every shard and collect the replies in shard order
+
+        All replies are drained before any error is raised, so a failing
+        shard cannot leave another shard's reply unread in its pipe.  Shard
+        locks are taken in shard order, so broadcasts can't deadlock.
+        """
+        with ExitStack() as held:
+            for shard in self.shards:
+                held.enter_context(shard.lock)
+            for index, shard in enumerate(self.shards):
+                shard.send(command, *(per_shard_args[index] if per_shard_args else ()))
+            results, error = [], None
+            for shard in self.shards:
+                try:
+                    results.append(shard.receive())
+                except ShardError as exc:
+                    error = error or exc
+        if error is not None:
+            raise error
+        return results
+
+    def _view(self, shard, slot, bot_id):
+        bot = ShardedBot.view(shard.engine, slot, bot_id)
+        bot.shard = shard
+        return bot
+
+    def _locate(self, handle):
+        shard_index, slot = divmod(handle, self.capacity_per_shard)
+        if not 0 <= shard_index < self.shard_count:
+            return None, None
+        return self.shards[shard_index], slot
+
+    def create_bot(self, initial_health=100):
+        """Create a new bot on the next shard (round robin)"""
+        with self._create_lock:
+            serial = self.next_bot_id
+            shard = self.shards[serial % self.shard_count]
+            slot = shard.call("create", initial_health)
+            # Only a bot the shard actually created uses up an ID
+            self.next_bot_id = serial + 1
+            bot_id = f"bot_{serial}"
+            self.bots[bot_id] = self._view(shard, slot, bot_id)
+        return bot_id
+
+    def create_handles(self, count, initial_health=100):
+        """
+        Create many unaliased bots, spread evenly and created in parallel
+
+        Returns:
+            numpy.ndarray: Global handles of the new bots
+        """
+        per_shard = [count // self.shard_count + (i < count % self.shard_count)
+                     for i in range(self.shard_count)]
+        results = self._broadcast(
+            "create_many", [(shard_count, initial_health) for shard_count in per_shard])
+        return np.concatenate([np.asarray(slots, dtype=np.int64) + index * self.capacity_per_shard
+                               for index, slots in enumerate(results)])
+
+    def get_bot(self, bot_id):
+        """Get a bot by string alias or global integer handle"""
+        if type(bot_id) is int:
+            shard, slot = self._locate(bot_id)
+            if shard is None or not shard.engine.active[slot]:
+                return None
+            return self._view(shard, slot, bot_id)
+        return self.bots.get(bot_id)
+
+    def remove_bot(self, bot_id):
+        """Remove a bot"""
+        bot = self.get_bot(bot_id)
+        if bot is not None:
+            bot.shard.call("remove", bot.slot)
+            self.bots.pop(bot.bot_id, None)
+
+    def get_all_bots(self):
+        """Get all aliased bots"""
+        return self.bots
+
+    def bot_count(self):
+        """Number of live bots across all shards (read from shared memory)"""
+        return sum(int(np.count_nonzero(shard.engine.active)) for shard in self.shards)
+
+    def states(self):
+        """State codes of every handle, read from shared memory (inactive slots included)"""
+        return np.concatenate([shard.engine.state for shard in self.shards])
+
+    def update_all(self, visible_array, distance_array):
+        """
+        Step every bot, all shards in parallel
+
+        Perception is copied into each shard's shared inbox, then every
+        worker runs its vectorized update from there, stamping
+        perception_version for the bots whose input changed.
+
+        Args:
+            visible_array (array-like of bool): Visibility, indexed by global handle
+            distance_array (array-like of float): Distance, indexed by global handle
+
+        Returns:
+            int: Number of bots that changed state
+        """
+        visible = np.asarray(visible_array, dtype=np.bool_)
+        distance = np.asarray(distance_array, dtype=np.float64)
+        if visible.shape != (self.handle_space,) or distance.shape != (self.handle_space,):
+            raise ValueError(f"Expected perception arrays of length {self.handle_space}")
+
+        capacity = self.capacity_per_shard
+        for shard in self.shards:
+            start = shard.index * capacity
+            inbox_visible, inbox_distance = shard.inbox
+            inbox_visible[:] = visible[start:start + capacity]
+            inbox_distance[:] = distance[start:start + capacity]
+        return sum(self._broadcast("update_all"))
+
+    def submit_perception(self, bot_id, player_visible, player_distance):
+        """
+        Record new perception for a bot, to be evaluated on the next tick()
+
+        Returns:
+            bool: False if the bot does not exist
+        """
+        bot = self.get_bot(bot_id)
+        if bot is None:
+            return False
+        bot.shard.call("perceive", bot.slot, player_visible, player_distance)
+        return True
+
+    def tick(self):
+        """
+        Run an event-driven tick on every shard in parallel
+
+        Returns:
+            numpy.ndarray: Global handles of the bots that changed state
+        """
+        return np.concatenate([np.asarray(slots, dtype=np.int64) + index * self.capacity_per_shard
+                               for index, slots in enumerate(self._broadcast("tick"))])
+
+    def reset_all(self):
+        """Reset all bots"""
+        self._broadcast("reset_all")
@@ -0,0 +1,131 @@
+"""
+Inactivity expiry for the game server
+
+An ExpiryIndex holds one deadline per key and calls back when a key goes
+a whole timeout without being touched.  A touch only rewrites the key's
+deadline in a dict; the heap keeps at most one entry per key, which may
+be older than the real deadline.  When such an entry comes due the expiry
+thread finds the later deadline and pushes the entry back, so a key costs
+one heap operation per timeout period instead of one per touch, and keys
+still expire exactly on time.
+"""
+
+import heapq
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiryIndex:
+    """Deadline heap of key timeouts with lazy invalidation"""
+
+    def __init__(self, timeout, on_expire, clock=time.monotonic):
+        """
+        Args:
+            timeout (float): Seconds without a touch before a key expires
+            on_expire (callable): Called with each expired key, from the
+                expiry thread and without the index lock held; an
+                exception is logged and does not stop later expiries
+            clock (callable): Monotonic time source in seconds
+        """
+        if timeout <= 0:
+            raise ValueError("Timeout must be positive")
+        self.timeout = timeout
+        self.on_expire = on_expire
+        self.clock = clock
+        self.expired = 0
+        self._deadlines = {}  # key -> deadline
+        self._heap = []  # (deadline, key); at most one per key, never later than its deadline
+        self._queued = set()  # keys with a heap entry
+        self._changed = threading.Condition(threading.Lock())
+        self._stop = False
+        self._thread = None
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, key):
+        return key in self._deadlines
+
+    def touch(self, key):
+        """Push a key's deadline to a full timeout from now, adding it if new"""
+        deadline = self.clock() + self.timeout
+        with self._changed:
+            self._deadlines[key] = deadline
+            if key not in self._queued:
+                self._queued.add(key)
+                heapq.heappush(self._heap, (deadline, key))
+                if self._heap[0][1] == key:
+                    self._changed.notify()
+
+    def discard(self, key):
+        """Stop tracking a key (no-op if unknown); its heap entry is dropped when it comes due"""
+        with self._changed:
+            self._deadlines.pop(key, None)
+
+    def deadline(self, key):
+        """Clock time at which a key expires, or None"""
+        return self._deadlines.get(key)
+
+    def pop_expired(self, now=None):
+        """
+        Remove the keys whose deadline has passed
+
+        Returns:
+            list: Expired keys, soonest deadline first
+        """
+        if now is None:
+            now = self.clock()
+        expired = []
+        with self._changed:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                _, key = heap[0]
+                deadline = self._deadlines.get(key)
+                if deadline is None:
+                    # Discarded
+                    heapq.heappop(heap)
+                    self._queued.discard(key)
+                elif deadline > now:
+                    # Touched since this entry was pushed
+                    heapq.heapreplace(heap, (deadline, key))
+                else:
+                    heapq.heappop(heap)
+                    self._queued.discard(key)
+                    del self._deadlines[key]
+                    expired.append(key)
+        self.expired += len(expired)
+        return expired
+
+    def start(self):
+        """Expire keys from a background thread until stop()"""
+        if self._thread is None:
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._changed:
+            self._stop = True
+            self._changed.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._changed:
+                if self._stop:
+                    return
+                wait = self._heap[0][0] - self.clock() if self._heap else None
+                if wait is None or wait > 0:
+                    self._changed.wait(wait)
+                    continue
+            for key in self.pop_expired():
+                try:
+                    self.on_expire(key)
+                except Exception:
+                    logger.exception("Expiry callback failed for %r", key)
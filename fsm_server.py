@@ -1,16 +1,277 @@
 """
 Flask API Server for Bot FSM
-Provides REST endpoints for bot state management
+Provides REST endpoints for bot state management, plus a Socket.IO
+streaming channel (namespace /fsm) for pushing perception and receiving
+transitions without per-update HTTP overhead
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from bot_fsm import bot_manager, BotState
-import random
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from bot_fsm import bot_manager, Bot, BotState, SimulationLoop, STATES
+from bot_snapshot import SnapshotError, SnapshotWriter, restore_snapshot
+import bot_wire
+from metrics import CONTENT_TYPE, Metrics, instrument_flask, instrument_socketio
+import atexit
+import math
+import os
+import threading
+import zlib
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend communication
 
+# Streaming transport; see the SOCKET.IO STREAMING section below
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+STREAM_NAMESPACE = '/fsm'
+ALL_BOTS_ROOM = 'all'
+
+# Transitions remembered per bot for /history and /stats.  Off by default:
+# recording makes every /update that transitions noticeably slower
+HISTORY_SIZE = int(os.environ.get("FSM_HISTORY_SIZE", 0))
+if HISTORY_SIZE:
+    bot_manager.enable_history(HISTORY_SIZE)
+
+# Bots are saved here periodically and on shutdown, and restored on startup
+SNAPSHOT_PATH = os.environ.get("BOT_SNAPSHOT_PATH", "bots.snap")
+SNAPSHOT_INTERVAL = 30.0  # seconds
+
+# Largest number of records accepted by one /update_batch request or
+# streamed update message
+MAX_BATCH_SIZE = 10000
+
+# Stream subscribers: room -> sids, so transitions nobody listens to are
+# never serialized.  Handlers run on concurrent threads; changes to the
+# dict and its sets hold stream_lock
+stream_rooms = {}
+stream_lock = threading.Lock()
+
+# Server-side tick loop (see the SIMULATION LOOP section below); started on
+# launch when FSM_TICK_RATE (ticks per second) is set, or through POST /loop
+TICK_RATE = float(os.environ.get("FSM_TICK_RATE", 0))
+DEFAULT_TICK_RATE = 20.0
+MAX_TICK_RATE = 1000.0
+
+
+# ==========================================
+# HELPERS
+# ==========================================
+
+def _parse_update(item):
+    """
+    Validate one {bot_id, player_visible, player_distance} record
+
+    Returns:
+        tuple: ((bot_id, player_visible, player_distance), None) or
+               (bot_id or None, error message)
+    """
+    if not isinstance(item, dict):
+        return None, "Update must be an object"
+    bot_id = item.get('bot_id')
+    if not _is_bot_id(bot_id):
+        return None, "bot_id is required"
+    player_visible = item.get('player_visible', False)
+    player_distance = item.get('player_distance', float('inf'))
+    if not isinstance(player_visible, bool):
+        return bot_id, "player_visible must be true or false"
+    if isinstance(player_distance, bool) or not isinstance(player_distance, (int, float)):
+        return bot_id, "player_distance must be a number"
+    return (bot_id, player_visible, player_distance), None
+
+
+def _is_bot_id(value):
+    """
+    True for a usable bot ID: a non-empty string, or an integer handle
+    (0 included; bools are not handles)
+    """
+    return (isinstance(value, str) and value != "") or type(value) is int
+
+
+def _finite_number(value):
+    """True for a JSON number that is not a bool, NaN or infinite"""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value))
+
+
+def _parse_positions(positions):
+    """
+    Validate an {id: {x, y, z}} mapping
+
+    Returns:
+        list: (id, (x, y, z)) pairs, or None if any position is not an
+              object with finite numeric x, y and z
+    """
+    if not isinstance(positions, dict):
+        return None
+    parsed = []
+    for key, position in positions.items():
+        if not isinstance(position, dict):
+            return None
+        coordinates = tuple(position.get(axis) for axis in 'xyz')
+        if not all(_finite_number(value) for value in coordinates):
+            return None
+        parsed.append((key, coordinates))
+    return parsed
+
+
+def _positive_int(value):
+    """Parse a query-string integer >= 1, raising ValueError otherwise"""
+    number = int(value)
+    if number < 1:
+        raise ValueError(value)
+    return number
+
+
+def _cursor(value):
+    """Parse a query-string integer >= 0, raising ValueError otherwise"""
+    number = int(value)
+    if number < 0:
+        raise ValueError(value)
+    return number
+
+
+def wants_binary():
+    """
+    True if the Accept header prefers the bot_wire binary encoding
+
+    JSON wins ties, so clients that send no Accept header or */* keep
+    getting JSON.
+    """
+    return request.accept_mimetypes.best_match(
+        ['application/json', bot_wire.MEDIA_TYPE]) == bot_wire.MEDIA_TYPE
+
+
+def binary_response(payload):
+    """Wrap a bot_wire payload in a response"""
+    response = Response(payload, mimetype=bot_wire.MEDIA_TYPE)
+    response.vary.add('Accept')
+    return response
+
+
+def negotiated(response):
+    """Mark a JSON response from an endpoint that also speaks bot_wire"""
+    response.vary.add('Accept')
+    return response
+
+
+def _flag(name):
+    """True if a query parameter is set to 1/true/yes"""
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def make_etag(version, variant, query=None):
+    """
+    ETag for a representation built at a given bot_manager version
+
+    The manager's epoch keeps tags from another process or a previous
+    snapshot restore from matching.  `query` (any repr-able value) folds
+    the parsed query parameters into the tag, so different pages or
+    filters at the same version never share one.
+    """
+    if query is None:
+        return f"{bot_manager.epoch}-{version}-{variant}"
+    return f"{bot_manager.epoch}-{version}-{variant}-{zlib.crc32(repr(query).encode()):08x}"
+
+
+def not_modified(etag, weak):
+    """
+    304 response if If-None-Match already names this ETag, else None
+
+    Called before the payload is built, so an unchanged poll costs a
+    version lookup.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=weak)
+        response.vary.add('Accept')
+        return response
+    return None
+
+
+def tagged(response, etag, weak):
+    """Attach an ETag to a successful conditional-GET response"""
+    response.set_etag(etag, weak=weak)
+    response.vary.add('Accept')
+    return response
+
+
+def apply_updates(updates):
+    """
+    Apply a list of update records in one pass through bot_manager
+
+    Bad records get an error result instead of failing the batch, and
+    transitions are published to stream subscribers.
+
+    Returns:
+        list: One {"success": ...} result per record
+    """
+    results = [None] * len(updates)
+    valid = []
+    for index, item in enumerate(updates):
+        update, error = _parse_update(item)
+        if error:
+            results[index] = {"success": False, "bot_id": update, "error": error}
+        else:
+            valid.append((index, update))
+    
+    changed = []
+    states = bot_manager.update_batch((update for index, update in valid), changed)
+    for (index, (bot_id, _, _)), state_info in zip(valid, states):
+        if state_info is None:
+            results[index] = {"success": False, "bot_id": bot_id, "error": f"Bot '{bot_id}' not found"}
+        else:
+            results[index] = {"success": True, **state_info}
+    
+    publish_transitions(changed)
+    return results
+
+
+def publish_transitions(changed):
+    """
+    Push state info of bots that just transitioned to stream subscribers
+
+    Subscribers of every bot get one 'transitions' event per batch; bot
+    subscribers get the entries for their bot.
+    """
+    if not changed or not stream_rooms:
+        return
+    if stream_rooms.get(ALL_BOTS_ROOM):
+        socketio.emit('transitions', changed, namespace=STREAM_NAMESPACE, to=ALL_BOTS_ROOM)
+    for state_info in changed:
+        room = f"bot:{state_info['bot_id']}"
+        if stream_rooms.get(room):
+            socketio.emit('transitions', [state_info], namespace=STREAM_NAMESPACE, to=room)
+
+
+def publish_bots(changed):
+    """publish_transitions() for Bot views, serialized only if someone listens"""
+    if stream_rooms:
+        publish_transitions([bot.get_state_info() for bot in changed])
+
+
+simulation = SimulationLoop(bot_manager, TICK_RATE or DEFAULT_TICK_RATE, on_tick=publish_bots)
+simulation_lock = threading.Lock()
+
+
+def queue_perception(updates):
+    """
+    Record perception for the simulation loop's next tick
+
+    Returns:
+        tuple: (number queued, list of {"bot_id", "error"} for bad records)
+    """
+    queued = 0
+    failed = []
+    for item in updates:
+        update, error = _parse_update(item)
+        if error:
+            failed.append({"bot_id": update, "error": error})
+        elif bot_manager.submit_perception(*update):
+            queued += 1
+        else:
+            failed.append({"bot_id": update[0], "error": f"Bot '{update[0]}' not found"})
+    return queued, failed
+
 # ==========================================
 # API ENDPOINTS
 # ==========================================
@@ -24,12 +285,20 @@ def index():
         "endpoints": {
             "/create": "POST - Create a new bot",
             "/update": "POST - Update bot state",
+            "/update_batch": "POST - Update many bots in one request",
+            "/positions": "POST - Report bot/player positions; server computes perception",
+            "/perception": "POST - Queue perception for the server-side tick loop",
+            "/loop": "GET/POST - Tick loop statistics / start, stop or change rate",
             "/reset": "POST - Reset bot to idle state",
             "/damage": "POST - Apply damage to bot",
             "/heal": "POST - Heal bot",
             "/state": "GET - Get bot current state",
-            "/bots": "GET - Get all bots",
-            "/remove": "POST - Remove a bot"
+            "/bots": "GET - Get all bots (optional fields, state, limit, cursor)",
+            "/changes": "GET - Get bots changed since a version",
+            "/history": "GET - Get a bot's recent transitions",
+            "/stats": "GET - Get transition counts and time-in-state histograms",
+            "/remove": "POST - Remove a bot",
+            "/metrics": "GET - Prometheus metrics"
         }
     })
 
@@ -53,6 +322,11 @@ def create_bot():
     """
     data = request.get_json() or {}
     initial_health = data.get('initial_health', 100)
+    if not _finite_number(initial_health) or initial_health <= 0:
+        return jsonify({
+            "success": False,
+            "error": "initial_health must be a positive number"
+        }), 400
     
     bot_id = bot_manager.create_bot(initial_health)
     
@@ -86,6 +360,8 @@ def update_bot():
             "player_visible": true,
             "player_distance": 15.5
         }
+    
+    Send "Accept: application/x-bot-fsm" for the bot_wire binary encoding.
     """
     data = request.get_json()
     
@@ -97,30 +373,273 @@ def update_bot():
     
     bot_id = data.get('bot_id')
     
-    if not bot_id:
+    if not _is_bot_id(bot_id):
         return jsonify({
             "success": False,
             "error": "bot_id is required"
         }), 400
     
-    bot = bot_manager.get_bot(bot_id)
+    # Get player information
+    player_visible = data.get('player_visible', False)
+    player_distance = data.get('player_distance', float('inf'))
     
-    if not bot:
+    # Update bot state
+    def step(bot, now):
+        previous_state = bot.state
+        bot.engine.step(bot.slot, player_visible, player_distance, now)
+        return bot.state != previous_state
+    
+    result = bot_manager.modify(bot_id, step)
+    
+    if result is None:
         return jsonify({
             "success": False,
             "error": f"Bot '{bot_id}' not found"
         }), 404
     
-    # Get player information
-    player_visible = data.get('player_visible', False)
-    player_distance = data.get('player_distance', float('inf'))
+    transitioned, state_info = result
+    if transitioned:
+        publish_transitions([state_info])
     
-    # Update bot state
-    state_info = bot.update(player_visible, player_distance)
+    if wants_binary():
+        return binary_response(bot_wire.encode_results([state_info], bot_manager.version))
     
-    return jsonify({
+    return negotiated(jsonify({
         "success": True,
         **state_info
+    }))
+
+
+@app.route('/update_batch', methods=['POST'])
+def update_bots_batch():
+    """
+    Update many bots in one request
+    
+    Request body (or just the list itself):
+        {
+            "updates": [
+                {"bot_id": "bot_1", "player_visible": true, "player_distance": 15.5},
+                {"bot_id": "bot_2", "player_visible": false}
+            ]
+        }
+    
+    Every update is applied at the same instant, in order. A bad record
+    does not fail the batch; its result carries the error instead.
+    
+    Returns:
+        {
+            "success": true,
+            "updated": 1,
+            "failed": 1,
+            "results": [
+                {"success": true, "bot_id": "bot_1", "state": "chase", ...},
+                {"success": false, "bot_id": "bot_2", "error": "Bot 'bot_2' not found"}
+            ]
+        }
+    
+    Send "Accept: application/x-bot-fsm" for the bot_wire binary encoding.
+    """
+    data = request.get_json(silent=True)
+    updates = data.get('updates') if isinstance(data, dict) else data
+    
+    if not isinstance(updates, list):
+        return jsonify({
+            "success": False,
+            "error": "Expected a list of updates"
+        }), 400
+    
+    if len(updates) > MAX_BATCH_SIZE:
+        return jsonify({
+            "success": False,
+            "error": f"At most {MAX_BATCH_SIZE} updates per batch"
+        }), 413
+    
+    results = apply_updates(updates)
+    
+    if wants_binary():
+        return binary_response(bot_wire.encode_results(results, bot_manager.version))
+    
+    updated = sum(1 for result in results if result["success"])
+    
+    return negotiated(jsonify({
+        "success": True,
+        "updated": updated,
+        "failed": len(results) - updated,
+        "results": results
+    }))
+
+
+@app.route('/positions', methods=['POST'])
+def update_positions():
+    """
+    Report bot and player positions and let the server work out perception
+    
+    Request body:
+        {
+            "players": {"player_1": {"x": 0, "y": 0, "z": 12}},
+            "bots": {"bot_1": {"x": 5, "y": 0, "z": 0}},
+            "removed_players": ["player_2"]
+        }
+    
+    Every field is optional; positions not mentioned keep their last value.
+    Each bot's nearest-player distance and visibility are computed in bulk
+    and every bot that can transition is advanced.
+    
+    Returns:
+        {
+            "success": true,
+            "changed": [...],
+            "unknown_bots": []
+        }
+    """
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({
+            "success": False,
+            "error": "No data provided"
+        }), 400
+    
+    # Validate the whole payload before moving anything
+    removed = data.get('removed_players', [])
+    players = _parse_positions(data.get('players', {}))
+    bots = _parse_positions(data.get('bots', {}))
+    if (not isinstance(removed, list) or players is None or bots is None
+            or not all(isinstance(player_id, str) for player_id in removed)):
+        return jsonify({
+            "success": False,
+            "error": "Positions must be objects with finite numeric x, y and z"
+        }), 400
+    
+    for player_id in removed:
+        bot_manager.remove_player(player_id)
+    for player_id, position in players:
+        bot_manager.set_player_position(player_id, *position)
+    unknown_bots = [
+        bot_id for bot_id, position in bots
+        if not bot_manager.set_bot_position(bot_id, *position)
+    ]
+    
+    bot_manager.perceive_all()
+    changed = [bot.get_state_info() for bot in bot_manager.tick()]
+    publish_transitions(changed)
+    
+    return jsonify({
+        "success": True,
+        "changed": changed,
+        "unknown_bots": unknown_bots
+    })
+
+
+@app.route('/perception', methods=['POST'])
+def submit_perception():
+    """
+    Queue perception for bots without stepping them
+    
+    Request body (one record, a list, or {"updates": [...]}):
+        {"bot_id": "bot_1", "player_visible": true, "player_distance": 15.5}
+    
+    The simulation loop evaluates the bots on its next tick and publishes
+    transitions to /fsm stream subscribers.
+    
+    Returns:
+        {
+            "success": true,
+            "queued": 1,
+            "failed": [{"bot_id": "bot_9", "error": "Bot 'bot_9' not found"}],
+            "loop_running": true
+        }
+    """
+    data = request.get_json(silent=True)
+    updates = data.get('updates', [data]) if isinstance(data, dict) else data
+    
+    if not isinstance(updates, list):
+        return jsonify({
+            "success": False,
+            "error": "Expected an update or a list of updates"
+        }), 400
+    
+    if len(updates) > MAX_BATCH_SIZE:
+        return jsonify({
+            "success": False,
+            "error": f"At most {MAX_BATCH_SIZE} updates per request"
+        }), 413
+    
+    queued, failed = queue_perception(updates)
+    
+    return jsonify({
+        "success": True,
+        "queued": queued,
+        "failed": failed,
+        "loop_running": simulation.running
+    })
+
+
+@app.route('/loop', methods=['GET', 'POST'])
+def simulation_loop():
+    """
+    Inspect or control the server-side tick loop
+    
+    POST body (all optional):
+        {
+            "running": true,
+            "rate": 30
+        }
+    
+    Returns:
+        {
+            "success": true,
+            "running": true,
+            "rate": 30.0,
+            "budget_ms": 33.333,
+            "ticks": 1200,
+            "overruns": 0,
+            "skipped_ticks": 0,
+            "transitions": 57,
+            "last_tick_ms": 0.412,
+            "max_tick_ms": 3.108,
+            "mean_tick_ms": 0.391,
+            "errors": 0,
+            "last_error": null
+        }
+    
+    A tick that takes longer than budget_ms is an overrun; the ticks it
+    swallowed are skipped and counted in skipped_ticks. A tick that raises
+    is logged and counted in errors, and the loop keeps running.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        rate = data.get('rate')
+        running = data.get('running', simulation.running)
+        
+        if not isinstance(running, bool):
+            return jsonify({
+                "success": False,
+                "error": "running must be true or false"
+            }), 400
+        
+        if rate is not None and (isinstance(rate, bool) or not isinstance(rate, (int, float))
+                                 or not 0 < rate <= MAX_TICK_RATE):
+            return jsonify({
+                "success": False,
+                "error": f"rate must be a number between 0 and {MAX_TICK_RATE:g}"
+            }), 400
+        
+        with simulation_lock:
+            if rate is not None and rate != simulation.rate:
+                was_running = simulation.running
+                simulation.stop()
+                simulation.rate = float(rate)
+                if was_running:
+                    simulation.start()
+            if running:
+                simulation.start()
+            else:
+                simulation.stop()
+    
+    return jsonify({
+        "success": True,
+        **simulation.stats()
     })
 
 
@@ -159,26 +678,24 @@ def reset_bot():
     
     bot_id = data.get('bot_id')
     
-    if not bot_id:
+    if not _is_bot_id(bot_id):
         return jsonify({
             "success": False,
             "error": "bot_id is required"
         }), 400
     
-    bot = bot_manager.get_bot(bot_id)
+    result = bot_manager.modify(bot_id, lambda bot, now: bot.engine.reset(bot.slot, now))
     
-    if not bot:
+    if result is None:
         return jsonify({
             "success": False,
             "error": f"Bot '{bot_id}' not found"
         }), 404
     
-    bot.reset()
-    
     return jsonify({
         "success": True,
         "message": "Bot reset to idle state",
-        "state": bot.get_state_info()
+        "state": result[1]
     })
 
 
@@ -213,30 +730,34 @@ def damage_bot():
     bot_id = data.get('bot_id')
     damage = data.get('damage', 0)
     
-    if not bot_id:
+    if not _is_bot_id(bot_id):
         return jsonify({
             "success": False,
             "error": "bot_id is required"
         }), 400
     
-    bot = bot_manager.get_bot(bot_id)
+    def apply_damage(bot, now):
+        previous_health = bot.health
+        bot.engine.damage(bot.slot, damage)
+        return previous_health
     
-    if not bot:
+    result = bot_manager.modify(bot_id, apply_damage)
+    
+    if result is None:
         return jsonify({
             "success": False,
             "error": f"Bot '{bot_id}' not found"
         }), 404
     
-    previous_health = bot.health
-    bot.take_damage(damage)
+    previous_health, state_info = result
     
     return jsonify({
         "success": True,
         "message": "Damage applied",
         "previous_health": previous_health,
-        "current_health": bot.health,
+        "current_health": state_info["health"],
         "damage_dealt": damage,
-        "state": bot.get_state_info()
+        "state": state_info
     })
 
 
@@ -271,30 +792,34 @@ def heal_bot():
     bot_id = data.get('bot_id')
     amount = data.get('amount', 0)
     
-    if not bot_id:
+    if not _is_bot_id(bot_id):
         return jsonify({
             "success": False,
             "error": "bot_id is required"
         }), 400
     
-    bot = bot_manager.get_bot(bot_id)
+    def apply_heal(bot, now):
+        previous_health = bot.health
+        bot.engine.heal(bot.slot, amount)
+        return previous_health
     
-    if not bot:
+    result = bot_manager.modify(bot_id, apply_heal)
+    
+    if result is None:
         return jsonify({
             "success": False,
             "error": f"Bot '{bot_id}' not found"
         }), 404
     
-    previous_health = bot.health
-    bot.heal(amount)
+    previous_health, state_info = result
     
     return jsonify({
         "success": True,
         "message": "Bot healed",
         "previous_health": previous_health,
-        "current_health": bot.health,
+        "current_health": state_info["health"],
         "amount_healed": amount,
-        "state": bot.get_state_info()
+        "state": state_info
     })
 
 
@@ -305,12 +830,18 @@ def get_bot_state():
     
     Query parameters:
         bot_id: The bot ID
+        state_since: If true, report "state_since" (timestamp of the last
+            transition) instead of "time_in_state"
     
     Returns:
         {
             "success": true,
             "state": {...}
         }
+    
+    Responses carry an ETag; send it back as If-None-Match to get 304 Not
+    Modified while the bot is unchanged. The tag is weak unless
+    state_since is set, since time_in_state keeps growing.
     """
     bot_id = request.args.get('bot_id')
     
@@ -320,6 +851,20 @@ def get_bot_state():
             "error": "bot_id parameter is required"
         }), 400
     
+    version = bot_manager.bot_version(bot_id)
+    
+    if version is None:
+        return jsonify({
+            "success": False,
+            "error": f"Bot '{bot_id}' not found"
+        }), 404
+    
+    state_since = _flag('state_since')
+    etag = make_etag(version, 's' if state_since else 't')
+    cached = not_modified(etag, weak=not state_since)
+    if cached:
+        return cached
+    
     bot = bot_manager.get_bot(bot_id)
     
     if not bot:
@@ -328,10 +873,10 @@ def get_bot_state():
             "error": f"Bot '{bot_id}' not found"
         }), 404
     
-    return jsonify({
+    return tagged(jsonify({
         "success": True,
-        "state": bot.get_state_info()
-    })
+        "state": bot.get_state_info(state_since=state_since)
+    }), etag, weak=not state_since)
 
 
 @app.route('/bots', methods=['GET'])
@@ -339,19 +884,195 @@ def get_all_bots():
     """
     Get all bots and their states
     
+    Query parameters (all optional):
+        fields: Comma-separated state keys to include, e.g. "bot_id,state"
+        state: Comma-separated states to include, e.g. "chase,attack"
+        limit: Most bots to return in this page
+        cursor: next_cursor from the previous page
+        state_since: If true, report "state_since" (timestamp of the last
+            transition) instead of "time_in_state"
+    
     Returns:
         {
             "success": true,
             "bot_count": 5,
+            "version": 42,
+            "next_cursor": null,
             "bots": [...]
         }
+    
+    bot_count counts every bot matching the state filter, not just this
+    page. Bots come in creation order; next_cursor is null on the last page.
+    Send "Accept: application/x-bot-fsm" for the bot_wire binary encoding
+    (fixed layout, so fields and state_since are ignored).
+    
+    Responses carry an ETag that changes whenever any bot does, and
+    differs between queries (state, cursor, limit, fields); send it back
+    as If-None-Match to get 304 Not Modified. The tag is weak unless
+    state_since is set, since time_in_state keeps growing.
     """
-    bots = bot_manager.get_all_bots()
+    state_since = _flag('state_since')
+    fields = request.args.get('fields')
+    if fields is not None:
+        fields = [field for field in fields.split(',') if field]
+        known = Bot.STABLE_STATE_FIELDS if state_since else Bot.STATE_FIELDS
+        unknown = [field for field in fields if field not in known]
+        if unknown:
+            return jsonify({
+                "success": False,
+                "error": f"Unknown fields: {', '.join(unknown)}"
+            }), 400
+    
+    states = request.args.get('state')
+    if states is not None:
+        try:
+            states = [BotState(state) for state in states.split(',') if state]
+        except ValueError:
+            return jsonify({
+                "success": False,
+                "error": f"state must be one of: {', '.join(state.value for state in BotState)}"
+            }), 400
+    
+    try:
+        limit = request.args.get('limit')
+        limit = None if limit is None else _positive_int(limit)
+        cursor = _cursor(request.args.get('cursor', 0))
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "limit must be a positive integer and cursor a non-negative integer"
+        }), 400
+    
+    version = bot_manager.version
+    binary = wants_binary()
+    stable = state_since and not binary
+    etag = make_etag(version, 'b' if binary else 's' if state_since else 'j',
+                     (states, cursor, limit, None if binary else fields))
+    cached = not_modified(etag, weak=not stable)
+    if cached:
+        return cached
+    
+    page = bot_manager.query_bots(states, cursor, limit)
     
+    if binary:
+        return tagged(binary_response(bot_wire.encode_bots(
+            bot_manager, [bot.slot for bot in page["bots"]], page["total"], page["cursor"])),
+            etag, weak=True)
+    
+    return tagged(jsonify({
+        "success": True,
+        "bot_count": page["total"],
+        "version": version,
+        "next_cursor": page["cursor"],
+        "bots": [bot.get_state_info(fields, state_since) for bot in page["bots"]]
+    }), etag, weak=not stable)
+
+
+@app.route('/changes', methods=['GET'])
+def get_changed_bots():
+    """
+    Get only the bots that changed since a version
+
+    Query parameters:
+        since: Version from a previous /bots or /changes response (default 0)
+
+    Returns:
+        {
+            "success": true,
+            "version": 42,
+            "full": false,
+            "bots": [...],
+            "removed": ["bot_3"]
+        }
+
+    Pass the returned version as `since` on the next poll. When "full" is
+    true the client's cache is too old and "bots" holds every bot.
+    """
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "since must be an integer"
+        }), 400
+
+    changes = bot_manager.changes_since(since)
+
+    return jsonify({
+        "success": True,
+        "version": changes["version"],
+        "full": changes["full"],
+        "bots": [bot.get_state_info() for bot in changes["bots"]],
+        "removed": changes["removed"]
+    })
+
+
+@app.route('/history', methods=['GET'])
+def get_bot_history():
+    """
+    Get a bot's recent transitions, oldest first
+
+    Query parameters:
+        bot_id: The bot ID
+
+    Returns:
+        {
+            "success": true,
+            "bot_id": "bot_1",
+            "history": [
+                {"from": "idle", "to": "patrol", "reason": "Idle timer expired", "timestamp": 1700000000.0}
+            ]
+        }
+    """
+    bot_id = request.args.get('bot_id')
+
+    if not bot_id:
+        return jsonify({
+            "success": False,
+            "error": "bot_id parameter is required"
+        }), 400
+
+    history = bot_manager.get_history(bot_id)
+
+    if history is None:
+        return jsonify({
+            "success": False,
+            "error": f"Bot '{bot_id}' not found"
+        }), 404
+
+    return jsonify({
+        "success": True,
+        "bot_id": bot_id,
+        "history": history
+    })
+
+
+@app.route('/stats', methods=['GET'])
+def get_transition_stats():
+    """
+    Get transition statistics for all bots
+
+    Returns:
+        {
+            "success": true,
+            "transitions": {"idle": {"patrol": 12, "chase": 3}, ...},
+            "time_in_state": {
+                "idle": {"bucket_upper_bounds": [0.1, ..., null], "counts": [...], "total_seconds": 41.2},
+                ...
+            }
+        }
+    """
+    stats = bot_manager.transition_stats()
+
+    if stats is None:
+        return jsonify({
+            "success": False,
+            "error": "Transition history is disabled"
+        }), 404
+
     return jsonify({
         "success": True,
-        "bot_count": len(bots),
-        "bots": [bot.get_state_info() for bot in bots.values()]
+        **stats
     })
 
 
@@ -381,13 +1102,13 @@ def remove_bot():
     
     bot_id = data.get('bot_id')
     
-    if not bot_id:
+    if not _is_bot_id(bot_id):
         return jsonify({
             "success": False,
             "error": "bot_id is required"
         }), 400
     
-    if bot_id not in bot_manager.get_all_bots():
+    if not bot_manager.get_bot(bot_id):
         return jsonify({
             "success": False,
             "error": f"Bot '{bot_id}' not found"
@@ -401,6 +1122,142 @@ def remove_bot():
     })
 
 
+# ==========================================
+# SOCKET.IO STREAMING (namespace /fsm)
+# ==========================================
+
+@socketio.on('connect', namespace=STREAM_NAMESPACE)
+def stream_connect(auth=None):
+    """Greet a new stream client with the current version"""
+    emit('hello', {"version": bot_manager.version, "bot_count": len(bot_manager.bots)})
+
+
+@socketio.on('disconnect', namespace=STREAM_NAMESPACE)
+def stream_disconnect(*args):
+    """Forget the client's subscriptions"""
+    with stream_lock:
+        for room in list(stream_rooms):
+            sids = stream_rooms.get(room)
+            if sids is not None:
+                sids.discard(request.sid)
+                if not sids:
+                    del stream_rooms[room]
+
+
+@socketio.on('subscribe', namespace=STREAM_NAMESPACE)
+def stream_subscribe(data=None):
+    """
+    Receive 'transitions' events for some bots or for all of them
+    
+    Payload: {"bot_ids": ["bot_1", "bot_2"]} or {} for every bot
+    """
+    bot_ids = (data or {}).get('bot_ids') if isinstance(data, dict) else None
+    rooms = [f"bot:{bot_id}" for bot_id in bot_ids] if bot_ids else [ALL_BOTS_ROOM]
+    for room in rooms:
+        join_room(room)
+        with stream_lock:
+            stream_rooms.setdefault(room, set()).add(request.sid)
+    return {"success": True, "subscribed": len(rooms)}
+
+
+@socketio.on('unsubscribe', namespace=STREAM_NAMESPACE)
+def stream_unsubscribe(data=None):
+    """Undo subscribe() for the same payload"""
+    bot_ids = (data or {}).get('bot_ids') if isinstance(data, dict) else None
+    rooms = [f"bot:{bot_id}" for bot_id in bot_ids] if bot_ids else [ALL_BOTS_ROOM]
+    for room in rooms:
+        leave_room(room)
+        with stream_lock:
+            sids = stream_rooms.get(room)
+            if sids is not None:
+                sids.discard(request.sid)
+                if not sids:
+                    del stream_rooms[room]
+    return {"success": True}
+
+
+@socketio.on('update', namespace=STREAM_NAMESPACE)
+def stream_update(data):
+    """
+    Push perception for one bot or a list of bots
+    
+    Payload: one /update record or a list of them. The acknowledgement
+    carries the result (or list of results) in /update_batch format, and
+    transitions go out to subscribers as 'transitions' events.
+    """
+    if isinstance(data, list):
+        if len(data) > MAX_BATCH_SIZE:
+            return {"success": False, "error": f"At most {MAX_BATCH_SIZE} updates per message"}
+        return apply_updates(data)
+    return apply_updates([data])[0]
+
+
+@socketio.on('perceive', namespace=STREAM_NAMESPACE)
+def stream_perceive(data):
+    """
+    Queue perception for the simulation loop, like POST /perception
+    
+    Payload: one /update record or a list of them. Transitions arrive
+    later as 'transitions' events, once the loop has ticked.
+    """
+    updates = data if isinstance(data, list) else [data]
+    if len(updates) > MAX_BATCH_SIZE:
+        return {"success": False, "error": f"At most {MAX_BATCH_SIZE} updates per message"}
+    queued, failed = queue_perception(updates)
+    return {"success": True, "queued": queued, "failed": failed}
+
+
+# ==========================================
+# METRICS
+# ==========================================
+
+metrics = Metrics("fsm")
+
+
+@metrics.collector
+def fsm_metrics():
+    """Gauges read from bot_manager at scrape time"""
+    engine = bot_manager.engine
+    with stream_lock:
+        subscriptions = sum(len(sids) for sids in stream_rooms.values())
+    families = [
+        ("bots", "gauge", "Live bots by state",
+         [({"state": state.value}, len(engine.state_slots[code]))
+          for code, state in enumerate(STATES)]),
+        ("players", "gauge", "Players known to server-side perception",
+         [({}, len(bot_manager.players))]),
+        ("version", "gauge", "Global bot version", [({}, bot_manager.version)]),
+        ("stream_subscriptions", "gauge", "Socket.IO /fsm room subscriptions",
+         [({}, subscriptions)]),
+    ]
+    counts = engine.transition_counts()
+    families.append(("transitions_total", "counter", "Bot state transitions",
+                     [({"from": STATES[old].value, "to": STATES[new].value}, counts[old][new])
+                      for old in range(len(STATES)) for new in range(len(STATES))
+                      if counts[old][new]]))
+    loop = simulation.stats()
+    families += [
+        ("loop_running", "gauge", "1 while the simulation loop runs", [({}, int(loop["running"]))]),
+        ("loop_ticks_total", "counter", "Simulation loop ticks", [({}, loop["ticks"])]),
+        ("loop_overruns_total", "counter", "Ticks that overran their budget", [({}, loop["overruns"])]),
+        ("loop_errors_total", "counter", "Ticks that raised", [({}, loop["errors"])]),
+        ("loop_last_tick_seconds", "gauge", "Duration of the last tick",
+         [({}, loop["last_tick_ms"] / 1000)]),
+    ]
+    return families
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Request latency histograms, transition counts and bot gauges (Prometheus text)"""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+
+# Every route and Socket.IO handler is registered by now
+instrument_flask(app, metrics)
+instrument_socketio(socketio, metrics)
+
+
 # ==========================================
 # ERROR HANDLERS
 # ==========================================
@@ -434,13 +1291,34 @@ if __name__ == '__main__':
     print("API Documentation at: http://localhost:5001")
     print("=" * 50)
     
-    # Create some test bots on startup
-    print("\nCreating test bots...")
-    for i in range(3):
-        bot_id = bot_manager.create_bot()
-        print(f"  - Created {bot_id}")
+    restored = None
+    if os.path.exists(SNAPSHOT_PATH):
+        # Warm restart from the last snapshot; a failed restore leaves the
+        # manager untouched
+        try:
+            restored = restore_snapshot(bot_manager, SNAPSHOT_PATH)
+        except (SnapshotError, OSError, ValueError, IndexError) as exc:
+            print(f"\nCould not restore {SNAPSHOT_PATH} ({exc}); starting with fresh bots")
+        else:
+            print(f"\nRestored {restored} bots from {SNAPSHOT_PATH}")
+    if restored is None:
+        # Create some test bots on startup
+        print("\nCreating test bots...")
+        for i in range(3):
+            bot_id = bot_manager.create_bot()
+            print(f"  - Created {bot_id}")
     
     print(f"\nTotal bots: {len(bot_manager.get_all_bots())}")
     print("=" * 50)
     
-    app.run(debug=True, port=5001, host='0.0.0.0')
+    # With debug=True the reloader's parent process only watches files;
+    # snapshot from the process that actually serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        snapshot_writer = SnapshotWriter(bot_manager, SNAPSHOT_PATH, SNAPSHOT_INTERVAL).start()
+        atexit.register(snapshot_writer.stop)
+        if TICK_RATE:
+            simulation.start()
+            atexit.register(simulation.stop)
+            print(f"Simulation loop running at {TICK_RATE:g} ticks/s")
+    
+    socketio.run(app, debug=True, port=5001, host='0.0.0.0', allow_unsafe_werkzeug=True)
@@ -0,0 +1,100 @@
+"""
+Area-of-interest management for the game server
+
+Players are bucketed into a uniform grid of square cells over the arena's
+ground (x/z) plane.  A query visits only the cells overlapping the circle
+around a point, so finding who is near someone costs the local player
+density rather than the total player count.
+"""
+
+import math
+import threading
+
+
+class InterestGrid:
+    """Uniform grid of player positions for radius queries"""
+
+    def __init__(self, cell_size):
+        """
+        Args:
+            cell_size (float): Cell edge length; queries are cheapest when it
+                is close to the usual query radius
+        """
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive")
+        self.cell_size = float(cell_size)
+        self.positions = {}  # player_id -> (x, z)
+        self._cell_of = {}  # player_id -> (cx, cz)
+        self._cells = {}  # (cx, cz) -> set of player_ids
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, player_id):
+        return player_id in self.positions
+
+    def _cell(self, x, z):
+        return (math.floor(x / self.cell_size), math.floor(z / self.cell_size))
+
+    def move(self, player_id, x, z):
+        """Add or move a player; cells only change when a boundary is crossed"""
+        x, z = float(x), float(z)
+        cell = self._cell(x, z)
+        with self._lock:
+            self.positions[player_id] = (x, z)
+            old = self._cell_of.get(player_id)
+            if old == cell:
+                return
+            if old is not None:
+                self._discard(player_id, old)
+            self._cell_of[player_id] = cell
+            self._cells.setdefault(cell, set()).add(player_id)
+
+    def remove(self, player_id):
+        """Remove a player (no-op if unknown)"""
+        with self._lock:
+            self.positions.pop(player_id, None)
+            cell = self._cell_of.pop(player_id, None)
+            if cell is not None:
+                self._discard(player_id, cell)
+
+    def _discard(self, player_id, cell):
+        members = self._cells[cell]
+        members.discard(player_id)
+        if not members:
+            del self._cells[cell]
+
+    def near(self, x, z, radius):
+        """
+        Find the players within radius of a point
+
+        Args:
+            x, z (float): Ground-plane position
+            radius (float): Inclusive distance
+
+        Returns:
+            list: Player IDs, in no particular order
+        """
+        x, z = float(x), float(z)
+        low_x, low_z = self._cell(x - radius, z - radius)
+        high_x, high_z = self._cell(x + radius, z + radius)
+        limit = radius * radius
+        found = []
+        with self._lock:
+            positions = self.positions
+            for cx in range(low_x, high_x + 1):
+                for cz in range(low_z, high_z + 1):
+                    for player_id in self._cells.get((cx, cz), ()):
+                        px, pz = positions[player_id]
+                        if (px - x) ** 2 + (pz - z) ** 2 <= limit:
+                            found.append(player_id)
+        return found
+
+    def near_player(self, player_id, radius):
+        """Players within radius of another player, excluding them; [] if unknown"""
+        position = self.positions.get(player_id)
+        if position is None:
+            return []
+        return [other for other in self.near(position[0], position[1], radius)
+                if other != player_id]
@@ -3,8 +3,67 @@
 // Handles scene setup, game loop, and controls
 // ==========================================
 
-// Socket.IO connection to Flask backend
-const socket = io('http://localhost:5000');
+// Socket.IO connection to Flask backend; movement arrives as binary deltas
+const socket = io('http://localhost:5000', { auth: { movement: 'binary' } });
+
+// Binary movement deltas from server.py (layout in movement_codec.py)
+const MOVEMENT_NEW = 1 << 6;
+const MOVEMENT_COMPONENTS = 6;
+const MOVEMENT_HISTORY = 64;
+const POSITION_SCALE = 100;
+const ANGLE_STEP = (2 * Math.PI) / 65536;
+const movementStates = new Map([[0, new Map()]]); // tick -> Map(netId -> values)
+const movementIds = new Map(); // netId -> player id
+const idDecoder = new TextDecoder();
+let lastSnapshotTick = 0;
+
+// Apply a 'world_delta' to the baseline it was encoded against; returns
+// the players in it as { id, position, rotation }
+function decodeWorldDelta(buffer) {
+    const view = new DataView(buffer);
+    const tick = view.getUint32(1, true);
+    const baseTick = view.getUint32(5, true);
+    const count = view.getUint16(9, true);
+    const state = new Map(movementStates.get(baseTick));
+    const moved = [];
+    let offset = 11;
+    for (let i = 0; i < count; i++) {
+        const netId = view.getUint16(offset, true);
+        const mask = view.getUint8(offset + 2);
+        offset += 3;
+        let values;
+        if (mask & MOVEMENT_NEW) {
+            const length = view.getUint8(offset);
+            movementIds.set(netId, idDecoder.decode(new Uint8Array(buffer, offset + 1, length)));
+            offset += 1 + length;
+            values = new Array(MOVEMENT_COMPONENTS).fill(0);
+        } else {
+            values = state.get(netId).slice();
+        }
+        for (let c = 0; c < MOVEMENT_COMPONENTS; c++) {
+            if (mask & (1 << c)) {
+                values[c] = c < 3 ? view.getInt16(offset, true) : view.getUint16(offset, true);
+                offset += 2;
+            }
+        }
+        state.set(netId, values);
+        moved.push({
+            id: movementIds.get(netId),
+            position: { x: values[0] / POSITION_SCALE, y: values[1] / POSITION_SCALE, z: values[2] / POSITION_SCALE },
+            rotation: { x: values[3] * ANGLE_STEP, y: values[4] * ANGLE_STEP, z: values[5] * ANGLE_STEP }
+        });
+    }
+
+    // The server never encodes against a tick older than baseTick again
+    movementStates.set(tick, state);
+    for (const old of movementStates.keys()) {
+        if (old !== baseTick && (old < baseTick || old <= tick - MOVEMENT_HISTORY)) {
+            movementStates.delete(old);
+        }
+    }
+    lastSnapshotTick = tick;
+    return moved;
+}
 
 class Game {
     constructor() {
@@ -163,7 +222,7 @@ class Game {
         });
         
         // Player moved
-        socket.on('player_moved', (data) => {
+        const applyMovement = (data) => {
             const player = this.remotePlayers[data.id];
             if (player && player.isAlive) {
                 // Smooth interpolation
@@ -172,6 +231,18 @@ class Game {
                 player.rotation.y = data.rotation.y;
                 player.group.rotation.y = data.rotation.y;
             }
+        };
+        socket.on('player_moved', applyMovement);
+        
+        // Nearby players who moved since the last server tick, plus far ones
+        // every few ticks
+        socket.on('world_snapshot', (snapshot) => {
+            snapshot.players.forEach(applyMovement);
+        });
+        
+        // The same, quantized and delta-compressed; acknowledged in player_update
+        socket.on('world_delta', (buffer) => {
+            decodeWorldDelta(buffer).forEach(applyMovement);
         });
         
         // Player shot
@@ -243,12 +314,10 @@ class Game {
             }
         });
         
-        // Player disconnected
-        socket.on('player_disconnected', (data) => {
-            console.log('Player disconnected:', data.id);
-            
-            if (this.remotePlayers[data.id]) {
-                const player = this.remotePlayers[data.id];
+        // Player disconnected (or left our room)
+        const removeRemotePlayer = (id) => {
+            if (this.remotePlayers[id]) {
+                const player = this.remotePlayers[id];
                 if (player.group.parent) {
                     this.scene.remove(player.group);
                 }
@@ -259,8 +328,22 @@ class Game {
                     this.players.splice(index, 1);
                 }
                 
-                delete this.remotePlayers[data.id];
+                delete this.remotePlayers[id];
             }
+        };
+        socket.on('player_disconnected', (data) => {
+            console.log('Player disconnected:', data.id);
+            removeRemotePlayer(data.id);
+        });
+        
+        // Moved to another room; its players follow in current_players
+        socket.on('room_joined', (room) => {
+            console.log(`Joined ${room.name} (${room.players}/${room.capacity})`);
+            Object.keys(this.remotePlayers).forEach(removeRemotePlayer);
+        });
+        
+        socket.on('room_error', (data) => {
+            console.warn('Room error:', data.error, data.roomId || '');
         });
         
         // Send updates to server periodically
@@ -276,7 +359,8 @@ class Game {
                         x: this.localPlayer.rotation.x,
                         y: this.localPlayer.rotation.y,
                         z: this.localPlayer.rotation.z
-                    }
+                    },
+                    ack: lastSnapshotTick
                 });
             }
         }, 50); // 20 updates per second
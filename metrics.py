@@ -0,0 +1,209 @@
+"""
+Low-overhead runtime metrics for the game servers
+
+A Metrics registry holds fixed-bucket latency histograms and counters,
+plus collectors that read gauges (bot counts, players, FSM transition
+counts) only when /metrics is scraped, so the hot paths pay for a bisect
+and a few additions under an uncontended lock.  render() produces the
+Prometheus text exposition format.
+
+Flask routes are timed with before/after request hooks; Socket.IO events
+by wrapping the handlers already registered on the server, so call
+instrument_socketio() after the last @socketio.on.
+"""
+
+import bisect
+import threading
+import time
+from functools import wraps
+
+from flask import g, request
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    """Fixed-bucket histogram with preallocated counts"""
+
+    __slots__ = ("bounds", "counts", "total", "_lock")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket is +Inf
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+
+    def snapshot(self):
+        """(per-bucket counts, sum of observed values)"""
+        with self._lock:
+            return list(self.counts), self.total
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Registry of histograms, counters and scrape-time gauges"""
+
+    def __init__(self, prefix):
+        """
+        Args:
+            prefix (str): Prepended to every metric name, e.g. "fsm"
+        """
+        self.prefix = prefix
+        self._help = {}  # name -> (type, help)
+        self._histograms = {}  # name -> {label values tuple: (labels, Histogram)}
+        self._counters = {}  # name -> {label values tuple: [labels, value]}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _family(self, name, kind, help_text):
+        name = f"{self.prefix}_{name}"
+        if name not in self._help:
+            self._help[name] = (kind, help_text)
+        return name
+
+    def histogram(self, name, help_text, **labels):
+        """
+        Get (creating on first use) the histogram for one label set
+
+        Callers on hot paths should keep the returned object rather than
+        looking it up per observation.
+        """
+        name = self._family(name, "histogram", help_text)
+        key = tuple(labels.values())
+        series = self._histograms.setdefault(name, {})
+        entry = series.get(key)
+        if entry is None:
+            with self._lock:
+                entry = series.setdefault(key, (labels, Histogram()))
+        return entry[1]
+
+    def inc(self, name, help_text, amount=1, **labels):
+        """Add to a counter"""
+        name = self._family(name, "counter", help_text)
+        key = tuple(labels.values())
+        with self._lock:
+            entry = self._counters.setdefault(name, {}).get(key)
+            if entry is None:
+                entry = self._counters[name][key] = [labels, 0]
+            entry[1] += amount
+
+    def collector(self, function):
+        """
+        Register a function called on every scrape
+
+        It returns (name, type, help, samples) families, where samples is
+        a list of (labels dict, value); names get the registry prefix.
+        Usable as a decorator.
+        """
+        self._collectors.append(function)
+        return function
+
+    def render(self):
+        """All metrics in Prometheus text format"""
+        lines = []
+        for name, series in list(self._histograms.items()):
+            kind, help_text = self._help[name]
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for labels, histogram in list(series.values()):
+                counts, total = histogram.snapshot()
+                cumulative = 0
+                for bound, count in zip(histogram.bounds + (float("inf"),), counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        with self._lock:
+            counters = [(name, [tuple(entry) for entry in series.values()])
+                        for name, series in self._counters.items()]
+        for name, samples in counters:
+            kind, help_text = self._help[name]
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples]
+        for collect in self._collectors:
+            for name, kind, help_text, samples in collect():
+                name = f"{self.prefix}_{name}"
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+def instrument_flask(app, metrics):
+    """
+    Time every Flask request and count responses by status
+
+    Histograms for the app's routes are created up front, labelled by the
+    route pattern (not the raw path) and method.
+    """
+    help_text = "Flask request latency by route"
+    for rule in app.url_map.iter_rules():
+        for method in rule.methods - {"HEAD", "OPTIONS"}:
+            metrics.histogram("http_request_duration_seconds", help_text,
+                              route=rule.rule, method=method)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_latency(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else "<unmatched>"
+            metrics.histogram("http_request_duration_seconds", help_text,
+                              route=route, method=request.method).observe(
+                time.perf_counter() - start)
+            metrics.inc("http_responses_total", "Flask responses by route and status",
+                        route=route, method=request.method, status=response.status_code)
+        return response
+
+
+def instrument_socketio(socketio, metrics):
+    """
+    Time every Socket.IO event handler registered so far
+
+    Handlers are wrapped in place on the underlying python-socketio
+    server, labelled by namespace and event.
+    """
+    help_text = "Socket.IO event handler latency"
+    for namespace, handlers in socketio.server.handlers.items():
+        for event, handler in list(handlers.items()):
+            if getattr(handler, "instrumented", False):
+                continue
+            histogram = metrics.histogram("socketio_event_duration_seconds", help_text,
+                                          namespace=namespace, event=event)
+            handlers[event] = _timed(handler, histogram)
+
+
+def _timed(handler, histogram):
+    @wraps(handler)
+    def timed(*args):
+        start = time.perf_counter()
+        try:
+            return handler(*args)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    timed.instrumented = True
+    return timed
@@ -0,0 +1,263 @@
+"""
+Quantized, delta-compressed player movement for the game server
+
+Positions are sent as 16-bit fixed point (1/100 unit, so +-327 units) and
+angles as 16-bit fractions of a turn.  Each client gets its own payload,
+holding only the components that changed since the last snapshot it
+acknowledged; a player the client has no acknowledged state for (a new
+joiner, or one it has never been sent) goes in full, with its socket ID.
+Clients acknowledge by sending the last tick they decoded, and keep the
+decoded state per tick so a delta can be applied to the same baseline the
+server encoded it against.
+
+Payload (little-endian):
+
+    header  version u8, tick u32, baseline tick u32 (0: none), count u16
+    entry   net ID u16, component mask u8,
+            [ID length u8, socket ID utf-8]   if mask & NEW
+            one i16/u16 per set component     x, y, z, then rx, ry, rz
+"""
+
+import math
+import struct
+import threading
+
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<BIIH")
+_ENTRY = struct.Struct("<HB")
+_POSITION = struct.Struct("<h")
+_ANGLE = struct.Struct("<H")
+_LENGTH = struct.Struct("<B")
+
+POSITION_SCALE = 100  # fixed-point steps per world unit
+ANGLE_STEPS = 1 << 16  # per full turn
+
+# Component mask bits; positions are the low three, angles the next three
+COMPONENTS = 6
+ALL_COMPONENTS = (1 << COMPONENTS) - 1
+NEW = 1 << 6
+
+# Encoded ticks kept per client while waiting for an acknowledgement
+HISTORY = 64
+
+
+class CodecError(ValueError):
+    """Raised when a payload is truncated or has the wrong format"""
+
+
+# Inputs are clamped to this magnitude before scaling, so infinities still
+# round to a (saturated) fixed-point value
+_INPUT_LIMIT = 1e9
+
+
+def _component(vector, axis):
+    """One axis of a client-supplied vector as a finite float; 0 if unusable"""
+    try:
+        value = float(vector.get(axis, 0))
+    except (AttributeError, TypeError, ValueError):
+        return 0.0
+    if math.isnan(value):
+        return 0.0
+    return max(-_INPUT_LIMIT, min(_INPUT_LIMIT, value))
+
+
+def quantize(position, rotation):
+    """
+    Fixed-point (x, y, z, rx, ry, rz) for a position and rotation dict
+
+    Never raises: missing, non-numeric and NaN components become 0 and
+    out-of-range positions saturate, so one bad update cannot stop a
+    snapshot from being encoded.
+    """
+    values = []
+    for axis in "xyz":
+        step = round(_component(position, axis) * POSITION_SCALE)
+        values.append(max(-0x8000, min(0x7FFF, step)))
+    for axis in "xyz":
+        turns = _component(rotation, axis) / math.tau
+        values.append(round(turns * ANGLE_STEPS) % ANGLE_STEPS)
+    return tuple(values)
+
+
+def dequantize(values):
+    """(position, rotation) dicts for fixed-point values; angles in [0, 2pi)"""
+    x, y, z, rx, ry, rz = values
+    scale = POSITION_SCALE
+    turn = math.tau / ANGLE_STEPS
+    return ({"x": x / scale, "y": y / scale, "z": z / scale},
+            {"x": rx * turn, "y": ry * turn, "z": rz * turn})
+
+
+class _Client:
+    """A receiver's acknowledged baseline and unacknowledged snapshots"""
+
+    __slots__ = ("acked", "states")
+
+    def __init__(self):
+        self.acked = 0
+        self.states = {}  # tick -> {net ID: values} as the client will decode it
+
+
+class MovementCodec:
+    """Per-client delta encoder for player movement"""
+
+    def __init__(self, history=HISTORY):
+        """
+        Args:
+            history (int): Unacknowledged snapshots kept per client; acks
+                for older ones are ignored and the baseline stays put
+        """
+        self.history = history
+        self._clients = {}  # receiver sid -> _Client
+        self._net_ids = {}  # player sid -> net ID
+        self._next_net_id = 1
+        self._lock = threading.Lock()
+
+    def __contains__(self, sid):
+        return sid in self._clients
+
+    def add_client(self, sid):
+        """Start sending a receiver binary deltas; its first one is a full snapshot"""
+        with self._lock:
+            self._clients[sid] = _Client()
+
+    def remove(self, sid):
+        """Forget a player, both as a receiver and as a source of movement"""
+        with self._lock:
+            self._clients.pop(sid, None)
+            net_id = self._net_ids.pop(sid, None)
+            if net_id is None:
+                return
+            # Whoever is given this net ID next is sent in full to everyone
+            for client in self._clients.values():
+                for state in client.states.values():
+                    state.pop(net_id, None)
+
+    def acknowledge(self, sid, tick):
+        """Make a decoded snapshot the receiver's baseline"""
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is None or tick <= client.acked or tick not in client.states:
+                return
+            client.acked = tick
+            for old in [old for old in client.states if old < tick]:
+                del client.states[old]
+
+    def _net_id(self, sid):
+        net_id = self._net_ids.get(sid)
+        if net_id is None:
+            in_use = set(self._net_ids.values())
+            net_id = self._next_net_id
+            while net_id in in_use:
+                net_id = net_id % 0xFFFF + 1
+            self._next_net_id = net_id % 0xFFFF + 1
+            self._net_ids[sid] = net_id
+        return net_id
+
+    def encode(self, sid, tick, movements):
+        """
+        Encode movement for one receiver against its acknowledged baseline
+
+        Args:
+            sid (str): Receiver
+            tick (int): Snapshot tick, increasing and above 0
+            movements (list): {'id', 'position', 'rotation'} dicts
+
+        Returns:
+            bytes: The payload, or None when nothing changed for this receiver
+        """
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is None:
+                return None
+            baseline = client.states.get(client.acked, {})
+            state = dict(baseline)
+            parts = []
+            count = 0
+            for movement in movements:
+                player = movement["id"]
+                net_id = self._net_id(player)
+                values = quantize(movement["position"], movement["rotation"])
+                previous = baseline.get(net_id)
+                if previous is None:
+                    mask = ALL_COMPONENTS | NEW
+                else:
+                    mask = 0
+                    for component in range(COMPONENTS):
+                        if values[component] != previous[component]:
+                            mask |= 1 << component
+                    if not mask:
+                        continue
+                state[net_id] = values
+                count += 1
+                parts.append(_ENTRY.pack(net_id, mask))
+                if mask & NEW:
+                    encoded = player.encode("utf-8")
+                    parts.append(_LENGTH.pack(len(encoded)))
+                    parts.append(encoded)
+                for component in range(COMPONENTS):
+                    if mask & (1 << component):
+                        packer = _POSITION if component < 3 else _ANGLE
+                        parts.append(packer.pack(values[component]))
+            if not parts:
+                return None
+
+            client.states[tick] = state
+            if len(client.states) > self.history:
+                oldest = min(old for old in client.states if old != client.acked)
+                del client.states[oldest]
+            return HEADER.pack(FORMAT_VERSION, tick, client.acked, count) + b"".join(parts)
+
+
+class MovementDecoder:
+    """Client side of MovementCodec, for tests and benchmarks"""
+
+    def __init__(self):
+        self.states = {0: {}}  # tick -> {net ID: values}
+        self.ids = {}  # net ID -> player sid
+        self.last_tick = 0
+
+    def decode(self, payload):
+        """
+        Apply a payload
+
+        Returns:
+            list: (player sid, position, rotation) for each player in it
+        """
+        try:
+            version, tick, base, count = HEADER.unpack_from(payload)
+            if version != FORMAT_VERSION:
+                raise CodecError(f"Unsupported format version {version}")
+            if base not in self.states:
+                raise CodecError(f"Unknown baseline tick {base}")
+            state = dict(self.states[base])
+            offset = HEADER.size
+            moved = []
+            for _ in range(count):
+                net_id, mask = _ENTRY.unpack_from(payload, offset)
+                offset += _ENTRY.size
+                if mask & NEW:
+                    (length,) = _LENGTH.unpack_from(payload, offset)
+                    offset += _LENGTH.size
+                    self.ids[net_id] = payload[offset:offset + length].decode("utf-8")
+                    offset += length
+                    values = [0] * COMPONENTS
+                else:
+                    values = list(state[net_id])
+                for component in range(COMPONENTS):
+                    if mask & (1 << component):
+                        packer = _POSITION if component < 3 else _ANGLE
+                        (values[component],) = packer.unpack_from(payload, offset)
+                        offset += packer.size
+                state[net_id] = tuple(values)
+                moved.append((self.ids[net_id], *dequantize(values)))
+        except (struct.error, KeyError, UnicodeDecodeError) as e:
+            raise CodecError(f"Malformed movement payload: {e}") from e
+
+        self.states[tick] = state
+        for old in [old for old in self.states if old < base or old <= tick - HISTORY]:
+            if old != base:
+                del self.states[old]
+        self.last_tick = tick
+        return moved
@@ -1,11 +1,18 @@
 # Flask Backend Server for 3D Battleground Game
 # Handles real-time multiplayer with Socket.IO
 
-from flask import Flask, render_template, send_from_directory, request
-from flask_socketio import SocketIO, emit, join_room, leave_room
+from flask import Flask, Response, send_from_directory, request
+from flask_socketio import SocketIO, emit, join_room
 from flask_cors import CORS
+from metrics import CONTENT_TYPE, Metrics, instrument_flask, instrument_socketio
+from expiry import ExpiryIndex
+from interest import InterestGrid
+from movement_codec import MovementCodec
+import math
+import os
+import threading
 import time
-import json
+import traceback
 from datetime import datetime
 
 # Initialize Flask app
@@ -22,7 +29,45 @@ socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
 # Store connected players
 players = {}
+
+# Independent arenas: room ID -> {'id', 'name', 'capacity', 'public',
+# 'players' (sid -> player), 'interest'}.  Every connected player is in
+# exactly one room and only hears about that room.  New connections fill
+# the oldest public room with space; a room closes when its last player
+# leaves.
 game_rooms = {}
+MAX_ROOM_PLAYERS = int(os.environ.get('GAME_MAX_ROOM_PLAYERS', 16))
+rooms_lock = threading.RLock()
+room_counter = 0
+
+# Movement is sent as one 'world_snapshot' per tick holding every player that
+# moved since the last one, instead of a 'player_moved' per update to every
+# other client.  GAME_SNAPSHOT_RATE is in ticks per second; 0 goes back to
+# broadcasting each update as it arrives.
+SNAPSHOT_RATE = float(os.environ.get('GAME_SNAPSHOT_RATE', 20))
+
+# Clients only hear about players within INTEREST_RADIUS of them: movement
+# every tick, shots and animations as they happen.  Players further away
+# still arrive in every FAR_TIER_INTERVAL-th snapshot.  The arena is 100
+# units across; each room has its own grid.
+INTEREST_RADIUS = float(os.environ.get('GAME_INTEREST_RADIUS', 40))
+FAR_TIER_INTERVAL = int(os.environ.get('GAME_FAR_TIER_INTERVAL', 10))
+
+# sid -> latest {'id', 'position', 'rotation'} not yet sent in a snapshot,
+# to nearby clients and to far ones
+moved_players = {}
+far_moved_players = {}
+moved_lock = threading.Lock()
+snapshot_tick = 0
+
+# Players are removed once they go INACTIVITY_TIMEOUT seconds without a
+# player_update; see expire_player() below
+INACTIVITY_TIMEOUT = float(os.environ.get('GAME_INACTIVITY_TIMEOUT', 60))
+
+# Clients that connect with auth {'movement': 'binary'} get 'world_delta'
+# payloads (quantized, delta-compressed; see movement_codec.py) instead of
+# JSON world snapshots, and acknowledge them with 'ack' in player_update
+movement_codec = MovementCodec()
 
 # ==========================================
 # FLASK ROUTES
@@ -38,6 +83,136 @@ def serve_static(path):
     """Serve static files"""
     return send_from_directory('.', path)
 
+# ==========================================
+# ROOMS
+# ==========================================
+
+def create_room(name=None, capacity=None, public=False):
+    """Open an empty room; capacity is clamped to 1..MAX_ROOM_PLAYERS"""
+    global room_counter
+    if capacity is None:
+        capacity = MAX_ROOM_PLAYERS
+    with rooms_lock:
+        room_counter += 1
+        room_id = f'room_{room_counter}'
+        room = game_rooms[room_id] = {
+            'id': room_id,
+            'name': name or f'Arena {room_counter}',
+            'capacity': max(1, min(MAX_ROOM_PLAYERS, capacity)),
+            'public': public,
+            'players': {},
+            'interest': InterestGrid(INTEREST_RADIUS),
+            'created': time.time()
+        }
+    return room
+
+def room_summary(room):
+    """JSON-safe description of a room"""
+    return {
+        'id': room['id'],
+        'name': room['name'],
+        'players': len(room['players']),
+        'capacity': room['capacity'],
+        'public': room['public']
+    }
+
+def list_rooms():
+    """Summaries of every open room"""
+    with rooms_lock:
+        return [room_summary(room) for room in game_rooms.values()]
+
+def room_of(sid):
+    """The room a player is in, or None"""
+    player = players.get(sid)
+    return game_rooms.get(player['room']) if player else None
+
+def claim_seat(sid, room):
+    """
+    Move a player into a room if it is still open and has space
+
+    The caller joins the Socket.IO room and notifies both rooms.  Returns
+    the ID of the room the player left (None if it was in none), or False
+    when the room is full or closed.
+    """
+    with rooms_lock:
+        if game_rooms.get(room['id']) is not room:
+            return False
+        if sid in room['players']:
+            return None
+        if len(room['players']) >= room['capacity']:
+            return False
+        old_room = exit_room(sid)
+        room['players'][sid] = players[sid]
+        players[sid]['room'] = room['id']
+        position = players[sid]['position']
+        room['interest'].move(sid, position.get('x', 0), position.get('z', 0))
+        return old_room
+
+def matchmake(sid, exclude=None):
+    """Seat a player in the oldest public room with space, opening one if needed"""
+    with rooms_lock:
+        for room in list(game_rooms.values()):
+            if room['public'] and room['id'] != exclude:
+                old_room = claim_seat(sid, room)
+                if old_room is not False:
+                    return room, old_room
+        room = create_room(public=True)
+        return room, claim_seat(sid, room)
+
+def exit_room(sid):
+    """Take a player out of its room, closing the room if that emptied it; returns its ID"""
+    with rooms_lock:
+        room = room_of(sid)
+        if room is None:
+            return None
+        players[sid]['room'] = None
+        room['players'].pop(sid, None)
+        room['interest'].remove(sid)
+        if not room['players']:
+            del game_rooms[room['id']]
+            print(f"Room closed: {room['id']}")
+    # Works outside a request too (the expiry thread)
+    socketio.server.leave_room(sid, room['id'], namespace='/')
+    return room['id']
+
+def enter_room(room, old_room):
+    """Finish moving request.sid into room after claim_seat()"""
+    sid = request.sid
+    if old_room:
+        emit('player_disconnected', {'id': sid}, to=old_room)
+    join_room(room['id'])
+    
+    # Send the room's current players to the new player
+    with rooms_lock:
+        summary = room_summary(room)
+        current = dict(room['players'])
+    emit('room_joined', summary)
+    emit('current_players', current)
+    
+    # Notify other players in the room about the new player
+    emit('new_player', players[sid], to=room['id'], include_self=False)
+
+def parse_vector(value, fallback):
+    """
+    Validate a client-supplied {'x', 'y', 'z'} dict
+
+    Missing axes keep the fallback's value.
+
+    Returns:
+        dict: The vector with every axis a finite number, or None if it is
+            not a dict or any axis is not
+    """
+    if not isinstance(value, dict):
+        return None
+    vector = {}
+    for axis in 'xyz':
+        number = value.get(axis, fallback.get(axis, 0))
+        if (isinstance(number, bool) or not isinstance(number, (int, float))
+                or not math.isfinite(number)):
+            return None
+        vector[axis] = number
+    return vector
+
 # ==========================================
 # SOCKET.IO EVENTS
 # ==========================================
@@ -48,8 +223,8 @@ def handle_connect(auth):
     sid = request.sid
     print(f'Player connected: {sid}')
     
-    # Send current players to the new player
-    emit('current_players', players)
+    if auth and auth.get('movement') == 'binary':
+        movement_codec.add_client(sid)
     
     # Initialize new player data
     players[sid] = {
@@ -62,13 +237,15 @@ def handle_connect(auth):
         'kills': 0,
         'deaths': 0,
         'isAlive': True,
+        'room': None,
         'lastUpdate': time.time()
     }
+    inactivity.touch(sid)
     
-    # Notify other players about new player
-    emit('new_player', players[sid], broadcast=True, include_self=False)
+    room, _ = matchmake(sid)
+    enter_room(room, None)
     
-    print(f'Total players: {len(players)}')
+    print(f"Total players: {len(players)} ({room['id']}: {len(room['players'])})")
 
 @socketio.on('disconnect')
 def handle_disconnect():
@@ -76,39 +253,115 @@ def handle_disconnect():
     sid = request.sid
     if sid in players:
         print(f'Player disconnected: {sid}')
-        del players[sid]
+        room_id = forget_player(sid)
         
         # Notify others
-        emit('player_disconnected', {'id': sid}, broadcast=True)
+        if room_id:
+            emit('player_disconnected', {'id': sid}, to=room_id)
         print(f'Remaining players: {len(players)}')
 
+@socketio.on('list_rooms')
+def handle_list_rooms():
+    """Send the open rooms"""
+    emit('room_list', {'rooms': list_rooms(), 'maxPlayers': MAX_ROOM_PLAYERS})
+
+@socketio.on('create_room')
+def handle_create_room(data=None):
+    """Open a new room and move the player into it"""
+    data = data or {}
+    if request.sid not in players:
+        return
+    try:
+        capacity = int(data.get('capacity', MAX_ROOM_PLAYERS))
+    except (TypeError, ValueError):
+        emit('room_error', {'error': 'capacity must be an integer'})
+        return
+    room = create_room(str(data.get('name', ''))[:40] or None, capacity, bool(data.get('public', False)))
+    old_room = claim_seat(request.sid, room)
+    if old_room is False:
+        emit('room_error', {'error': 'Room closed', 'roomId': room['id']})
+        return
+    print(f"Room created: {room['id']} by {request.sid}")
+    enter_room(room, old_room)
+
+@socketio.on('join_room')
+def handle_join_room(data):
+    """Move the player into an existing room"""
+    room_id = (data or {}).get('roomId')
+    if request.sid not in players:
+        return
+    room = game_rooms.get(room_id)
+    if room is None:
+        emit('room_error', {'error': 'Room not found', 'roomId': room_id})
+        return
+    old_room = claim_seat(request.sid, room)
+    if old_room is False:
+        emit('room_error', {'error': 'Room is full', 'roomId': room_id})
+        return
+    enter_room(room, old_room)
+
+@socketio.on('leave_room')
+def handle_leave_room():
+    """Leave the current room for another public one"""
+    if request.sid not in players:
+        return
+    current = players[request.sid]['room']
+    room, old_room = matchmake(request.sid, exclude=current)
+    enter_room(room, old_room)
+
 @socketio.on('player_update')
 def handle_player_update(data):
     """Handle player position and rotation updates"""
-    if request.sid in players:
+    sid = request.sid
+    if sid in players and isinstance(data, dict):
+        # Drop updates with a malformed position or rotation outright
+        position = parse_vector(data.get('position', players[sid]['position']),
+                                players[sid]['position'])
+        rotation = parse_vector(data.get('rotation', players[sid]['rotation']),
+                                players[sid]['rotation'])
+        if position is None or rotation is None:
+            return
+        
         # Update player data
-        players[request.sid]['position'] = data.get('position', players[request.sid]['position'])
-        players[request.sid]['rotation'] = data.get('rotation', players[request.sid]['rotation'])
-        players[request.sid]['lastUpdate'] = time.time()
+        players[sid]['position'] = position
+        players[sid]['rotation'] = rotation
+        players[sid]['lastUpdate'] = time.time()
+        inactivity.touch(sid)
+        ack = data.get('ack')
+        if type(ack) is int:
+            movement_codec.acknowledge(sid, ack)
+        room = room_of(sid)
+        if room:
+            room['interest'].move(sid, position['x'], position['z'])
+        movement = {
+            'id': sid,
+            'position': position,
+            'rotation': rotation
+        }
         
-        # Broadcast to other players (exclude sender)
-        emit('player_moved', {
-            'id': request.sid,
-            'position': players[request.sid]['position'],
-            'rotation': players[request.sid]['rotation']
-        }, broadcast=True, include_self=False)
+        if SNAPSHOT_RATE:
+            # Sent with everyone else's on the next tick
+            with moved_lock:
+                moved_players[sid] = movement
+                far_moved_players[sid] = movement
+        elif room:
+            # Broadcast to other players in the room (exclude sender)
+            emit('player_moved', movement, to=room['id'], include_self=False)
 
 @socketio.on('player_shoot')
 def handle_player_shoot(data):
     """Handle player shooting"""
-    if request.sid in players and players[request.sid]['isAlive']:
-        # Broadcast bullet to all other players
-        emit('player_shot', {
-            'id': request.sid,
-            'position': data['position'],
-            'direction': data['direction'],
-            'timestamp': time.time()
-        }, broadcast=True, include_self=False)
+    room = room_of(request.sid)
+    if room and players[request.sid]['isAlive']:
+        # Send bullet to nearby players
+        nearby = room['interest'].near_player(request.sid, INTEREST_RADIUS)
+        if nearby:
+            emit('player_shot', {
+                'id': request.sid,
+                'position': data['position'],
+                'direction': data['direction'],
+                'timestamp': time.time()
+            }, to=nearby)
 
 @socketio.on('player_hit')
 def handle_player_hit(data):
@@ -116,8 +369,10 @@ def handle_player_hit(data):
     target_id = data.get('targetId')
     damage = data.get('damage', 10)
     attacker_id = request.sid
+    room = room_of(attacker_id)
     
-    if target_id in players and players[target_id]['isAlive']:
+    # Only players in the same room can hit each other
+    if room and target_id in room['players'] and players[target_id]['isAlive']:
         # Apply damage
         players[target_id]['health'] = max(0, players[target_id]['health'] - damage)
         
@@ -127,7 +382,7 @@ def handle_player_hit(data):
             'attackerId': attacker_id,
             'health': players[target_id]['health'],
             'damage': damage
-        }, broadcast=True)
+        }, to=room['id'])
         
         # Check for death
         if players[target_id]['health'] <= 0:
@@ -142,47 +397,60 @@ def handle_player_hit(data):
                 'victimId': target_id,
                 'killerId': attacker_id,
                 'killerKills': players[attacker_id]['kills'] if attacker_id in players else 0
-            }, broadcast=True)
+            }, to=room['id'])
             
             print(f'Player {target_id} killed by {attacker_id}')
 
 @socketio.on('player_respawn')
 def handle_player_respawn(data):
     """Handle player respawn"""
-    if request.sid in players:
-        # Reset player
+    room = room_of(request.sid)
+    if room:
+        # Reset player; a malformed spawn point falls back to the origin
+        origin = {'x': 0, 'y': 0, 'z': 0}
+        position = data.get('position', origin) if isinstance(data, dict) else origin
+        position = parse_vector(position, origin) or origin
         players[request.sid]['health'] = players[request.sid]['maxHealth']
         players[request.sid]['isAlive'] = True
-        players[request.sid]['position'] = data.get('position', {'x': 0, 'y': 0, 'z': 0})
+        players[request.sid]['position'] = position
+        room['interest'].move(request.sid, position['x'], position['z'])
         
-        # Notify all players
+        # Notify all players in the room
         emit('player_respawned', {
             'id': request.sid,
             'position': players[request.sid]['position'],
             'health': players[request.sid]['health']
-        }, broadcast=True)
+        }, to=room['id'])
         
         print(f'Player {request.sid} respawned')
 
 @socketio.on('get_leaderboard')
 def handle_get_leaderboard():
-    """Send current leaderboard"""
+    """Send the leaderboard of the player's room"""
+    room = room_of(request.sid)
+    if room is None:
+        return
+    
     # Sort players by kills
+    with rooms_lock:
+        room_players = list(room['players'].values())
     leaderboard = sorted(
-        players.values(),
+        room_players,
         key=lambda p: p['kills'],
         reverse=True
     )[:10]  # Top 10
     
     emit('leaderboard_update', {
+        'roomId': room['id'],
         'leaderboard': leaderboard,
-        'totalPlayers': len(players)
+        'totalPlayers': len(room_players)
     })
 
 @socketio.on('chat_message')
 def handle_chat_message(data):
     """Handle chat messages"""
-    if request.sid in players:
+    room = room_of(request.sid)
+    if room:
         message_data = {
             'playerId': request.sid,
             'playerName': players[request.sid]['name'],
@@ -190,45 +458,136 @@ def handle_chat_message(data):
             'timestamp': datetime.now().strftime('%H:%M:%S')
         }
         
-        # Broadcast to all players
-        emit('chat_message', message_data, broadcast=True)
+        # Broadcast to all players in the room
+        emit('chat_message', message_data, to=room['id'])
 
 @socketio.on('player_animation')
 def handle_player_animation(data):
     """Handle player animations (walking, jumping, etc.)"""
-    if request.sid in players:
-        emit('player_animation', {
-            'id': request.sid,
-            'animation': data.get('animation'),
-            'state': data.get('state')
-        }, broadcast=True, include_self=False)
+    room = room_of(request.sid)
+    if room:
+        # An empty `to` would broadcast to everyone
+        nearby = room['interest'].near_player(request.sid, INTEREST_RADIUS)
+        if nearby:
+            emit('player_animation', {
+                'id': request.sid,
+                'animation': data.get('animation'),
+                'state': data.get('state')
+            }, to=nearby)
 
 # ==========================================
 # BACKGROUND TASKS
 # ==========================================
 
-def cleanup_inactive_players():
-    """Remove players who haven't sent updates in a while"""
-    import threading
+def forget_player(sid):
+    """Drop a player from the game state and any pending snapshots; returns its room ID"""
+    room_id = exit_room(sid)
+    players.pop(sid, None)
+    inactivity.discard(sid)
+    movement_codec.remove(sid)
+    with moved_lock:
+        moved_players.pop(sid, None)
+        far_moved_players.pop(sid, None)
+    return room_id
+
+def broadcast_snapshot():
+    """
+    Send each client a 'world_snapshot' of the players that moved around it
+
+    A client gets the players in its room within INTEREST_RADIUS that moved
+    since the last tick, and on every FAR_TIER_INTERVAL-th tick everyone
+    else in the room that moved since the last far tick, so most ticks cost
+    the local density rather than the player count.  Returns the number of
+    snapshots sent.
+    """
+    global snapshot_tick
+    with moved_lock:
+        snapshot_tick += 1
+        tick = snapshot_tick
+        far = {}
+        if tick % FAR_TIER_INTERVAL == 0:
+            far = dict(far_moved_players)
+            far_moved_players.clear()
+        if not moved_players and not far:
+            return 0
+        moved = dict(moved_players)
+        moved_players.clear()
     
-    def cleanup():
+    with rooms_lock:
+        rooms = [(list(room['players']), room['interest']) for room in game_rooms.values()]
+    
+    timestamp = time.time()
+    sent = 0
+    for members, grid in rooms:
+        room_far = [(other, far[other]) for other in members if other in far]
+        for sid in members:
+            sent += send_snapshot(sid, tick, timestamp, grid, moved, room_far)
+    return sent
+
+def send_snapshot(sid, tick, timestamp, grid, moved, far):
+    """One client's part of broadcast_snapshot(); returns 1 if anything was sent"""
+    nearby = [other for other in grid.near_player(sid, INTEREST_RADIUS) if other in moved]
+    movements = [moved[other] for other in nearby]
+    if far:
+        # Also repeats nearby players who moved while out of range
+        sending = set(nearby)
+        sending.add(sid)
+        movements.extend(movement for other, movement in far if other not in sending)
+    if not movements:
+        return 0
+    if sid in movement_codec:
+        # None when nothing changed since the client's baseline
+        payload = movement_codec.encode(sid, tick, movements)
+        if not payload:
+            return 0
+        socketio.emit('world_delta', payload, to=sid)
+    else:
+        socketio.emit('world_snapshot', {
+            'tick': tick,
+            'timestamp': timestamp,
+            'players': movements
+        }, to=sid)
+    return 1
+
+def start_snapshot_loop():
+    """Broadcast world snapshots at SNAPSHOT_RATE ticks per second"""
+    def loop():
+        period = 1.0 / SNAPSHOT_RATE
+        deadline = time.perf_counter()
         while True:
-            time.sleep(30)  # Check every 30 seconds
-            current_time = time.time()
-            inactive_players = []
-            
-            for player_id, player_data in players.items():
-                if current_time - player_data['lastUpdate'] > 60:  # 60 seconds timeout
-                    inactive_players.append(player_id)
-            
-            for player_id in inactive_players:
-                print(f'Removing inactive player: {player_id}')
-                del players[player_id]
-                socketio.emit('player_disconnected', {'id': player_id})
+            try:
+                broadcast_snapshot()
+            except Exception:
+                # One bad tick must not stop movement for everyone
+                print('Snapshot broadcast failed:')
+                traceback.print_exc()
+            deadline += period
+            now = time.perf_counter()
+            if now > deadline:
+                # Overran; skip the missed ticks rather than bunching them
+                deadline += int((now - deadline) / period) * period
+            time.sleep(max(0.0, deadline - now))
     
-    thread = threading.Thread(target=cleanup, daemon=True)
+    thread = threading.Thread(target=loop, daemon=True)
     thread.start()
 
+def expire_player(sid):
+    """Remove a player whose inactivity timeout just passed"""
+    player = players.get(sid)
+    # A player_update may have landed after the index gave up on it
+    if player is None or time.time() - player['lastUpdate'] < INACTIVITY_TIMEOUT:
+        if player is not None:
+            inactivity.touch(sid)
+        return
+    print(f'Removing inactive player: {sid}')
+    room_id = forget_player(sid)
+    if room_id:
+        socketio.emit('player_disconnected', {'id': sid}, to=room_id)
+
+# Inactivity deadlines; touched on every player_update, and a player expires
+# the moment its timeout passes instead of on a periodic scan of `players`
+inactivity = ExpiryIndex(INACTIVITY_TIMEOUT, expire_player)
+
 # ==========================================
 # API ROUTES (Optional)
 # ==========================================
@@ -239,10 +598,25 @@ def get_stats():
     return {
         'totalPlayers': len(players),
         'players': list(players.values()),
+        'rooms': list_rooms(),
         'uptime': time.time(),
         'timestamp': datetime.now().isoformat()
     }
 
+@app.route('/api/rooms')
+def get_rooms():
+    """List open rooms"""
+    return {'rooms': list_rooms(), 'maxPlayers': MAX_ROOM_PLAYERS}
+
+@app.route('/api/rooms/<room_id>')
+def get_room(room_id):
+    """Get one room with its players"""
+    room = game_rooms.get(room_id)
+    if room is None:
+        return {'error': 'Room not found'}, 404
+    with rooms_lock:
+        return {**room_summary(room), 'playerList': list(room['players'].values())}
+
 @app.route('/api/player/<player_id>')
 def get_player(player_id):
     """Get specific player data"""
@@ -250,6 +624,32 @@ def get_player(player_id):
         return players[player_id]
     return {'error': 'Player not found'}, 404
 
+# ==========================================
+# METRICS
+# ==========================================
+
+metrics = Metrics('game')
+
+@metrics.collector
+def game_metrics():
+    """Player gauges read at scrape time"""
+    snapshot = list(players.values())
+    alive = sum(1 for player in snapshot if player['isAlive'])
+    return [
+        ('players', 'gauge', 'Connected players by status',
+         [({'status': 'alive'}, alive), ({'status': 'dead'}, len(snapshot) - alive)]),
+        ('rooms', 'gauge', 'Game rooms', [({}, len(game_rooms))]),
+    ]
+
+@app.route('/metrics')
+def get_metrics():
+    """Request and event latency histograms and player gauges (Prometheus text)"""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+# Every route and Socket.IO handler is registered by now
+instrument_flask(app, metrics)
+instrument_socketio(socketio, metrics)
+
 # ==========================================
 # ERROR HANDLERS
 # ==========================================
@@ -274,8 +674,13 @@ if __name__ == '__main__':
     print('Access game at: http://localhost:5000')
     print('=' * 50)
     
-    # Start cleanup thread
-    cleanup_inactive_players()
+    # Start removing inactive players
+    inactivity.start()
+    
+    # Start world snapshot broadcasts
+    if SNAPSHOT_RATE:
+        start_snapshot_loop()
+        print(f'World snapshots at {SNAPSHOT_RATE:g} ticks/s')
     
     # Run server
     socketio.run(
@@ -0,0 +1,239 @@
+"""
+Tests for BotManager bookkeeping that the HTTP demos don't exercise
+"""
+
+import time
+
+from bot_fsm import BotManager, BotState, SimulationLoop, TickClock
+
+
+def make_manager():
+    clock = TickClock(tick_seconds=0.5)
+    return BotManager(clock=clock)
+
+
+def test_changes_since_full_boundary():
+    """Tombstones are trimmed in batches; only versions before the kept ones go full"""
+    manager = make_manager()
+    manager.MAX_REMOVED_HISTORY = 3
+    bot_ids = [manager.create_bot() for _ in range(8)]
+    versions = []
+    for bot_id in bot_ids[:6]:
+        manager.remove_bot(bot_id)
+        versions.append(manager.version)
+
+    # Six tombstones fit in twice the limit, so nothing has been dropped yet
+    assert manager.changes_since(0)["full"] is False
+    assert manager.changes_since(0)["removed"] == bot_ids[:6]
+
+    # The seventh trims back down to the newest three
+    manager.remove_bot(bot_ids[6])
+    floor = versions[3]
+    assert manager.changes_since(floor - 1)["full"] is True
+    changes = manager.changes_since(floor)
+    assert changes["full"] is False
+    assert changes["removed"] == bot_ids[4:7]
+
+    # A full response lists every live bot so the client can rebuild
+    full = manager.changes_since(0)
+    assert full["full"] is True
+    assert [bot.bot_id for bot in full["bots"]] == [bot_ids[7]]
+    assert full["version"] == manager.version
+
+
+def test_changes_since_change_during_scan():
+    """A bot changed while changes_since scans is reported by the next poll"""
+    manager = make_manager()
+    first = manager.create_bot()
+    second = manager.create_bot()
+    engine = manager.engine
+    scan = engine.changed_since
+
+    def changed_since(version):
+        manager.get_bot(second).take_damage(10)
+        return scan(version)
+
+    engine.changed_since = changed_since
+    changes = manager.changes_since(0)
+    del engine.changed_since
+
+    assert changes["version"] < manager.bot_version(second)
+    assert first in [bot.bot_id for bot in changes["bots"]]
+    later = manager.changes_since(changes["version"])
+    assert [bot.bot_id for bot in later["bots"]] == [second]
+
+
+def test_tick_keeps_timer_across_heap_compaction():
+    """A timer re-armed by tick() survives a compaction triggered in the same tick"""
+    manager = make_manager()
+    waiting = manager.get_bot(manager.create_bot())
+    chasing = manager.get_bot(manager.create_bot())
+    chasing.update(True, 20.0)
+    assert chasing.state == BotState.CHASE
+    engine = manager.engine
+    engine.tick()
+
+    # Stale entries that the next schedule will compact away
+    for _ in range(2 * engine.size + 64):
+        engine.timers.append((float("inf"), waiting.slot, -1.0))
+
+    # At exactly the deadline the timer pops but the strict guard doesn't
+    # fire, so it is re-armed; chasing -> PATROL schedules and compacts
+    deadline = waiting.last_state_change + waiting.idle_timer
+    engine.perceive(chasing.slot, False, 20.0)
+    engine.tick(deadline)
+    assert chasing.state == BotState.PATROL
+    assert waiting.state == BotState.IDLE
+    assert (deadline, waiting.slot, waiting.last_state_change) in engine.timers
+
+    engine.tick(deadline + 0.01)
+    assert waiting.state == BotState.PATROL
+
+
+def test_modify_does_not_follow_a_reused_slot():
+    """A remove + create that reuses the slot between lookup and lock is not redirected"""
+    manager = make_manager()
+    old_id = manager.create_bot()
+    slot = manager.get_bot(old_id).slot
+    engine = manager.engine
+    new_ids = []
+
+    def racing_stripe(locked_slot):
+        # Runs after modify() resolved the ID, before it holds the stripe
+        del engine.stripe
+        manager.remove_bot(old_id)
+        new_ids.append(manager.create_bot())
+        return engine.stripe(locked_slot)
+
+    engine.stripe = racing_stripe
+    result = manager.modify(old_id, lambda bot, now: bot.engine.damage(bot.slot, 50))
+
+    new_bot = manager.get_bot(new_ids[0])
+    assert new_bot.slot == slot
+    assert result is None
+    assert new_bot.health == 100
+
+    previous, state_info = manager.modify(new_ids[0], lambda bot, now: bot.health)
+    assert previous == 100 and state_info["bot_id"] == new_ids[0]
+
+
+def test_simulation_loop_survives_failing_tick():
+    """A tick that raises is counted and the loop keeps ticking"""
+    manager = make_manager()
+    manager.create_bot()
+    failures = []
+
+    def on_tick(changed):
+        if not failures:
+            failures.append(changed)
+            raise RuntimeError("subscriber went away")
+
+    loop = SimulationLoop(manager, rate=200, on_tick=on_tick)
+    manager.get_bot("bot_1").take_damage(100)  # DEAD on the first tick
+    loop.start()
+    try:
+        deadline = time.monotonic() + 5
+        while loop.ticks < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        loop.stop()
+
+    stats = loop.stats()
+    assert stats["errors"] == 1
+    assert stats["last_error"] == "RuntimeError: subscriber went away"
+    assert stats["ticks"] >= 3
+
+
+def test_create_with_bad_health_leaves_no_bot():
+    """A failed allocation frees its slot and does not consume a bot ID"""
+    manager = make_manager()
+    manager.create_bot()
+    for health in ("lots", None):
+        try:
+            manager.create_bot(health)
+        except TypeError:
+            pass
+        else:
+            raise AssertionError(f"create_bot({health!r}) succeeded")
+    assert list(manager.bots) == ["bot_1"]
+    assert manager.create_bot() == "bot_2"
+
+
+def test_integer_handles_only_reach_handle_bots():
+    """A slot number never resolves to a bot created by create_bot()"""
+    manager = make_manager()
+    handle = manager.create_handle()
+    named = manager.create_bot()
+    assert handle == 0 and manager.get_bot(0).bot_id == 0
+    assert manager.get_bot(manager.get_bot(named).slot) is None
+
+
+def test_positions_must_be_finite_numbers():
+    manager = make_manager()
+    bot_id = manager.create_bot()
+    for bad in (float("nan"), float("inf"), "1", True, None):
+        for args in ((bad, 0, 0), (0, 0, bad)):
+            try:
+                manager.set_player_position("p1", *args)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"set_player_position accepted {args!r}")
+            try:
+                manager.set_bot_position(bot_id, *args)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"set_bot_position accepted {args!r}")
+    assert len(manager.players) == 0
+    visible, distance = manager.perceive_all()
+    assert not visible.any() and distance[manager.get_bot(bot_id).slot] == float("inf")
+
+
+def test_transition_counts_cover_per_bot_and_bulk_paths():
+    """Counted without history, from Bot.update as well as update_all"""
+    manager = make_manager()
+    first = manager.get_bot(manager.create_bot())
+    second = manager.get_bot(manager.create_bot())
+    first.update(True, 5.0)  # IDLE -> CHASE
+    size = manager.engine.size
+    visible = [True] * size
+    distance = [5.0] * size
+    manager.update_all(visible, distance)  # first CHASE -> ATTACK, second IDLE -> CHASE
+
+    counts = manager.engine.transition_counts()
+    idle, chase, attack = (list(BotState).index(state)
+                           for state in (BotState.IDLE, BotState.CHASE, BotState.ATTACK))
+    assert counts[idle][chase] == 2 and counts[chase][attack] == 1
+    assert sum(map(sum, counts)) == 3
+    assert second.state == BotState.CHASE
+
+
+def test_query_bots_pages_by_state_across_changes():
+    """A state-filtered cursor survives transitions and removals between pages"""
+    manager = make_manager()
+    for _ in range(6):
+        manager.create_bot()  # bot_1 .. bot_6
+    for bot_id in ("bot_2", "bot_4", "bot_5"):
+        manager.get_bot(bot_id).update(True, 5.0)  # IDLE -> CHASE
+
+    def page(states, after, limit):
+        result = manager.query_bots(states, after, limit)
+        return [bot.bot_id for bot in result["bots"]], result["total"], result["cursor"]
+
+    assert page([BotState.CHASE], 0, 2) == (["bot_2", "bot_4"], 3, 4)
+
+    manager.get_bot("bot_5").update(False, float("inf"))  # leaves CHASE
+    manager.get_bot("bot_6").update(True, 5.0)  # joins, after the cursor
+    manager.get_bot("bot_1").update(True, 5.0)  # joins, before the cursor
+    manager.remove_bot("bot_4")  # the cursor's own bot
+    assert page([BotState.CHASE], 4, 2) == (["bot_6"], 3, None)
+
+    # Several states merge in creation order
+    assert page([BotState.IDLE, BotState.CHASE], 0, 3) == (["bot_1", "bot_2", "bot_3"], 4, 3)
+    assert page([BotState.IDLE, BotState.CHASE], 3, 3) == (["bot_6"], 4, None)
+
+    # Unfiltered pages skip removed bots
+    manager.remove_bot("bot_3")
+    assert page(None, 0, 2) == (["bot_1", "bot_2"], 4, 2)
+    assert page(None, 2, 2) == (["bot_5", "bot_6"], 4, None)
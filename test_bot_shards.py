@@ -0,0 +1,74 @@
+"""
+Tests for the multi-process sharded bot manager
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from bot_fsm import BotState
+from bot_shards import ShardedBotManager, ShardError
+
+
+def test_update_all_stamps_perception_in_worker():
+    with ShardedBotManager(shard_count=2, capacity_per_shard=8) as shards:
+        bot_id = shards.create_bot()
+        bot = shards.get_bot(bot_id)
+        engine = bot.engine
+        before = engine.perception_version[bot.slot]
+
+        visible = np.zeros(shards.handle_space, dtype=bool)
+        distance = np.full(shards.handle_space, np.inf)
+        handle = bot.shard.index * shards.capacity_per_shard + bot.slot
+        visible[handle], distance[handle] = True, 20.0
+        assert shards.update_all(visible, distance) == 1
+
+        assert bot.state == BotState.CHASE
+        assert engine.perception_version[bot.slot] > before
+        assert bot.player_visible is True and bot.player_distance == 20.0
+
+        # Unchanged perception is not stamped again
+        stamped = engine.perception_version[bot.slot]
+        shards.update_all(visible, distance)
+        assert engine.perception_version[bot.slot] == stamped
+
+
+def test_worker_writes_bump_shared_sequence():
+    with ShardedBotManager(shard_count=1, capacity_per_shard=8) as shards:
+        bot = shards.get_bot(shards.create_bot())
+        stripe = bot.engine.stripe(bot.slot)
+        before = stripe.sequence
+        bot.take_damage(10)
+        assert stripe.sequence == before + 2
+        assert bot.get_state_info()["health"] == 90
+
+
+def test_concurrent_calls_get_their_own_replies():
+    with ShardedBotManager(shard_count=1, capacity_per_shard=256) as shards:
+        created = []
+
+        def create_and_damage():
+            for _ in range(20):
+                bot_id = shards.create_bot()
+                created.append(bot_id)
+                shards.get_bot(bot_id).take_damage(30)
+
+        threads = [threading.Thread(target=create_and_damage) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(created) == sorted(f"bot_{n}" for n in range(1, 81))
+        slots = {shards.get_bot(bot_id).slot for bot_id in created}
+        assert len(slots) == 80
+        assert all(shards.get_bot(bot_id).health == 70 for bot_id in created)
+
+
+def test_failed_create_does_not_use_an_id():
+    with ShardedBotManager(shard_count=2, capacity_per_shard=8) as shards:
+        with pytest.raises(ShardError):
+            shards.create_bot("lots")
+        assert shards.create_bot() == "bot_1"
+        assert list(shards.bots) == ["bot_1"]
@@ -0,0 +1,91 @@
+"""
+Tests for bot snapshots and warm restart
+"""
+
+import struct
+import time
+
+import pytest
+
+from bot_fsm import BotManager, BotState, TickClock
+from bot_snapshot import (HEADER, MAGIC, SnapshotError, SnapshotWriter, load_snapshot,
+                          restore_snapshot, save_snapshot)
+
+
+def make_manager():
+    return BotManager(clock=TickClock(tick_seconds=0.5))
+
+
+def test_restore_rejects_other_versions_and_keeps_the_bots(tmp_path):
+    path = tmp_path / "bots.snap"
+    manager = make_manager()
+    bot_id = manager.create_bot()
+    engine = manager.engine
+
+    path.write_bytes(HEADER.pack(MAGIC, 1, 0, 0, 0, 0, 0.0, HEADER.size))
+    with pytest.raises(SnapshotError):
+        restore_snapshot(manager, path)
+    path.write_bytes(struct.pack("<8s", MAGIC))
+    with pytest.raises(SnapshotError):
+        restore_snapshot(manager, path)
+
+    assert manager.engine is engine
+    assert list(manager.bots) == [bot_id]
+
+
+def test_save_restore_round_trip(tmp_path):
+    path = tmp_path / "bots.snap"
+    manager = make_manager()
+    chaser = manager.create_bot()
+    removed = manager.create_bot()
+    dying = manager.create_bot()
+    boss = manager.create_handle(alias="boss")
+    manager.remove_bot(removed)
+    manager.get_bot(chaser).update(True, 5.0)
+    manager.get_bot(dying).take_damage(100)
+    manager.tick()
+    assert manager.get_bot(chaser).state == BotState.CHASE
+    assert manager.get_bot(dying).state == BotState.DEAD
+
+    assert save_snapshot(manager, path) == 3
+    restored = load_snapshot(path, clock=manager.clock)
+
+    def infos(m):
+        return {bot_id: bot.get_state_info(state_since=True) for bot_id, bot in m.bots.items()}
+
+    assert infos(restored) == infos(manager)
+    assert restored.version == manager.version
+    assert restored.get_bot("boss").slot == manager.get_bot("boss").slot == boss
+    assert restored.get_bot(removed) is None
+    for bot_id in (chaser, dying, "boss"):
+        slot = manager.get_bot(bot_id).slot
+        for column in ("idle_timer", "patrol_timer"):
+            assert getattr(restored.engine, column)[slot] == getattr(manager.engine, column)[slot]
+
+    # Timers keep running: the idle bot leaves IDLE on the same tick in both
+    manager.clock.advance(20)  # past any idle timer
+    changed = sorted(bot.bot_id for bot in manager.tick())
+    assert changed == sorted(bot.bot_id for bot in restored.tick()) == ["boss"]
+    assert infos(restored) == infos(manager)
+
+    # The freed slot and the ID sequence carry over
+    assert restored.engine.free == manager.engine.free
+    new_id = restored.create_bot()
+    assert new_id == manager.create_bot() == "bot_5"
+    assert restored.get_bot(new_id).slot == manager.get_bot(new_id).slot
+
+
+def test_writer_survives_failing_saves(tmp_path, caplog):
+    manager = make_manager()
+    writer = SnapshotWriter(manager, str(tmp_path / "missing" / "bots.snap"), interval=0.01)
+    writer.start()
+    try:
+        deadline = time.monotonic() + 5
+        while writer.errors < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert writer.errors >= 2
+        assert writer._thread.is_alive()
+    finally:
+        writer.stop(final_snapshot=False)
+    assert writer.last_saved is None
+    assert "Saving snapshot" in caplog.text
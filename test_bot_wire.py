@@ -0,0 +1,56 @@
+"""
+Tests for the binary bot state encoding
+"""
+
+import pytest
+
+from bot_fsm import BotManager, TickClock
+from bot_wire import WireError, decode, encode_bots, encode_results
+
+
+def make_manager():
+    return BotManager(clock=TickClock(tick_seconds=0.5))
+
+
+def test_encode_bots_round_trips_state_info():
+    manager = make_manager()
+    named = manager.create_bot(initial_health=80)
+    handle = manager.create_handle()
+    aliased = manager.create_handle(initial_health=120.5, alias="boss")
+    manager.get_bot(named).update(True, 12.5)  # IDLE -> CHASE
+    manager.get_bot(handle).update(False, 33.25)
+    manager.get_bot("boss").take_damage(20)
+    manager.clock.advance(3)
+
+    bots = [manager.get_bot(named), manager.get_bot(handle), manager.get_bot("boss")]
+    payload = encode_bots(manager, [bot.slot for bot in bots], total=7, cursor=42)
+    decoded = decode(payload)
+
+    assert decoded["bots"] == [bot.get_state_info() for bot in bots]
+    assert [bot["bot_id"] for bot in decoded["bots"]] == [named, handle, "boss"]
+    assert aliased == manager.get_bot("boss").slot
+    assert decoded["bot_count"] == 7 and decoded["next_cursor"] == 42
+    assert decoded["version"] == manager.version
+
+
+def test_encode_results_keeps_failed_records():
+    manager = make_manager()
+    bot = manager.get_bot(manager.create_bot())
+    results = [{"success": True, **bot.update(True, 5.0)},
+               {"success": False, "bot_id": "bot_9", "error": "Bot 'bot_9' not found"},
+               {"success": False, "bot_id": None, "error": "bot_id is required"}]
+    decoded = decode(encode_results(results, 3))
+
+    assert decoded["version"] == 3 and decoded["next_cursor"] is None
+    assert decoded["bots"][0] == bot.get_state_info()
+    assert decoded["bots"][1:] == [
+        {"success": False, "bot_id": "bot_9", "error": "Bot 'bot_9' not found"},
+        {"success": False, "bot_id": None, "error": "bot_id is required"}]
+
+
+def test_decode_rejects_bad_payloads():
+    manager = make_manager()
+    payload = encode_bots(manager, [manager.get_bot(manager.create_bot()).slot])
+    for bad in (b"", b"JSON" + payload[4:], payload[:40], payload[:-1]):
+        with pytest.raises(WireError):
+            decode(bad)
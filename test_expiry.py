@@ -0,0 +1,108 @@
+"""
+Tests for the inactivity expiry index
+"""
+
+import threading
+import time
+
+import pytest
+
+from expiry import ExpiryIndex
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_expires_at_its_deadline():
+    clock = FakeClock()
+    index = ExpiryIndex(10, None, clock=clock)
+    index.touch("a")
+    assert index.deadline("a") == 10
+    assert index.pop_expired(9.999) == []
+    assert index.pop_expired(10) == ["a"]
+    assert "a" not in index and len(index) == 0
+    assert index.expired == 1
+
+
+def test_touch_pushes_the_deadline_back():
+    clock = FakeClock()
+    index = ExpiryIndex(10, None, clock=clock)
+    index.touch("a")
+    index.touch("b")
+    clock.now = 6
+    index.touch("a")
+    assert index.pop_expired(10) == ["b"]
+    assert index.pop_expired(15.9) == []
+    assert index.pop_expired(16) == ["a"]
+
+
+def test_discarded_key_never_expires():
+    clock = FakeClock()
+    index = ExpiryIndex(10, None, clock=clock)
+    index.touch("a")
+    index.discard("a")
+    index.discard("unknown")
+    assert index.deadline("a") is None
+    assert index.pop_expired(100) == []
+    assert index.expired == 0
+
+    # Touching again tracks it from scratch
+    clock.now = 50
+    index.touch("a")
+    assert index.pop_expired(59) == []
+    assert index.pop_expired(60) == ["a"]
+
+
+def test_timeout_must_be_positive():
+    with pytest.raises(ValueError):
+        ExpiryIndex(0, None)
+
+
+def test_thread_calls_back_and_stops():
+    done = threading.Event()
+    expired = []
+
+    def on_expire(key):
+        expired.append(key)
+        if len(expired) == 2:
+            done.set()
+
+    index = ExpiryIndex(0.01, on_expire).start()
+    try:
+        index.touch("a")
+        index.touch("b")
+        assert done.wait(5)
+    finally:
+        index.stop()
+    assert expired == ["a", "b"]
+
+    # Nothing expires once stopped
+    index.touch("c")
+    time.sleep(0.05)
+    assert expired == ["a", "b"] and "c" in index
+
+
+def test_failing_callback_does_not_stop_expiry(caplog):
+    done = threading.Event()
+    expired = []
+
+    def on_expire(key):
+        expired.append(key)
+        if key == "bad":
+            raise RuntimeError("client went away")
+        done.set()
+
+    index = ExpiryIndex(0.01, on_expire).start()
+    try:
+        index.touch("bad")
+        index.touch("good")
+        assert done.wait(5)
+    finally:
+        index.stop()
+    assert expired == ["bad", "good"]
+    assert "Expiry callback failed" in caplog.text
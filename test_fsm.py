@@ -1,21 +1,38 @@
 """
 Test script for Bot FSM API
 Demonstrates the finite state machine transitions
+
+Drives fsm_server.app in process through Flask's test client, so no server
+needs to be running, and runs the bots on a simulated clock, so waiting for
+the IDLE timer takes no real time.  For throughput and latency numbers use
+python -m benchmarks.bench_http.
 """
 
-import requests
-import time
 import json
 
-API_URL = "http://localhost:5001"
+from bot_fsm import TickClock
+from fsm_server import app, bot_manager
+
+client = app.test_client()
+
+# Simulated time; wait() advances it instead of sleeping
+clock = TickClock(tick_seconds=0.5)
+bot_manager.clock = bot_manager.engine.clock = clock
+
+def wait(seconds):
+    """Let simulated time pass"""
+    clock.advance(round(seconds / clock.tick_seconds))
 
 def print_separator():
     print("\n" + "=" * 60)
 
 def print_state(response_data):
     """Pretty print bot state"""
-    if 'state' in response_data:
-        state = response_data['state']
+    # /create and /damage nest the state info; /update returns it flat
+    state = response_data.get('state')
+    if not isinstance(state, dict) and 'bot_id' in response_data:
+        state = response_data
+    if isinstance(state, dict):
         print(f"\n🤖 Bot: {state['bot_id']}")
         print(f"   State: {state['state'].upper()}")
         print(f"   Reason: {state['reason']}")
@@ -35,114 +52,114 @@ def test_fsm_transitions():
     
     # Step 1: Create a new bot
     print("\n📍 Step 1: Creating a new bot...")
-    response = requests.post(f"{API_URL}/create", json={"initial_health": 100})
-    data = response.json()
+    response = client.post('/create', json={"initial_health": 100})
+    data = response.get_json()
     bot_id = data['bot_id']
     print(f"✅ Created {bot_id}")
     print_state(data)
     
-    time.sleep(1)
+    wait(1)
     
     # Step 2: IDLE → PATROL (wait for timer)
     print_separator()
     print("📍 Step 2: Waiting for IDLE → PATROL transition...")
-    time.sleep(3)
-    response = requests.post(f"{API_URL}/update", json={
+    wait(5)  # the IDLE timer is 2-5 seconds
+    response = client.post('/update', json={
         "bot_id": bot_id,
         "player_visible": False,
         "player_distance": 100
     })
-    print_state(response.json())
+    print_state(response.get_json())
     
-    time.sleep(1)
+    wait(1)
     
     # Step 3: PATROL → CHASE (player detected)
     print_separator()
     print("📍 Step 3: Player detected! PATROL → CHASE...")
-    response = requests.post(f"{API_URL}/update", json={
+    response = client.post('/update', json={
         "bot_id": bot_id,
         "player_visible": True,
         "player_distance": 25
     })
-    print_state(response.json())
+    print_state(response.get_json())
     
-    time.sleep(1)
+    wait(1)
     
     # Step 4: CHASE → ATTACK (player in range)
     print_separator()
     print("📍 Step 4: Player in attack range! CHASE → ATTACK...")
-    response = requests.post(f"{API_URL}/update", json={
+    response = client.post('/update', json={
         "bot_id": bot_id,
         "player_visible": True,
         "player_distance": 8
     })
-    print_state(response.json())
+    print_state(response.get_json())
     
-    time.sleep(1)
+    wait(1)
     
     # Step 5: Apply damage to trigger FLEE
     print_separator()
     print("📍 Step 5: Bot takes heavy damage! ATTACK → FLEE...")
-    response = requests.post(f"{API_URL}/damage", json={
+    response = client.post('/damage', json={
         "bot_id": bot_id,
         "damage": 85
     })
     print(f"💥 Damage dealt: 85")
-    print_state(response.json())
+    print_state(response.get_json())
     
     # Update state to trigger flee
-    response = requests.post(f"{API_URL}/update", json={
+    response = client.post('/update', json={
         "bot_id": bot_id,
         "player_visible": True,
         "player_distance": 8
     })
-    print_state(response.json())
+    print_state(response.get_json())
     
-    time.sleep(1)
+    wait(1)
     
     # Step 6: Heal bot to trigger re-engagement
     print_separator()
     print("📍 Step 6: Bot heals! FLEE → CHASE...")
-    response = requests.post(f"{API_URL}/heal", json={
+    response = client.post('/heal', json={
         "bot_id": bot_id,
         "amount": 60
     })
     print(f"💚 Healed: 60")
-    print_state(response.json())
+    print_state(response.get_json())
     
     # Update state
-    response = requests.post(f"{API_URL}/update", json={
+    response = client.post('/update', json={
         "bot_id": bot_id,
         "player_visible": True,
         "player_distance": 20
     })
-    print_state(response.json())
+    print_state(response.get_json())
     
-    time.sleep(1)
+    wait(1)
     
     # Step 7: Kill the bot
     print_separator()
     print("📍 Step 7: Bot takes fatal damage! → DEAD...")
-    response = requests.post(f"{API_URL}/damage", json={
+    response = client.post('/damage', json={
         "bot_id": bot_id,
         "damage": 100
     })
     print(f"💀 Fatal damage!")
-    print_state(response.json())
+    print_state(response.get_json())
     
-    time.sleep(1)
+    wait(1)
     
     # Step 8: Reset bot
     print_separator()
     print("📍 Step 8: Resetting bot to IDLE state...")
-    response = requests.post(f"{API_URL}/reset", json={"bot_id": bot_id})
-    print_state(response.json())
+    response = client.post('/reset', json={"bot_id": bot_id})
+    print_state(response.get_json())
     
     # Step 9: Get all bots
     print_separator()
     print("📍 Step 9: Getting all bots...")
-    response = requests.get(f"{API_URL}/bots")
-    data = response.json()
+    response = client.get('/bots')
+    data = response.get_json()
     print(f"\n📊 Total bots: {data['bot_count']}")
     for bot in data['bots']:
         print(f"\n   {bot['bot_id']}: {bot['state']} (Health: {bot['health']})")
@@ -159,8 +176,8 @@ def test_scenario_player_approach():
     print_separator()
     
     # Create bot
-    response = requests.post(f"{API_URL}/create")
-    bot_id = response.json()['bot_id']
+    response = client.post('/create', json={})
+    bot_id = response.get_json()['bot_id']
     
     print(f"\n🤖 Testing with {bot_id}")
     
@@ -169,28 +186,18 @@ def test_scenario_player_approach():
     
     for distance in distances:
         print(f"\n📏 Player distance: {distance}m")
-        response = requests.post(f"{API_URL}/update", json={
+        response = client.post('/update', json={
             "bot_id": bot_id,
             "player_visible": True,
             "player_distance": distance
         })
-        data = response.json()
+        data = response.get_json()
         print(f"   State: {data['state'].upper()} - {data['reason']}")
-        time.sleep(0.5)
+        wait(0.5)
     
     print_separator()
 
 if __name__ == "__main__":
-    try:
-        # Check if server is running
-        response = requests.get(API_URL)
-        print("✅ FSM API Server is running!")
-        
-        # Run tests
-        test_fsm_transitions()
-        time.sleep(2)
-        test_scenario_player_approach()
-        
-    except requests.exceptions.ConnectionError:
-        print("❌ Error: FSM API Server is not running!")
-        print("   Please start the server first: python fsm_server.py")
+    test_fsm_transitions()
+    wait(2)
+    test_scenario_player_approach()
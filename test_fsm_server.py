@@ -0,0 +1,137 @@
+"""
+Request validation tests for the Bot FSM API, through Flask's test client
+"""
+
+import bot_wire
+from fsm_server import app, bot_manager, simulation
+
+client = app.test_client()
+
+
+def test_loop_requires_boolean_running():
+    for running in ("false", 0, 1, None, [], {}):
+        response = client.post('/loop', json={"running": running})
+        assert response.status_code == 400, running
+        assert response.get_json()["success"] is False
+    assert not simulation.running
+
+
+def test_loop_start_and_stop():
+    try:
+        response = client.post('/loop', json={"running": True, "rate": 50})
+        assert response.status_code == 200
+        assert response.get_json()["running"] is True
+    finally:
+        response = client.post('/loop', json={"running": False})
+    data = response.get_json()
+    assert data["running"] is False
+    assert data["errors"] == 0 and data["last_error"] is None
+
+
+def test_create_requires_positive_finite_health():
+    before = client.get('/bots').get_json()["bot_count"]
+    for health in ("100", None, True, 0, -5, float("nan"), float("inf")):
+        response = client.post('/create', json={"initial_health": health})
+        assert response.status_code == 400, health
+        assert response.get_json()["success"] is False
+    assert client.get('/bots').get_json()["bot_count"] == before
+
+    response = client.post('/create', json={"initial_health": 50.5})
+    assert response.status_code == 200
+    assert response.get_json()["state"]["health"] == 50.5
+    assert client.get('/bots').get_json()["bot_count"] == before + 1
+
+
+def test_update_bot_id_must_be_string_or_handle():
+    for bot_id in (True, [], {}, "", 1.5):
+        response = client.post('/update', json={"bot_id": bot_id})
+        assert response.status_code == 400, bot_id
+        assert response.get_json()["success"] is False
+
+
+def test_positions_rejects_non_finite_before_moving_anything():
+    bot_id = client.post('/create', json={}).get_json()["bot_id"]
+    for bad in (float("nan"), float("inf"), "5", True, None):
+        response = client.post('/positions', json={
+            "players": {"p_valid": {"x": 0, "y": 0, "z": 0}},
+            "bots": {bot_id: {"x": bad, "y": 0, "z": 0}},
+        })
+        assert response.status_code == 400, bad
+        assert "p_valid" not in bot_manager.players.players
+    response = client.post('/positions', json={"removed_players": "p_valid"})
+    assert response.status_code == 400
+
+
+def test_metrics_count_transitions_without_history():
+    assert not bot_manager.engine.history_size
+    bot_id = client.post('/create', json={}).get_json()["bot_id"]
+    response = client.post('/update', json={
+        "bot_id": bot_id, "player_visible": True, "player_distance": 5})
+    assert response.get_json()["state"] == "chase"
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert "# TYPE fsm_transitions_total counter" in text
+    samples = [line for line in text.splitlines()
+               if line.startswith("fsm_transitions_total{") and 'from="idle"' in line
+               and 'to="chase"' in line]
+    assert len(samples) == 1 and float(samples[0].rsplit(" ", 1)[1]) >= 1
+
+
+def test_binary_encoding_and_json_fallback():
+    bot_id = client.post('/create', json={}).get_json()["bot_id"]
+    update = {"bot_id": bot_id, "player_visible": True, "player_distance": 12.5}
+
+    response = client.post('/update', json=update, headers={"Accept": bot_wire.MEDIA_TYPE})
+    assert response.status_code == 200
+    assert response.mimetype == bot_wire.MEDIA_TYPE and "Accept" in response.vary
+    (info,) = bot_wire.decode(response.get_data())["bots"]
+    assert info["bot_id"] == bot_id and info["state"] == "chase"
+    assert info["player_distance"] == 12.5
+
+    # JSON when asked for, on ties, and without an Accept header
+    for accept in ("application/json", "*/*", f"application/json, {bot_wire.MEDIA_TYPE}", None):
+        headers = {"Accept": accept} if accept else {}
+        response = client.post('/update', json=update, headers=headers)
+        assert response.mimetype == "application/json", accept
+        assert response.get_json()["state"] == "chase"
+
+    json_page = client.get('/bots').get_json()
+    response = client.get('/bots', headers={"Accept": bot_wire.MEDIA_TYPE})
+    assert response.mimetype == bot_wire.MEDIA_TYPE
+    binary_page = bot_wire.decode(response.get_data())
+    assert binary_page["bot_count"] == json_page["bot_count"]
+    assert [bot["bot_id"] for bot in binary_page["bots"]] == [bot["bot_id"] for bot in json_page["bots"]]
+
+
+def test_state_etag_304_until_the_bot_changes():
+    bot_id = client.post('/create', json={}).get_json()["bot_id"]
+    for query in ({"bot_id": bot_id, "state_since": 1}, {"bot_id": bot_id}):
+        response = client.get('/state', query_string=query)
+        etag = response.headers["ETag"]
+        assert etag.startswith('W/') == ("state_since" not in query)
+
+        response = client.get('/state', query_string=query, headers={"If-None-Match": etag})
+        assert response.status_code == 304 and response.headers["ETag"] == etag
+        assert response.get_data() == b""
+
+    client.post('/damage', json={"bot_id": bot_id, "damage": 10})
+    response = client.get('/state', query_string=query, headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    assert response.get_json()["state"]["health"] == 90
+
+
+def test_bots_etag_covers_query_and_changes():
+    bot_id = client.post('/create', json={}).get_json()["bot_id"]
+    client.post('/create', json={})
+    queries = [{"state_since": 1}, {"state_since": 1, "limit": 1},
+               {"state_since": 1, "limit": 1, "cursor": 1}, {"state_since": 1, "state": "idle"}]
+    etags = [client.get('/bots', query_string=query).headers["ETag"] for query in queries]
+    assert len(set(etags)) == len(etags)
+
+    for query, etag in zip(queries, etags):
+        response = client.get('/bots', query_string=query, headers={"If-None-Match": etag})
+        assert response.status_code == 304, query
+
+    client.post('/update', json={"bot_id": bot_id, "player_visible": True, "player_distance": 5})
+    response = client.get('/bots', query_string=queries[0], headers={"If-None-Match": etags[0]})
+    assert response.status_code == 200 and response.headers["ETag"] != etags[0]
@@ -0,0 +1,59 @@
+"""
+Tests for the area-of-interest grid
+"""
+
+import pytest
+
+from interest import InterestGrid
+
+
+def test_near_is_inclusive_and_excludes_far_players():
+    grid = InterestGrid(10)
+    grid.move("a", 0, 0)
+    grid.move("b", 3, 4)  # exactly 5 away
+    grid.move("c", 30, 0)
+    assert sorted(grid.near(0, 0, 5)) == ["a", "b"]
+    assert sorted(grid.near_player("a", 5)) == ["b"]
+    assert sorted(grid.near_player("a", 30)) == ["b", "c"]
+    assert grid.near_player("nobody", 100) == []
+
+
+def test_players_moving_between_cells():
+    grid = InterestGrid(10)
+    grid.move("a", 0, 0)
+    grid.move("b", 5, 5)
+    assert grid._cell_of["b"] == (0, 0)
+
+    # Across a cell boundary, including into negative cells
+    grid.move("b", 25, -5)
+    assert grid._cell_of["b"] == (2, -1)
+    assert (0, 0) in grid._cells and grid._cells[(0, 0)] == {"a"}
+    assert grid.near_player("a", 20) == []
+    assert grid.near_player("a", 30) == ["b"]
+
+    # Within a cell only the position changes
+    grid.move("b", 29, -1)
+    assert grid._cells[(2, -1)] == {"b"}
+    assert grid.positions["b"] == (29.0, -1.0)
+
+    # Back next to a; the emptied cell is dropped
+    grid.move("b", 1, 1)
+    assert (2, -1) not in grid._cells
+    assert grid.near_player("a", 2) == ["b"]
+
+    grid.remove("b")
+    grid.remove("b")
+    assert "b" not in grid and len(grid) == 1
+    assert grid._cells == {(0, 0): {"a"}}
+
+
+def test_query_spanning_many_cells():
+    grid = InterestGrid(1)
+    for i in range(-10, 11):
+        grid.move(i, i, 0)
+    assert sorted(grid.near(0.5, 0, 3)) == [-2, -1, 0, 1, 2, 3]
+
+
+def test_cell_size_must_be_positive():
+    with pytest.raises(ValueError):
+        InterestGrid(0)
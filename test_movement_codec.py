@@ -0,0 +1,130 @@
+"""
+Tests for the quantized, delta-compressed movement codec
+"""
+
+import math
+import struct
+
+import pytest
+
+from movement_codec import (ALL_COMPONENTS, FORMAT_VERSION, HEADER, CodecError, MovementCodec,
+                            MovementDecoder, quantize)
+
+
+def test_quantize_never_raises_on_bad_input():
+    bad = {"x": float("nan"), "y": float("inf"), "z": "far"}
+    assert quantize(bad, {"x": None, "y": -float("inf"), "z": float("nan")}) == (
+        0, 0x7FFF, 0, 0, quantize({}, {"y": -1e9})[4], 0)
+    assert quantize(None, None) == (0, 0, 0, 0, 0, 0)
+    assert quantize({"x": -1e6}, {})[0] == -0x8000
+
+
+def test_quantize_values():
+    values = quantize({"x": 1.234, "y": -2.5, "z": 0}, {"x": 0, "y": math.pi, "z": -math.pi / 2})
+    assert values == (123, -250, 0, 0, 0x8000, 0xC000)
+
+
+def movement(sid, x, z=0.0, heading=0.0):
+    return {"id": sid, "position": {"x": x, "y": 0, "z": z}, "rotation": {"x": 0, "y": heading, "z": 0}}
+
+
+def entries(payload):
+    """(net ID, mask) of every entry in a payload, assuming no NEW entries"""
+    _, _, _, count = HEADER.unpack_from(payload)
+    offset, found = HEADER.size, []
+    for _ in range(count):
+        net_id, mask = struct.unpack_from("<HB", payload, offset)
+        found.append((net_id, mask))
+        offset += 3 + 2 * bin(mask & ALL_COMPONENTS).count("1")
+    return found
+
+
+def test_round_trip_with_acks():
+    codec = MovementCodec()
+    codec.add_client("me")
+    decoder = MovementDecoder()
+
+    first = codec.encode("me", 1, [movement("a", 1.5), movement("b", -2.25, 3.0, math.pi)])
+    assert HEADER.unpack_from(first) == (FORMAT_VERSION, 1, 0, 2)
+    moved = decoder.decode(first)
+    assert [sid for sid, _, _ in moved] == ["a", "b"]
+    assert moved[1][1] == {"x": -2.25, "y": 0, "z": 3.0}
+    assert moved[1][2]["y"] == math.pi
+
+    # Unacknowledged: still encoded against nothing, so sent in full again
+    again = codec.encode("me", 2, [movement("a", 1.5), movement("b", -2.25, 3.0, math.pi)])
+    assert HEADER.unpack_from(again)[1:] == (2, 0, 2)
+    decoder.decode(again)
+
+    codec.acknowledge("me", 2)
+    # Unchanged since the baseline: nothing to send
+    assert codec.encode("me", 3, [movement("a", 1.5)]) is None
+    delta = codec.encode("me", 4, [movement("a", 1.75), movement("b", -2.25, 3.0, math.pi)])
+    assert HEADER.unpack_from(delta)[1:] == (4, 2, 1)
+    assert entries(delta) == [(1, 0b1)]  # x only, no NEW flag
+    assert len(delta) == HEADER.size + 3 + 2
+    (sid, position, _), = decoder.decode(delta)
+    assert (sid, position["x"]) == ("a", 1.75)
+
+
+def test_acks_for_pruned_ticks_are_ignored():
+    codec = MovementCodec(history=4)
+    codec.add_client("me")
+    decoder = MovementDecoder()
+    for tick in range(1, 11):
+        decoder.decode(codec.encode("me", tick, [movement("a", tick)]))
+
+    # Only the newest `history` ticks are kept; an ack for an older one
+    # leaves the baseline alone
+    codec.acknowledge("me", 3)
+    assert HEADER.unpack_from(codec.encode("me", 11, [movement("a", 11)]))[2] == 0
+    codec.acknowledge("me", 9)
+    payload = codec.encode("me", 12, [movement("a", 12)])
+    assert HEADER.unpack_from(payload)[2] == 9
+    (_, position, _), = decoder.decode(payload)
+    assert position["x"] == 12
+
+    # Later acks may not move the baseline backwards
+    codec.acknowledge("me", 8)
+    assert HEADER.unpack_from(codec.encode("me", 13, [movement("a", 13)]))[2] == 9
+
+
+def test_removed_player_net_id_is_resent_as_new():
+    codec = MovementCodec()
+    codec.add_client("me")
+    decoder = MovementDecoder()
+    decoder.decode(codec.encode("me", 1, [movement("a", 1), movement("b", 2)]))
+    codec.acknowledge("me", 1)
+
+    codec.remove("a")
+    codec._next_net_id = 1  # hand a's net ID straight to the next player
+    payload = codec.encode("me", 2, [movement("c", 1), movement("b", 2)])
+    moved = decoder.decode(payload)
+    assert [(sid, position["x"]) for sid, position, _ in moved] == [("c", 1)]
+    assert decoder.ids == {1: "c", 2: "b"}
+
+    # A removed receiver gets nothing
+    codec.remove("me")
+    assert "me" not in codec
+    assert codec.encode("me", 3, [movement("b", 5)]) is None
+
+
+def test_net_ids_wrap_at_16_bits_and_skip_ids_in_use():
+    codec = MovementCodec()
+    codec.add_client("me")
+    decoder = MovementDecoder()
+    decoder.decode(codec.encode("me", 1, [movement("first", 0)]))  # net ID 1
+    codec._next_net_id = 0xFFFF
+    moved = decoder.decode(codec.encode("me", 2, [movement("last", 1), movement("wrapped", 2)]))
+    assert [sid for sid, _, _ in moved] == ["last", "wrapped"]
+    assert decoder.ids == {1: "first", 0xFFFF: "last", 2: "wrapped"}
+
+
+def test_decoder_rejects_bad_payloads():
+    decoder = MovementDecoder()
+    with pytest.raises(CodecError):
+        decoder.decode(HEADER.pack(FORMAT_VERSION + 1, 1, 0, 0))
+    with pytest.raises(CodecError):
+        decoder.decode(HEADER.pack(FORMAT_VERSION, 2, 1, 0))  # unknown baseline
+    with pytest.raises(CodecError):
+        decoder.decode(HEADER.pack(FORMAT_VERSION, 1, 0, 1))  # truncated
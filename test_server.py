@@ -0,0 +1,167 @@
+"""
+Socket.IO tests for the game server, through Flask-SocketIO's test client
+"""
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def connect():
+    """Connect test clients; returns (client, sid) and disconnects them afterwards"""
+    clients = []
+
+    def connect(**kwargs):
+        before = set(server.players)
+        client = server.socketio.test_client(server.app, **kwargs)
+        (sid,) = set(server.players) - before
+        clients.append(client)
+        return client, sid
+
+    yield connect
+    for client in clients:
+        if client.is_connected():
+            client.disconnect()
+
+
+def test_player_update_rejects_non_finite_values(connect):
+    client, sid = connect(auth={'movement': 'binary'})
+    other, _ = connect()
+    client.emit('player_update', {'position': {'x': 1, 'y': 2, 'z': 3},
+                                  'rotation': {'x': 0, 'y': 1.5, 'z': 0}})
+    for position, rotation in [
+        ({'x': float('nan'), 'y': 0, 'z': 0}, None),
+        ({'x': float('inf'), 'y': 0, 'z': 0}, None),
+        (None, {'x': 0, 'y': '1', 'z': 0}),
+        ({'x': True, 'y': 0, 'z': 0}, None),
+        ('here', None),
+    ]:
+        update = {'position': position} if position is not None else {}
+        if rotation is not None:
+            update['rotation'] = rotation
+        client.emit('player_update', update)
+        assert server.players[sid]['position'] == {'x': 1, 'y': 2, 'z': 3}
+        assert server.players[sid]['rotation'] == {'x': 0, 'y': 1.5, 'z': 0}
+
+    # Missing axes keep their last value
+    client.emit('player_update', {'position': {'x': 5}})
+    assert server.players[sid]['position'] == {'x': 5, 'y': 2, 'z': 3}
+    server.broadcast_snapshot()
+    server.broadcast_snapshot()
+
+
+def test_respawn_falls_back_to_origin(connect):
+    client, sid = connect()
+    client.emit('player_respawn', {'position': {'x': float('nan'), 'y': 0, 'z': 0}})
+    assert server.players[sid]['position'] == {'x': 0, 'y': 0, 'z': 0}
+    client.emit('player_respawn', {'position': {'x': 4, 'y': 0, 'z': -4}})
+    assert server.players[sid]['position'] == {'x': 4, 'y': 0, 'z': -4}
+
+
+def snapshots(client):
+    """Player IDs in each world_snapshot a client received since the last call"""
+    return [[movement['id'] for movement in message['args'][0]['players']]
+            for message in client.get_received() if message['name'] == 'world_snapshot']
+
+
+def test_far_players_arrive_on_far_tier_ticks(connect, monkeypatch):
+    monkeypatch.setattr(server, 'SNAPSHOT_RATE', 20)
+    monkeypatch.setattr(server, 'INTEREST_RADIUS', 40)
+    monkeypatch.setattr(server, 'FAR_TIER_INTERVAL', 10)
+    mover, mover_sid = connect()
+    watcher, watcher_sid = connect()
+    still = {'rotation': {'x': 0, 'y': 0, 'z': 0}}
+    mover.emit('player_update', {'position': {'x': 0, 'y': 0, 'z': 0}, **still})
+    watcher.emit('player_update', {'position': {'x': 60, 'y': 0, 'z': 0}, **still})
+    monkeypatch.setattr(server, 'snapshot_tick', 9)
+    server.broadcast_snapshot()  # far tick: flush both tiers
+    snapshots(mover), snapshots(watcher)
+
+    # Out of range: nothing on ordinary ticks...
+    mover.emit('player_update', {'position': {'x': 1, 'y': 0, 'z': 0}, **still})
+    for _ in range(8):
+        server.broadcast_snapshot()
+    assert server.snapshot_tick == 18
+    assert snapshots(watcher) == []
+
+    # ...and the latest position on the next far tick
+    mover.emit('player_update', {'position': {'x': 2, 'y': 0, 'z': 0}, **still})
+    server.broadcast_snapshot()
+    server.broadcast_snapshot()
+    assert server.snapshot_tick == 20
+    assert snapshots(watcher) == [[mover_sid]]
+
+    # In range: every tick
+    watcher.emit('player_update', {'position': {'x': 30, 'y': 0, 'z': 0}, **still})
+    mover.emit('player_update', {'position': {'x': 3, 'y': 0, 'z': 0}, **still})
+    server.broadcast_snapshot()
+    assert snapshots(watcher) == [[mover_sid]]
+    assert snapshots(mover) == [[watcher_sid]]
+
+
+def room_events(client, name):
+    """Payloads of one event a client received since the last call"""
+    return [message['args'][0] for message in client.get_received() if message['name'] == name]
+
+
+def test_join_full_room_is_refused(connect, monkeypatch):
+    monkeypatch.setattr(server, 'MAX_ROOM_PLAYERS', 2)
+    host, host_sid = connect()
+    guest, guest_sid = connect()
+    late, late_sid = connect()
+
+    host.get_received(), guest.get_received()
+
+    # Capacity is clamped to 1..MAX_ROOM_PLAYERS
+    host.emit('create_room', {'name': 'duel', 'capacity': 99})
+    (room,) = room_events(host, 'room_joined')
+    assert room['capacity'] == 2 and room['players'] == 1
+    guest.emit('join_room', {'roomId': room['id']})
+    assert room_events(guest, 'room_joined')[0]['players'] == 2
+
+    late.get_received()
+    late.emit('join_room', {'roomId': room['id']})
+    assert room_events(late, 'room_error') == [{'error': 'Room is full', 'roomId': room['id']}]
+    assert server.players[late_sid]['room'] != room['id']
+    assert set(server.game_rooms[room['id']]['players']) == {host_sid, guest_sid}
+
+    host.emit('create_room', {'capacity': 0})
+    assert room_events(host, 'room_joined')[0]['capacity'] == 1
+
+
+def test_empty_rooms_close(connect):
+    host, host_sid = connect()
+    guest, _ = connect()
+    host.emit('create_room', {'name': 'private'})
+    room_id = server.players[host_sid]['room']
+    guest.emit('join_room', {'roomId': room_id})
+
+    # Still open while someone is inside
+    host.emit('leave_room')
+    assert room_id in server.game_rooms
+    assert server.players[host_sid]['room'] != room_id
+
+    guest.disconnect()
+    assert room_id not in server.game_rooms
+
+    host.emit('create_room')
+    room_id = server.players[host_sid]['room']
+    host.emit('leave_room')
+    assert room_id not in server.game_rooms
+
+
+def test_room_errors(connect):
+    client, sid = connect()
+    room_id = server.players[sid]['room']
+    client.get_received()
+
+    client.emit('join_room', {'roomId': 'room_missing'})
+    client.emit('join_room', None)
+    client.emit('create_room', {'capacity': 'lots'})
+    assert room_events(client, 'room_error') == [
+        {'error': 'Room not found', 'roomId': 'room_missing'},
+        {'error': 'Room not found', 'roomId': None},
+        {'error': 'capacity must be an integer'},
+    ]
+    assert server.players[sid]['room'] == room_id